@@ -5,17 +5,20 @@ AI Services 통합 모듈
 """
 
 # OpenAI 서비스
-from ai_services.openai_service import get_gpt_response_streaming
+from ai_services.openai_service import get_gpt_response_streaming, queue_gpt_request
 
 # MiniMax 서비스  
-from ai_services.minimax_service import generate_image, generate_video
+from ai_services.minimax_service import generate_image, generate_video, submit_video, wait_for_video
 
 # Stability AI 서비스
 from ai_services.stability_service import generate_stability_image
 
 __all__ = [
     'get_gpt_response_streaming',
+    'queue_gpt_request',
     'generate_image', 
     'generate_video',
+    'submit_video',
+    'wait_for_video',
     'generate_stability_image'
 ]
@@ -0,0 +1,140 @@
+"""
+채팅 업스트림 파이프라인
+
+/채팅 응답 생성에서 Discord와 무관한 부분을 한 곳에 모았습니다. 채팅 서비스
+(openai_service, openai_service_enhanced는 그 재노출)는 여기서 가져다 씁니다.
+- chat_request: 채널의 대화 맥락을 포함한 메시지 목록과 응답 캐시 키
+- upstream_stream: 첫 토큰 / 토큰 간격 제한, 재시도, 헤지, 지표 기록을 거친 텍스트 조각 스트림
+- summarize_conversation: 대화 기억 저장소가 오래된 턴을 줄일 때 쓰는 요약
+"""
+
+import asyncio
+import logging
+import time
+
+from openai import APIError, APITimeoutError, RateLimitError
+
+from ai_services.openai_client import openai_client  # 공유 클라이언트 (연결 풀 / 예열)
+from concurrency_limiter import report_overload
+from conversation_store import conversation_store
+from hedging import CHAT_HEDGE_MODEL, chat_hedging
+from metrics import (
+    latency_metrics, provider_metrics,
+    OUTCOME_OK, OUTCOME_ERROR, OUTCOME_TIMEOUT, OUTCOME_STALLED, OUTCOME_RATE_LIMITED
+)
+from response_cache import cache_key, context_fingerprint
+from stream_guard import CHAT_STREAM_RETRIES, STAGE_IDLE, StreamTimeout, guarded_stream
+
+logger = logging.getLogger(__name__)
+
+CHAT_MODEL = "gpt-4o-mini"  # 빠른 모델 사용
+# 응답에 영향을 주는 생성 파라미터 (응답 캐시 키에 포함)
+CHAT_PARAMS = {"max_tokens": 1500, "temperature": 0.7}
+# HTTP 타임아웃 (초) - 보조 안전장치 (첫 토큰 / 토큰 간격은 guarded_stream이 제한)
+CHAT_HTTP_TIMEOUT = 25
+
+SYSTEM_PROMPT = "당신은 도움이 되고 친근한 AI 어시스턴트입니다. 사용자의 질문에 상세하고 유용한 답변을 제공합니다."
+
+SUMMARY_PROMPT = "다음 대화에서 이후 질문에 답할 때 필요한 사실, 결정, 맥락만 한국어로 5문장 이내로 요약하세요."
+
+async def summarize_conversation(messages) -> str:
+    """오래된 대화 턴 요약 (대화 기억 저장소가 백그라운드에서 호출)"""
+    transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+    try:
+        response = await openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": transcript}
+            ],
+            max_tokens=300,
+            temperature=0.2,
+            timeout=20
+        )
+    except APIError:
+        provider_metrics.count('openai', OUTCOME_ERROR)
+        raise
+    provider_metrics.count('openai', OUTCOME_OK)
+    return response.choices[0].message.content or ""
+
+if openai_client:
+    conversation_store.summarizer = summarize_conversation
+
+async def _content_deltas(stream):
+    """스트림 청크 중 텍스트 조각만 전달"""
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+async def upstream_stream(messages):
+    """
+    업스트림 채팅 스트림 하나 (같은 질문의 요청들이 공유하므로 결과는 여기서 한 번만 기록)
+
+    실패하면 기록 후 예외를 그대로 올려 구독한 모든 요청이 각자 안내하도록 합니다.
+    첫 토큰이 제한 시간 안에 오지 않으면 아직 보여 준 내용이 없으므로 CHAT_STREAM_RETRIES번까지 다시 요청합니다.
+    """
+    def open_stream(model=CHAT_MODEL):
+        return openai_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            timeout=CHAT_HTTP_TIMEOUT,
+            **CHAT_PARAMS
+        )
+
+    # 첫 토큰이 최근 p95보다 늦으면 (예산 안에서) 헤지 요청
+    hedge = chat_hedging.plan(lambda: open_stream(CHAT_HEDGE_MODEL or CHAT_MODEL))
+    attempt = 0
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                # 첫 토큰 / 토큰 간격 / 업스트림 대기 시간 기록
+                async for delta in latency_metrics.observe_stream(
+                    _content_deltas(guarded_stream(open_stream, hedge=hedge)), 'chat', started
+                ):
+                    yield delta
+                break
+            except StreamTimeout as e:
+                report_overload()
+                if e.stage == STAGE_IDLE:
+                    provider_metrics.count('openai', OUTCOME_STALLED)
+                    raise
+                provider_metrics.count('openai', OUTCOME_TIMEOUT)
+                if attempt >= CHAT_STREAM_RETRIES:
+                    raise
+                attempt += 1
+                logger.warning(f"No first token within {e.limit}s, retrying chat stream ({attempt}/{CHAT_STREAM_RETRIES})")
+    except StreamTimeout:
+        raise
+    except (asyncio.TimeoutError, APITimeoutError):
+        report_overload()
+        provider_metrics.count('openai', OUTCOME_TIMEOUT)
+        raise
+    except RateLimitError:
+        report_overload()
+        provider_metrics.count('openai', OUTCOME_RATE_LIMITED)
+        raise
+    except APIError:
+        provider_metrics.count('openai', OUTCOME_ERROR)
+        raise
+    provider_metrics.count('openai', OUTCOME_OK)
+
+def chat_request(prompt: str, channel_id: int):
+    """
+    채널의 대화 맥락을 포함한 메시지 목록과 캐시 키
+
+    Returns:
+        (메시지 목록, 맥락 해시, 캐시 키)
+    """
+    # 프롬프트 최적화: 도움이 되고 상세한 응답 요청
+    optimized_prompt = f"""
+다음 질문에 도움이 되고 상세한 답변을 해주세요. 필요하다면 예시나 설명도 포함해주세요.
+
+질문: {prompt}
+        """
+
+    # 채널(스레드)의 이전 대화를 토큰 예산 안에서 포함
+    messages = conversation_store.build_messages(channel_id, SYSTEM_PROMPT, optimized_prompt)
+    fingerprint = context_fingerprint(CHAT_MODEL, CHAT_PARAMS, messages[:-1])
+    return messages, fingerprint, cache_key(prompt, fingerprint)
@@ -2,17 +2,59 @@ import json
 import asyncio
 import aiohttp
 import base64
-from env_manager import get_minimax_key
+from env_manager import get_env, get_minimax_key
+from concurrency_limiter import report_overload
+from http_sessions import http_sessions
+from video_poller import VideoPoller
+from metrics import (
+    latency_metrics, provider_metrics, STAGE_PROVIDER,
+    OUTCOME_OK, OUTCOME_ERROR, OUTCOME_TIMEOUT, OUTCOME_RATE_LIMITED
+)
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
 # 환경 변수 로드 (캐시된 값 사용)
 MINIMAX_API_KEY = get_minimax_key()
+# 비디오 API 주소 (테스트용 가짜 서버 등으로 바꿀 수 있음)
+MINIMAX_API_BASE = get_env("MINIMAX_API_BASE", "https://api.minimax.io").rstrip("/")
 
 if not MINIMAX_API_KEY:
     logger.warning("⚠️ MINIMAX_API_KEY가 환경변수에 설정되지 않았습니다.")
 
+# 요청별 타임아웃 (세션은 http_sessions에서 공유)
+IMAGE_TIMEOUT = aiohttp.ClientTimeout(
+    total=60,  # 전체 타임아웃 60초로 증가
+    connect=10,  # 연결 타임아웃 10초
+    sock_read=30  # 소켓 읽기 타임아웃 30초
+)
+SUBMIT_TIMEOUT = aiohttp.ClientTimeout(total=30)
+QUERY_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+# 비디오 생성 최대 대기 시간 (초)
+VIDEO_TIMEOUT = 300
+
+# 완료 콜백을 받는 작업은 콜백이 오지 않을 때를 대비해 이 간격(초)으로만 조회
+CALLBACK_FALLBACK_INTERVAL = 60.0
+
+# 완료 콜백 수신 주소 (콜백 서버가 실행 중일 때만 설정됨)
+_callback_url: Optional[str] = None
+
+def set_callback_url(url: Optional[str]) -> None:
+    """작업 제출 시 MiniMax에 알려줄 완료 콜백 주소 설정 (None이면 폴링만 사용)"""
+    global _callback_url
+    _callback_url = url
+
+def _status_outcome(status: int) -> str:
+    """HTTP 상태 코드를 호출 결과로 분류"""
+    if status == 200:
+        return OUTCOME_OK
+    if status == 429:
+        return OUTCOME_RATE_LIMITED
+    return OUTCOME_ERROR
+
+@latency_metrics.timed('image', STAGE_PROVIDER)
 async def generate_image(bot, prompt: str, image_attachment=None) -> str:
     """최적화된 이미지 생성 - MiniMax subject_reference 지원"""
     if not MINIMAX_API_KEY:
@@ -76,36 +118,38 @@ async def generate_image(bot, prompt: str, image_attachment=None) -> str:
         # 타임아웃 증가 및 재시도 메커니즘
         for attempt in range(3):  # 3번 재시도
             try:
-                async with aiohttp.ClientSession(
-                    timeout=aiohttp.ClientTimeout(
-                        total=60,  # 전체 타임아웃 60초로 증가
-                        connect=10,  # 연결 타임아웃 10초
-                        sock_read=30  # 소켓 읽기 타임아웃 30초
-                    )
-                ) as session:
-                    async with session.post(url, headers=headers, data=json.dumps(payload)) as response:
+                # 재시도에도 같은 연결 풀 사용
+                async with http_sessions.get('minimax').post(
+                    url, headers=headers, data=json.dumps(payload), timeout=IMAGE_TIMEOUT
+                ) as response:
                         
-                        if response.status == 200:
-                            result = await response.json()
-                            if 'data' in result and 'image_urls' in result['data']:
-                                image_urls = result['data']['image_urls']
-                                if image_urls and len(image_urls) > 0:
-                                    logger.info(f"MiniMax image generated successfully on attempt {attempt + 1}")
-                                    return image_urls[0]
-                            return "이미지 URL을 찾을 수 없습니다."
+                    if response.status == 200:
+                        provider_metrics.count('minimax', OUTCOME_OK)
+                        result = await response.json()
+                        if 'data' in result and 'image_urls' in result['data']:
+                            image_urls = result['data']['image_urls']
+                            if image_urls and len(image_urls) > 0:
+                                logger.info(f"MiniMax image generated successfully on attempt {attempt + 1}")
+                                return image_urls[0]
+                        return "이미지 URL을 찾을 수 없습니다."
                         
-                        elif response.status == 429:  # Rate limit
-                            logger.warning(f"Rate limit hit, waiting {(attempt + 1) * 2} seconds...")
-                            await asyncio.sleep((attempt + 1) * 2)
-                            continue
+                    elif response.status == 429:  # Rate limit
+                        report_overload()
+                        provider_metrics.count('minimax', OUTCOME_RATE_LIMITED)
+                        logger.warning(f"Rate limit hit, waiting {(attempt + 1) * 2} seconds...")
+                        await asyncio.sleep((attempt + 1) * 2)
+                        continue
                         
-                        else:
-                            error_text = await response.text()
-                            logger.error(f"MiniMax API error {response.status}: {error_text}")
-                            if attempt == 2:  # 마지막 시도
-                                return f"이미지 생성 API 오류 (상태 코드: {response.status})"
+                    else:
+                        provider_metrics.count('minimax', OUTCOME_ERROR)
+                        error_text = await response.text()
+                        logger.error(f"MiniMax API error {response.status}: {error_text}")
+                        if attempt == 2:  # 마지막 시도
+                            return f"이미지 생성 API 오류 (상태 코드: {response.status})"
                             
             except asyncio.TimeoutError:
+                report_overload()
+                provider_metrics.count('minimax', OUTCOME_TIMEOUT)
                 logger.warning(f"Timeout on attempt {attempt + 1}/3")
                 if attempt == 2:  # 마지막 시도
                     return "⏰ 이미지 생성 시간이 초과되었습니다. \n\n해결법:\n- 더 간단한 설명으로 다시 시도해주세요\n- 잠시 후 다시 시도해주세요"
@@ -113,6 +157,7 @@ async def generate_image(bot, prompt: str, image_attachment=None) -> str:
                 continue
             
             except Exception as e:
+                provider_metrics.count('minimax', OUTCOME_ERROR)
                 logger.warning(f"Attempt {attempt + 1} failed: {e}")
                 if attempt == 2:
                     return f"이미지 생성 중 오류가 발생했습니다: {str(e)}"
@@ -123,13 +168,18 @@ async def generate_image(bot, prompt: str, image_attachment=None) -> str:
         logger.error(f"Image generation error: {e}")
         return f"이미지 생성 중 오류가 발생했습니다: {str(e)}"
 
-async def generate_video(prompt: str) -> str:
-    """MiniMax API를 사용하여 비디오 생성"""
+async def submit_video(prompt: str) -> tuple[str, str]:
+    """
+    비디오 생성 작업만 제출 (완료는 wait_for_video로 기다림)
+
+    Returns:
+        (task_id, 오류 메시지) - 제출에 실패하면 task_id가 빈 문자열
+    """
     if not MINIMAX_API_KEY:
-        return "MiniMax API 키가 설정되지 않았습니다."
+        return "", "MiniMax API 키가 설정되지 않았습니다."
     
     if not prompt:
-        return "비디오 설명을 입력해주세요."
+        return "", "비디오 설명을 입력해주세요."
     
     # 프롬프트 최적화
     if len(prompt) > 1000:
@@ -137,133 +187,155 @@ async def generate_video(prompt: str) -> str:
         logger.info(f"Video prompt truncated to 1000 characters")
     
     try:
-        logger.info(f"Starting video generation... (timeout: 300s)")
-        
-        # 1단계: 비디오 생성 작업 제출
         task_id = await _submit_video_task(prompt)
-        
-        logger.info(f"Video generation task submitted: {task_id}")
-        
-        # 2단계: 작업 완료까지 대기 (최대 5분)
-        max_wait_time = 300  # 5분
-        wait_interval = 15   # 15초마다 확인
-        max_attempts = max_wait_time // wait_interval
-        
-        for attempt in range(max_attempts):
-            await asyncio.sleep(wait_interval)
-            
-            file_id, status = await _query_video_status(task_id)
-            
-            if status == "Success" and file_id:
-                # 3단계: 완성된 비디오 다운로드 URL 획득
-                download_url = await _get_video_download_url(file_id)
-                if download_url.startswith("http"):
-                    return download_url
-                else:
-                    return download_url  # 에러 메시지
-            
-            elif status == "Fail":
-                return "❌ 비디오 생성에 실패했습니다. 다른 설명으로 다시 시도해주세요."
-            
-            elif status == "Unknown":
-                return "❌ 알 수 없는 오류가 발생했습니다."
-            
-            # 진행 상황 로그
-            if attempt % 4 == 0:  # 1분마다 로그
-                logger.info(f"Video generation status: {status} (attempt {attempt + 1}/{max_attempts})")
-        
+    except Exception as e:
+        # 작업 제출 중 네트워크 오류 / 타임아웃
+        provider_metrics.count('minimax', OUTCOME_TIMEOUT if isinstance(e, asyncio.TimeoutError) else OUTCOME_ERROR)
+        logger.error(f"Video submission error: {e}")
+        return "", f"비디오 생성 중 오류가 발생했습니다: {str(e)}"
+    
+    if task_id.startswith("❌"):
+        return "", task_id
+    
+    logger.info(f"Video generation task submitted: {task_id}")
+    return task_id, ""
+
+@latency_metrics.timed('video', STAGE_PROVIDER)
+async def wait_for_video(task_id: str, timeout: float = VIDEO_TIMEOUT,
+                         poll_interval: Optional[float] = None) -> str:
+    """
+    제출한 비디오 작업이 끝날 때까지 기다린 뒤 다운로드 URL 반환 (실패 시 에러 메시지)
+
+    Args:
+        timeout: 최대 대기 시간 (초)
+        poll_interval: 첫 조회까지 간격 (없으면 기본값, 완료 콜백을 받는 중이면 폴백 간격)
+    """
+    # 완료 콜백 또는 중앙 폴러가 작업 완료를 알려줄 때까지 대기
+    # (콜백을 받는 작업은 콜백이 오지 않을 때만 드물게 조회)
+    if poll_interval is None and _callback_url:
+        poll_interval = CALLBACK_FALLBACK_INTERVAL
+    try:
+        file_id, status = await asyncio.wait_for(video_poller.watch(task_id, poll_interval), timeout)
+    except asyncio.TimeoutError:
         return "⏰ 비디오 생성 시간이 초과되었습니다. 비디오 생성에는 최대 5분이 소요될 수 있습니다."
-        
     except Exception as e:
+        # 폴러 오류 (조회 오류는 _query_video_status에서 기록)
         logger.error(f"Video generation error: {e}")
         return f"비디오 생성 중 오류가 발생했습니다: {str(e)}"
 
+    if status == "Success" and file_id:
+        # 완성된 비디오 다운로드 URL 획득 (실패 시 에러 메시지)
+        return await _get_video_download_url(file_id)
+    elif status == "Fail":
+        return "❌ 비디오 생성에 실패했습니다. 다른 설명으로 다시 시도해주세요."
+    else:
+        return "❌ 알 수 없는 오류가 발생했습니다."
+
+async def generate_video(prompt: str) -> str:
+    """MiniMax API를 사용하여 비디오 생성 (제출 후 완료까지 대기)"""
+    logger.info(f"Starting video generation... (timeout: {VIDEO_TIMEOUT}s)")
+    task_id, error = await submit_video(prompt)
+    if not task_id:
+        return error
+    return await wait_for_video(task_id)
+
 async def _submit_video_task(prompt: str) -> str:
     """비디오 생성 작업 제출"""
-    url = "https://api.minimax.io/v1/video_generation"
+    url = f"{MINIMAX_API_BASE}/v1/video_generation"
     
     payload = {
         "prompt": prompt,
         "model": "T2V-01"
     }
+    if _callback_url:
+        # 작업이 끝나면 MiniMax가 이 주소로 결과를 보냄 (minimax_callback)
+        payload["callback_url"] = _callback_url
     
     headers = {
         'Authorization': f'Bearer {MINIMAX_API_KEY}',
         'Content-Type': 'application/json'
     }
     
-    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
-        async with session.post(url, headers=headers, data=json.dumps(payload)) as response:
-            logger.info(f"responseStatus: {response.status}")
-            if response.status == 200:
-                result = await response.json()
-                if 'task_id' in result:
-                    return result['task_id']
-                else:
-                    return "task_id를 찾을 수 없습니다."
+    async with http_sessions.get('minimax').post(
+        url, headers=headers, data=json.dumps(payload), timeout=SUBMIT_TIMEOUT
+    ) as response:
+        logger.info(f"responseStatus: {response.status}")
+        provider_metrics.count('minimax', _status_outcome(response.status))
+        if response.status == 200:
+            result = await response.json()
+            if 'task_id' in result:
+                return result['task_id']
             else:
-                error_text = await response.text()
-                logger.error(f"Video task submission error {response.status}: {error_text}")
+                return "❌ task_id를 찾을 수 없습니다."
+        else:
+            error_text = await response.text()
+            logger.error(f"Video task submission error {response.status}: {error_text}")
                 
-                if response.status == 400:
-                    return "❌ 잘못된 요청입니다. 비디오 설명을 확인해주세요."
-                elif response.status == 401:
-                    return "❌ API 키가 잘못되었습니다."
-                elif response.status == 402:
-                    return "❌ 크레딧이 부족합니다."
-                elif response.status == 429:
-                    return "❌ 너무 많은 요청입니다. 잠시 후 다시 시도해주세요."
-                else:
-                    return f"❌ 비디오 생성 요청 실패 (코드: {response.status})"
+            if response.status == 400:
+                return "❌ 잘못된 요청입니다. 비디오 설명을 확인해주세요."
+            elif response.status == 401:
+                return "❌ API 키가 잘못되었습니다."
+            elif response.status == 402:
+                return "❌ 크레딧이 부족합니다."
+            elif response.status == 429:
+                report_overload()
+                return "❌ 너무 많은 요청입니다. 잠시 후 다시 시도해주세요."
+            else:
+                return f"❌ 비디오 생성 요청 실패 (코드: {response.status})"
 
 async def _query_video_status(task_id: str) -> tuple[str, str]:
     """비디오 생성 상태 확인"""
-    url = f"https://api.minimax.io/v1/query/video_generation?task_id={task_id}"
+    url = f"{MINIMAX_API_BASE}/v1/query/video_generation?task_id={task_id}"
     
     headers = {
         'Authorization': f'Bearer {MINIMAX_API_KEY}'
     }
     
     try:
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15)) as session:
-            async with session.get(url, headers=headers) as response:
+        async with http_sessions.get('minimax').get(url, headers=headers, timeout=QUERY_TIMEOUT) as response:
+            provider_metrics.count('minimax', _status_outcome(response.status))
                 
-                if response.status == 200:
-                    result = await response.json()
-                    status = result.get('status', 'Unknown')
-                    file_id = result.get('file_id', '')
+            if response.status == 200:
+                result = await response.json()
+                status = result.get('status', 'Unknown')
+                file_id = result.get('file_id', '')
                     
-                    return file_id, status
-                else:
-                    return "", "Unknown"
+                return file_id, status
+            else:
+                return "", "Unknown"
                     
     except Exception as e:
+        provider_metrics.count('minimax', OUTCOME_TIMEOUT if isinstance(e, asyncio.TimeoutError) else OUTCOME_ERROR)
         logger.error(f"Video status query error: {e}")
         return "", "Unknown"
 
 async def _get_video_download_url(file_id: str) -> str:
     """비디오 다운로드 URL 획득"""
-    url = f"https://api.minimax.io/v1/files/retrieve?file_id={file_id}"
+    url = f"{MINIMAX_API_BASE}/v1/files/retrieve?file_id={file_id}"
     
     headers = {
         'Authorization': f'Bearer {MINIMAX_API_KEY}'
     }
     
     try:
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15)) as session:
-            async with session.get(url, headers=headers) as response:
+        async with http_sessions.get('minimax').get(url, headers=headers, timeout=QUERY_TIMEOUT) as response:
+            provider_metrics.count('minimax', _status_outcome(response.status))
                 
-                if response.status == 200:
-                    result = await response.json()
-                    if 'file' in result and 'download_url' in result['file']:
-                        return result['file']['download_url']
-                    else:
-                        return "다운로드 URL을 찾을 수 없습니다."
+            if response.status == 200:
+                result = await response.json()
+                if 'file' in result and 'download_url' in result['file']:
+                    return result['file']['download_url']
                 else:
-                    error_text = await response.text()
-                    logger.error(f"Video download URL error {response.status}: {error_text}")
-                    return f"다운로드 URL 획득 실패 (코드: {response.status})"
+                    return "다운로드 URL을 찾을 수 없습니다."
+            else:
+                error_text = await response.text()
+                logger.error(f"Video download URL error {response.status}: {error_text}")
+                return f"다운로드 URL 획득 실패 (코드: {response.status})"
                     
     except Exception as e:
+        provider_metrics.count('minimax', OUTCOME_TIMEOUT if isinstance(e, asyncio.TimeoutError) else OUTCOME_ERROR)
         logger.error(f"Video download URL error: {e}")
         return f"다운로드 URL 획득 중 오류: {str(e)}"
+
+# 글로벌 인스턴스 생성 (진행 중인 비디오 작업을 한 곳에서 조회)
+video_poller = VideoPoller(_query_video_status)
@@ -0,0 +1,110 @@
+"""
+공유 OpenAI 클라이언트
+
+채팅 파이프라인(chat_pipeline)이 응답 스트림 / 헤지 / 대화 요약 요청에 쓰는 AsyncOpenAI 클라이언트입니다.
+- 연결 풀 크기는 채팅 동시성 상한(CHAT_CONCURRENCY_MAX)에 헤지 / 요약 요청 여유분을 더한 값입니다.
+- 유휴 연결을 OPENAI_KEEPALIVE_EXPIRY초 동안 유지해 요청마다 TLS 연결을 새로 맺지 않습니다.
+- OPENAI_HTTP2=true이면 HTTP/2를 사용합니다 (h2 패키지가 없으면 HTTP/1.1로 동작).
+- 봇 시작(setup_hook) 시 warm_up()으로 가벼운 요청을 보내 DNS 조회와 TLS 연결을 미리 끝냅니다.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from env_manager import get_env_bool, get_env_int, get_openai_key
+
+logger = logging.getLogger(__name__)
+
+# 환경 변수 로드 (캐시된 값 사용)
+OPENAI_API_KEY = get_openai_key()
+CHAT_CONCURRENCY_MAX = get_env_int("CHAT_CONCURRENCY_MAX", 40)
+OPENAI_HTTP2 = get_env_bool("OPENAI_HTTP2", False)
+OPENAI_KEEPALIVE_EXPIRY = get_env_int("OPENAI_KEEPALIVE_EXPIRY", 90)
+OPENAI_WARMUP_CONNECTIONS = get_env_int("OPENAI_WARMUP_CONNECTIONS", 2)
+
+# 헤지 요청 / 대화 요약 / 대기열을 거치지 않는 요청용 여유 연결 수
+POOL_HEADROOM = 8
+
+# 연결 / 풀 대기 제한 (읽기 제한은 요청마다 따로 지정)
+CONNECT_TIMEOUT = 5.0
+POOL_TIMEOUT = 10.0
+DEFAULT_TIMEOUT = 60.0
+
+# 시작 시 예열 요청 제한 (초) - 실패해도 시작은 계속
+WARMUP_TIMEOUT = 10.0
+
+if not OPENAI_API_KEY:
+    logger.warning("⚠️ OPENAI_API_KEY가 환경변수에 설정되지 않았습니다.")
+
+
+def _http2_available() -> bool:
+    """HTTP/2 사용 가능 여부 (httpx의 HTTP/2 지원은 h2 패키지 필요)"""
+    if not OPENAI_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("OPENAI_HTTP2 is set but the h2 package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+HTTP2_ENABLED = _http2_available()
+
+
+def _build_client() -> Optional[AsyncOpenAI]:
+    """연결 풀을 명시적으로 설정한 AsyncOpenAI 클라이언트 (API 키가 없으면 None)"""
+    if not OPENAI_API_KEY:
+        return None
+
+    max_connections = CHAT_CONCURRENCY_MAX + POOL_HEADROOM
+    http_client = httpx.AsyncClient(
+        http2=HTTP2_ENABLED,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=CONNECT_TIMEOUT, pool=POOL_TIMEOUT),
+        follow_redirects=True,
+    )
+    return AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
+
+
+# 글로벌 인스턴스 생성
+openai_client = _build_client()
+
+
+async def warm_up(model: str = "gpt-4o-mini") -> None:
+    """
+    연결 예열 (DNS 조회 / TLS 연결을 첫 채팅 전에 끝내 두기)
+
+    HTTP/1.1에서는 동시에 보낸 요청마다 연결이 하나씩 열리므로
+    OPENAI_WARMUP_CONNECTIONS개를 동시에 보내 그만큼 연결을 풀에 남겨 둡니다.
+    토큰을 쓰지 않는 모델 조회 요청을 사용합니다.
+    """
+    if openai_client is None or OPENAI_WARMUP_CONNECTIONS <= 0:
+        return
+    # HTTP/2는 연결 하나로 여러 요청을 동시에 처리
+    count = 1 if HTTP2_ENABLED else OPENAI_WARMUP_CONNECTIONS
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    results = await asyncio.gather(
+        *(openai_client.models.retrieve(model, timeout=WARMUP_TIMEOUT) for _ in range(count)),
+        return_exceptions=True
+    )
+    failed = [result for result in results if isinstance(result, Exception)]
+    if failed:
+        logger.warning(f"OpenAI connection warm-up failed: {failed[0]}")
+    else:
+        logger.info(f"Warmed up {count} OpenAI connection(s) in {loop.time() - started:.2f}s")
+
+
+async def close() -> None:
+    """연결 풀 닫기 (봇 종료 시)"""
+    if openai_client is not None:
+        await openai_client.close()
@@ -1,102 +1,109 @@
 import asyncio
 import discord
-from env_manager import get_openai_key
-from openai import AsyncOpenAI
+from ai_services.openai_client import openai_client  # 공유 클라이언트 (연결 풀 / 예열)
+from ai_services.chat_pipeline import chat_request, upstream_stream
+from openai import APITimeoutError
+from conversation_store import conversation_store
+from response_cache import find_reply, replay, store_reply
+from single_flight import chat_flights
+from stream_guard import STAGE_IDLE, StreamTimeout
+from message_manager import message_manager
+from request_manager_enhanced import RequestType
+from stream_renderer import StreamRenderer
 import logging
 
 logger = logging.getLogger(__name__)
 
-# 환경 변수 로드 (캐시된 값 사용)
-OPENAI_API_KEY = get_openai_key()
+def _complete_reply(prompt: str, fingerprint: str, key: str, user_id: int, reply: str, channel_ids) -> None:
+    """
+    생성이 끝난 응답 저장 (공유 스트림이 업스트림을 끝까지 읽었을 때 한 번 호출)
 
-if not OPENAI_API_KEY:
-    logger.warning("⚠️ OPENAI_API_KEY가 환경변수에 설정되지 않았습니다.")
+    같은 질문에 합류한 요청이 여러 개여도 대화는 채널마다 한 번만 기록합니다.
+    """
+    store_reply(prompt, fingerprint, key, reply, user_id)
+    for channel_id in channel_ids:
+        conversation_store.record(channel_id, prompt, reply)
 
-# 비동기 OpenAI 클라이언트 초기화
-openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+async def _offer_fresh_reply(bot, prompt: str, interaction, similar: str) -> None:
+    """비슷한 질문의 저장된 답변을 보여 준 뒤 새 답변 버튼 안내"""
+    async def regenerate(button_interaction):
+        # 새로 생성하는 것이므로 누른 사용자의 쿼터를 사용
+        can_request, message = await bot.request_manager.can_make_request(button_interaction.user.id, 'chat')
+        if not can_request:
+            await message_manager.safe_followup_send(button_interaction, f"⚠️ {message}", ephemeral=True)
+            return
+        await message_manager.safe_followup_send(
+            button_interaction, "🤔 ChatGPT가 새 답변을 생성하고 있습니다...", ephemeral=True
+        )
+        await queue_gpt_request(bot, prompt, button_interaction, use_cache=False)
+
+    await message_manager.offer_regenerate(
+        interaction,
+        f"💡 이전에 하신 비슷한 질문 \"{similar[:100]}\"에 저장된 답변을 보여드렸어요. 새 답변이 필요하면 버튼을 눌러주세요.",
+        regenerate,
+        "🔄 새로 답변 받기"
+    )
 
-async def get_gpt_response_streaming(bot, prompt: str, interaction) -> None:
-    """스트리밍 방식으로 GPT 응답 생성 (하나의 메시지를 계속 수정)"""
+async def get_gpt_response_streaming(bot, prompt: str, interaction, use_cache: bool = True) -> None:
+    """스트리밍 방식으로 GPT 응답 생성 (하나의 메시지를 수정 간격에 맞춰 갱신)"""
     if not openai_client:
         await interaction.followup.send("OpenAI API 키가 설정되지 않았습니다.", ephemeral=True)
         return
     
     try:
-        # 프롬프트 최적화: 도움이 되고 상세한 응답 요청
-        optimized_prompt = f"""
-다음 질문에 도움이 되고 상세한 답변을 해주세요. 필요하다면 예시나 설명도 포함해주세요.
+        messages, fingerprint, key = chat_request(prompt, interaction.channel_id)
+        cached, similar = find_reply(prompt, fingerprint, key, interaction.user.id) if use_cache else (None, None)
 
-질문: {prompt}
-        """
-        
-        stream = await openai_client.chat.completions.create(
-            model="gpt-4o-mini",  # 빠른 모델 사용
-            messages=[
-                {"role": "system", "content": "당신은 도움이 되고 친근한 AI 어시스턴트입니다. 사용자의 질문에 상세하고 유용한 답변을 제공합니다."},
-                {"role": "user", "content": optimized_prompt}
-            ],
-            max_tokens=1500,  # 토큰 수 증가
-            temperature=0.7,
-            stream=True,
-            timeout=25  # 타임아웃 증가
-        )
-        
-        content = ""
-        message = None
-        last_update = 0
-        
-        async for chunk in stream:
-            if chunk.choices[0].delta.content:
-                content += chunk.choices[0].delta.content
+        if cached is not None:
+            # 같은 맥락의 같은(비슷한) 질문 - 업스트림 호출 없이 같은 경로로 바로 출력
+            prefix = "🤖 **ChatGPT 응답:**\n\n" if similar is None else "🤖 **ChatGPT 응답 (비슷한 질문의 저장된 답변):**\n\n"
+            renderer = StreamRenderer(interaction, prefix, request_type='chat')
+            await renderer.render(replay(cached))
+            conversation_store.record(interaction.channel_id, prompt, cached)
+            if similar is not None:
+                await _offer_fresh_reply(bot, prompt, interaction, similar)
+            return
+
+        # 토큰 수신과 메시지 수정을 분리한 렌더러로 출력
+        renderer = StreamRenderer(interaction, "🤖 **ChatGPT 응답:**\n\n", request_type='chat')
+
+        # 같은 맥락의 같은 질문이 생성 중이면 그 스트림을 함께 받음 (쿼터는 명령어에서 각자 차감)
+        # 완성된 응답의 캐시 저장과 대화 기록은 업스트림을 읽은 태스크가 한 번만 (이 요청의 전송이 실패해도)
+        shared = chat_flights.join(key, interaction.channel_id) if use_cache else None
+        if shared is None:
+            user_id = interaction.user.id
+            shared = chat_flights.start(
+                key, lambda: upstream_stream(messages),
+                lambda reply, channel_ids: _complete_reply(prompt, fingerprint, key, user_id, reply, channel_ids),
+                interaction.channel_id
+            )
+        await renderer.render(shared)
                 
-                # 300자마다 또는 처음 텍스트가 들어왔을 때 메시지 업데이트
-                if message is None:
-                    # 처음 메시지 전송 (일반 메시지로 변경) - 실제 줄바꿈 사용
-                    display_content = content if len(content) <= 2000 else content[:1950] + "\n\n**[계속 입력 중...]**"
-                    message = await interaction.followup.send(f"🤖 **ChatGPT 응답:**\n\n{display_content}")
-                    last_update = len(content)
-                    
-                elif len(content) - last_update >= 300:  # 300자마다 업데이트
-                    last_update = len(content)
-                    try:
-                        # 기존 메시지 수정 - 실제 줄바꿈 사용
-                        display_content = content if len(content) <= 2000 else content[:1950] + "\n\n**[계속 입력 중...]**"
-                        await message.edit(content=f"🤖 **ChatGPT 응답:**\n\n{display_content}")
-                    except discord.errors.HTTPException:
-                        # 수정 실패시 무시하고 계속
-                        pass
-        
-        # 최종 메시지 수정
-        if message is not None:
-            try:
-                if len(content) <= 2000:
-                    # 전체 내용이 2000자 이하인 경우 - 실제 줄바꿈 사용
-                    await message.edit(content=f"🤖 **ChatGPT 응답:**\n\n{content}")
-                else:
-                    # 2000자 초과인 경우 첫 번째 부분만 수정하고 나머지는 새 메시지로 - 실제 줄바꿈 사용
-                    await message.edit(content=f"🤖 **ChatGPT 응답:**\n\n{content[:1950]}\n\n**[계속 ⬇️]**")
-                    
-                    # 나머지 내용을 새 메시지들로 전송
-                    remaining = content[1950:]
-                    chunk_num = 2
-                    while remaining:
-                        chunk = remaining[:1950]
-                        remaining = remaining[1950:]
-                        if remaining:  # 아직 더 있다면 - 실제 줄바꿈 사용
-                            await interaction.followup.send(f"**[계속 {chunk_num}]**\n\n{chunk}\n\n**[계속 ⬇️]**")
-                        else:  # 마지막 청크 - 실제 줄바꿈 사용
-                            await interaction.followup.send(f"**[계속 {chunk_num}]**\n\n{chunk}")
-                        chunk_num += 1
-                        
-            except discord.errors.HTTPException:
-                # 수정 실패시 새 메시지로 전송
-                await interaction.followup.send(f"**[최종 응답]**\n\n{content[:2000]}")
+    except StreamTimeout as e:
+        if e.stage == STAGE_IDLE:
+            await interaction.followup.send("⏰ 응답이 중간에 멈췄습니다. 다시 시도해주세요.", ephemeral=True)
         else:
-            # message가 None인 경우 (매우 짧은 응답) - 실제 줄바꿈 사용
-            await interaction.followup.send(f"🤖 **ChatGPT 응답:**\n\n{content}")
-                
-    except asyncio.TimeoutError:
+            await interaction.followup.send("⏰ 응답 생성 시간이 초과되었습니다. 다시 시도해주세요.", ephemeral=True)
+    except (asyncio.TimeoutError, APITimeoutError):
         await interaction.followup.send("⏰ 응답 생성 시간이 초과되었습니다. 다시 시도해주세요.", ephemeral=True)
     except Exception as e:
         logger.error(f"Streaming GPT error: {e}")
         await interaction.followup.send("응답 생성 중 오류가 발생했습니다.", ephemeral=True)
+
+async def queue_gpt_request(bot, prompt: str, interaction, use_cache: bool = True) -> None:
+    """
+    채팅 요청을 큐에 추가 (사용량 기준 우선순위, 인터랙션 토큰 만료 기준 마감)
+
+    같은 질문이 이미 생성 중이면 대기열과 동시성 슬롯 없이 그 스트림을 바로 함께 받습니다.
+    새 답변 요청(use_cache=False)은 같은 사용자의 새 질문보다 한 단계 낮은 우선순위로 처리합니다.
+    """
+    if use_cache and openai_client and chat_request(prompt, interaction.channel_id)[2] in chat_flights:
+        await get_gpt_response_streaming(bot, prompt, interaction)
+        return
+
+    manager = bot.request_manager
+    await manager.submit_interaction(
+        interaction, RequestType.CHAT, get_gpt_response_streaming,
+        priority=manager.priority_for(interaction.user.id, RequestType.CHAT, regenerate=not use_cache),
+        bot=bot, prompt=prompt, use_cache=use_cache
+    )
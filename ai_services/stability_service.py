@@ -1,6 +1,12 @@
 import asyncio
 import aiohttp
 from env_manager import get_stability_key
+from concurrency_limiter import report_overload
+from http_sessions import http_sessions
+from metrics import (
+    latency_metrics, provider_metrics, STAGE_PROVIDER,
+    OUTCOME_OK, OUTCOME_ERROR, OUTCOME_TIMEOUT, OUTCOME_RATE_LIMITED
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,6 +17,10 @@ STABILITY_API_KEY = get_stability_key()
 if not STABILITY_API_KEY:
     logger.warning("⚠️ STABILITY_API_KEY가 환경변수에 설정되지 않았습니다.")
 
+# 요청 타임아웃 (세션은 http_sessions에서 공유)
+GENERATE_TIMEOUT = aiohttp.ClientTimeout(total=45)  # image-to-image는 조금 더 시간이 걸릴 수 있음
+
+@latency_metrics.timed('image', STAGE_PROVIDER)
 async def generate_stability_image(prompt: str, image_attachment=None, strength: float = 0.7) -> bytes:
     """Stability AI 이미지 생성 (text-to-image 또는 image-to-image)"""
     if not STABILITY_API_KEY:
@@ -54,41 +64,46 @@ async def generate_stability_image(prompt: str, image_attachment=None, strength:
             form_data.add_field("aspect_ratio", "1:1")
             form_data.add_field("none", "", filename="dummy.txt", content_type="text/plain")
 
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=45)  # image-to-image는 조금 더 시간이 걸릴 수 있음
-        ) as session:
-            async with session.post(
-                url, headers=headers, data=form_data
-            ) as response:
-                if response.status == 200:
-                    image_data = await response.read()
-                    logger.info(f"Stability AI {mode} generation successful ({len(image_data)} bytes)")
-                    return image_data
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Stability AI error {response.status}: {error_text}")
+        async with http_sessions.get('stability').post(
+            url, headers=headers, data=form_data, timeout=GENERATE_TIMEOUT
+        ) as response:
+            if response.status == 200:
+                provider_metrics.count('stability', OUTCOME_OK)
+                image_data = await response.read()
+                logger.info(f"Stability AI {mode} generation successful ({len(image_data)} bytes)")
+                return image_data
+            else:
+                provider_metrics.count(
+                    'stability', OUTCOME_RATE_LIMITED if response.status == 429 else OUTCOME_ERROR
+                )
+                error_text = await response.text()
+                logger.error(f"Stability AI error {response.status}: {error_text}")
                     
-                    # 상세한 에러 메시지
-                    if response.status == 400:
-                        return "❌ 잘못된 요청입니다. 프롬프트나 이미지를 확인해주세요."
-                    elif response.status == 401:
-                        return "❌ API 키가 잘못되었습니다."
-                    elif response.status == 402:
-                        return "❌ 크레딧이 부족합니다."
-                    elif response.status == 403:
-                        return "❌ 액세스가 거부되었습니다."
-                    elif response.status == 413:
-                        return "❌ 이미지 파일이 너무 큽니다. (최대 4MB)"
-                    elif response.status == 415:
-                        return "❌ 지원되지 않는 이미지 형식입니다. (PNG, JPEG, WebP만 지원)"
-                    elif response.status == 429:
-                        return "❌ 너무 많은 요청입니다. 잠시 후 다시 시도해주세요."
-                    else:
-                        return f"❌ Stability AI 오류 (코드: {response.status})"
+                # 상세한 에러 메시지
+                if response.status == 400:
+                    return "❌ 잘못된 요청입니다. 프롬프트나 이미지를 확인해주세요."
+                elif response.status == 401:
+                    return "❌ API 키가 잘못되었습니다."
+                elif response.status == 402:
+                    return "❌ 크레딧이 부족합니다."
+                elif response.status == 403:
+                    return "❌ 액세스가 거부되었습니다."
+                elif response.status == 413:
+                    return "❌ 이미지 파일이 너무 큽니다. (최대 4MB)"
+                elif response.status == 415:
+                    return "❌ 지원되지 않는 이미지 형식입니다. (PNG, JPEG, WebP만 지원)"
+                elif response.status == 429:
+                    report_overload()
+                    return "❌ 너무 많은 요청입니다. 잠시 후 다시 시도해주세요."
+                else:
+                    return f"❌ Stability AI 오류 (코드: {response.status})"
 
     except asyncio.TimeoutError:
+        report_overload()
+        provider_metrics.count('stability', OUTCOME_TIMEOUT)
         logger.warning("Stability AI timeout")
         return "⏰ 이미지 생성 시간이 초과되었습니다. 다시 시도해주세요."
     except Exception as e:
+        provider_metrics.count('stability', OUTCOME_ERROR)
         logger.error(f"Stability AI error: {e}")
         return f"이미지 생성 중 오류가 발생했습니다: {str(e)}"
@@ -0,0 +1,140 @@
+"""
+쿼터 허용 판단(can_make_request) 처리량 벤치마크
+
+이전 구현(전역 asyncio.Lock + 사용자별 datetime dict)과 현재 구현(락 없는 QuotaEngine)을
+동시 사용자 10,000명 버스트 상황에서 비교합니다.
+
+--persist를 주면 현재 구현에 모든 사용자의 상태가 저장된 임시 쿼터 DB를 연결해
+재시작 직후(메모리에 아무도 없는 상태) 버스트를 측정합니다.
+처음 보는 사용자는 저장된 상태를 묶어서 불러온 뒤 판단하므로 그 조회 시간이 처리량에 포함되며,
+조회가 제한 시간을 넘겨 메모리에서 먼저 판단한 요청 수도 따로 출력합니다.
+
+실행:
+    python benchmarks/admission_bench.py [--users 10000] [--calls 3] [--rounds 5] [--persist]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quota_store import QuotaStore
+from request_manager_enhanced import EnhancedRequestManager
+
+REQUEST_TYPES = ('chat', 'image', 'video')
+
+
+class LegacyRequestManager:
+    """비교용 이전 구현 (전역 락 + dict-of-dict-of-datetime)"""
+
+    def __init__(self, rate_limits):
+        self.user_cooldowns: Dict[int, Dict[str, datetime]] = {}
+        self.user_daily_counts: Dict[int, Dict[str, int]] = {}
+        self.user_daily_reset: Dict[int, datetime] = {}
+        self.lock = asyncio.Lock()
+        self.rate_limits = rate_limits
+
+    async def can_make_request(self, user_id: int, request_type: str) -> Tuple[bool, str]:
+        async with self.lock:
+            current_time = datetime.now()
+
+            if user_id not in self.user_cooldowns:
+                self.user_cooldowns[user_id] = {}
+                self.user_daily_counts[user_id] = {}
+                self.user_daily_reset[user_id] = current_time
+
+            if current_time - self.user_daily_reset[user_id] > timedelta(days=1):
+                self.user_daily_counts[user_id] = {}
+                self.user_daily_reset[user_id] = current_time
+
+            daily_count = self.user_daily_counts[user_id].get(request_type, 0)
+            if daily_count >= self.rate_limits[request_type]['daily_limit']:
+                return False, "일일 사용 제한에 도달했습니다. 내일 다시 시도해주세요."
+
+            last_request = self.user_cooldowns[user_id].get(request_type)
+            if last_request:
+                time_diff = (current_time - last_request).total_seconds()
+                cooldown = self.rate_limits[request_type]['cooldown']
+                if time_diff < cooldown:
+                    remaining = cooldown - int(time_diff)
+                    return False, f"재사용까지 {remaining}초 남았습니다."
+
+            self.user_cooldowns[user_id][request_type] = current_time
+            self.user_daily_counts[user_id][request_type] = daily_count + 1
+            return True, ""
+
+
+async def _simulated_user(manager, user_id: int, calls: int) -> int:
+    """한 사용자가 명령어를 연속 호출 (다른 사용자와 인터리빙되도록 매 호출마다 양보)"""
+    allowed = 0
+    for i in range(calls):
+        await asyncio.sleep(0)
+        ok, _ = await manager.can_make_request(user_id, REQUEST_TYPES[i % len(REQUEST_TYPES)])
+        allowed += ok
+    return allowed
+
+
+async def _run_burst(manager, users: int, calls: int) -> float:
+    """동시 사용자 버스트 실행 후 초당 허용 판단 수 반환"""
+    start = time.perf_counter()
+    await asyncio.gather(*(_simulated_user(manager, uid, calls) for uid in range(users)))
+    elapsed = time.perf_counter() - start
+    return users * calls / elapsed
+
+
+async def _persisted_manager(path: str, users: int) -> EnhancedRequestManager:
+    """모든 사용자의 상태가 저장된 쿼터 DB를 연결한 관리자 (재시작 직후 상태)"""
+    manager = EnhancedRequestManager()
+    store = manager.quota_store = QuotaStore(path)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(store.executor, store.open)
+    window_start = time.monotonic() - 3600
+    records = {uid: (window_start, {'chat': (float('-inf'), 1)}) for uid in range(users)}
+    await loop.run_in_executor(store.executor, store.write_batch, records, [])
+    return manager
+
+
+async def main(users: int, calls: int, rounds: int, persist: bool) -> None:
+    rate_limits = EnhancedRequestManager().rate_limits
+    results = {'before (global lock)': [], 'after (lock-free)': []}
+    load_timeouts = []
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(rounds):
+            # 매 라운드 새 상태로 측정 (첫 요청 할당 비용 포함)
+            legacy = LegacyRequestManager(rate_limits)
+            if persist:
+                current = await _persisted_manager(os.path.join(directory, f"quota{i}.db"), users)
+            else:
+                current = EnhancedRequestManager()
+            results['before (global lock)'].append(await _run_burst(legacy, users, calls))
+            results['after (lock-free)'].append(await _run_burst(current, users, calls))
+            if persist:
+                load_timeouts.append(current.stats['quota_load_timeouts'])
+                current.quota_store.close()
+
+    print(f"users={users} calls/user={calls} rounds={rounds} persist={persist}")
+    for name, samples in results.items():
+        best = max(samples)
+        print(f"  {name:<22} best {best:>12,.0f} checks/s   median {sorted(samples)[len(samples) // 2]:>12,.0f} checks/s")
+
+    before = max(results['before (global lock)'])
+    after = max(results['after (lock-free)'])
+    print(f"  speedup: {after / before:.2f}x")
+    if load_timeouts:
+        print(f"  stored state load timeouts: {max(load_timeouts)} (worst round)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--calls', type=int, default=3, help="사용자당 호출 수")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--persist', action='store_true', help="저장된 상태가 있는 쿼터 DB 연결")
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.calls, args.rounds, args.persist))
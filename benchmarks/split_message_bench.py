@@ -0,0 +1,124 @@
+"""
+긴 메시지 분할(split_message) 처리량 벤치마크
+
+이전 구현(줄 단위 += 누적)과 현재 구현(오프셋 기반 paginate)을
+약 100 KB 입력 세 종류(일반 문장 / 코드 블록 위주 / 줄바꿈 없는 한 줄)로 비교합니다.
+
+실행:
+    python benchmarks/split_message_bench.py [--size 100000] [--repeat 20] [--rounds 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import fence_after, split_message
+
+
+def legacy_split_message(content: str, max_length: int = 2000) -> List[str]:
+    """비교용 이전 구현 (줄 단위 += 누적, 코드 블록 / 글자 경계 고려 없음)"""
+    if len(content) <= max_length:
+        return [content]
+
+    chunks = []
+    current_chunk = ""
+
+    lines = content.split('\n')
+
+    for line in lines:
+        if len(current_chunk) + len(line) + 1 <= max_length:
+            current_chunk += line + '\n'
+        else:
+            if current_chunk:
+                chunks.append(current_chunk.rstrip())
+                current_chunk = line + '\n'
+            else:
+                while len(line) > max_length:
+                    chunks.append(line[:max_length])
+                    line = line[max_length:]
+                current_chunk = line + '\n'
+
+    if current_chunk:
+        chunks.append(current_chunk.rstrip())
+
+    return chunks
+
+
+def _prose(size: int, rng: random.Random) -> str:
+    words = ("안녕하세요", "오늘", "날씨가", "좋네요.", "hello", "world!", "이것은", "테스트입니다?", "👍🏽", "🇰🇷")
+    parts = []
+    length = 0
+    while length < size:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(5, 20)))
+        sentence += "\n\n" if rng.random() < 0.2 else "\n" if rng.random() < 0.3 else " "
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)[:size]
+
+
+def _code_heavy(size: int, rng: random.Random) -> str:
+    parts = []
+    length = 0
+    while length < size:
+        lines = "\n".join(f"    value_{i} = compute({i}, key='항목')  # 설명" for i in range(rng.randint(10, 120)))
+        block = f"다음 코드를 보세요:\n```python\ndef handler():\n{lines}\n```\n\n"
+        parts.append(block)
+        length += len(block)
+    return "".join(parts)[:size]
+
+
+def _single_line(size: int, rng: random.Random) -> str:
+    return "".join(rng.choice("가나다라마바사abcdef ") for _ in range(size))
+
+
+INPUTS: Dict[str, Callable[[int, random.Random], str]] = {
+    'prose': _prose,
+    'code': _code_heavy,
+    'single line': _single_line,
+}
+
+
+def _throughput(split: Callable[[str], List[str]], text: str, repeat: int) -> float:
+    """초당 처리한 MB"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        split(text)
+    elapsed = time.perf_counter() - start
+    return len(text) * repeat / elapsed / 1e6
+
+
+def main(size: int, repeat: int, rounds: int) -> None:
+    rng = random.Random(42)
+    print(f"size={size:,} chars repeat={repeat} rounds={rounds}")
+    for name, factory in INPUTS.items():
+        text = factory(size, rng)
+        results = {'before (+= lines)': [], 'after (paginate)': []}
+        for _ in range(rounds):
+            results['before (+= lines)'].append(_throughput(legacy_split_message, text, repeat))
+            results['after (paginate)'].append(_throughput(split_message, text, repeat))
+
+        chunks = split_message(text)
+        unbalanced = sum(fence_after(chunk, 0, len(chunk)) is not None for chunk in chunks)
+        legacy_unbalanced = sum(fence_after(chunk, 0, len(chunk)) is not None for chunk in legacy_split_message(text))
+        print(f"[{name}] chunks={len(chunks)} unbalanced fences: before {legacy_unbalanced}, after {unbalanced}")
+        for label, samples in results.items():
+            best = max(samples)
+            print(f"  {label:<18} best {best:>8.1f} MB/s   median {sorted(samples)[len(samples) // 2]:>8.1f} MB/s")
+
+        before = max(results['before (+= lines)'])
+        after = max(results['after (paginate)'])
+        print(f"  speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help="입력 길이 (문자)")
+    parser.add_argument('--repeat', type=int, default=20, help="라운드당 반복 횟수")
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    main(args.size, args.repeat, args.rounds)
@@ -6,6 +6,13 @@ import logging
 
 # 로컬 모듈 import - Enhanced 버전 사용
 from request_manager_enhanced import EnhancedRequestManager
+from metrics_server import MetricsServer, METRICS_ENABLED
+from minimax_callback import CallbackServer, MINIMAX_CALLBACK_URL
+from response_cache import response_cache
+from http_sessions import http_sessions
+from ai_services.minimax_service import video_poller
+from video_jobs import video_jobs
+from ai_services.openai_client import warm_up as warm_up_openai, close as close_openai
 from utils import split_message
 
 class MyBot(commands.Bot):
@@ -20,6 +27,12 @@ class MyBot(commands.Bot):
         # Enhanced 매니저 초기화
         self.request_manager = EnhancedRequestManager()
         
+        # 메트릭 서버 (METRICS_ENABLED=true일 때만)
+        self.metrics_server = MetricsServer(self) if METRICS_ENABLED else None
+        
+        # MiniMax 비디오 완료 콜백 수신 서버 (MINIMAX_CALLBACK_URL이 있을 때만)
+        self.callback_server = CallbackServer() if MINIMAX_CALLBACK_URL else None
+        
     async def setup_hook(self):
         """봇 초기 설정"""
         print("Bot is setting up...")
@@ -34,6 +47,26 @@ class MyBot(commands.Bot):
         # Enhanced Queue processor 시작
         self.request_manager.start_queue_processor(self)
         
+        # 채팅 응답 캐시 (RESPONSE_CACHE_PATH가 있으면 디스크에서 복원)
+        await response_cache.open()
+        
+        # MiniMax / Stability 공유 HTTP 세션
+        await http_sessions.open()
+        
+        # OpenAI 연결 예열 (첫 채팅이 DNS 조회 / TLS 연결을 기다리지 않도록)
+        await warm_up_openai()
+        
+        # 메트릭 서버 시작
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+        
+        # 비디오 완료 콜백 서버 시작 (실패하면 폴링만 사용)
+        if self.callback_server is not None:
+            await self.callback_server.start()
+        
+        # 재시작 전에 제출한 비디오 작업 조회 재개 (결과는 후속 메시지 / 채널 / DM으로 전달)
+        await video_jobs.open(self)
+        
         # 슬래시 명령어 동기화
         await self.tree.sync()
         print("Bot setup completed")
@@ -62,6 +95,17 @@ class MyBot(commands.Bot):
     async def close(self):
         """봇 종료 시 정리 작업"""
         print("Bot is shutting down...")
+        # 메트릭 서버 중지
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        # 콜백 서버 중지
+        if self.callback_server is not None:
+            await self.callback_server.stop()
         # Enhanced queue processor 중지
         await self.request_manager.stop_queue_processor()
+        await response_cache.close()
+        await close_openai()
+        await video_jobs.close()
+        await video_poller.stop()
+        await http_sessions.close()
         await super().close()
@@ -1,7 +1,8 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from ai_handlers import get_gpt_response_streaming
+from ai_handlers import queue_gpt_request
+from conversation_store import conversation_store
 
 async def setup_chat_commands(bot):
     """채팅 관련 명령어 설정"""
@@ -21,9 +22,17 @@ async def setup_chat_commands(bot):
             # 초기 응답 전송 (ephemeral)
             await interaction.response.send_message("🤔 ChatGPT가 답변을 생성하고 있습니다...", ephemeral=True)
             
-            # 스트리밍 GPT 응답 생성
-            await get_gpt_response_streaming(bot, 질문, interaction)
+            # 대기열을 거쳐 스트리밍 GPT 응답 생성 (사용량 기준 우선순위, 토큰 만료 전 마감)
+            await queue_gpt_request(bot, 질문, interaction)
             
         except Exception as e:
             print(f"Chat command error: {e}")
             await interaction.followup.send("채팅 응답 생성 중 오류가 발생했습니다.", ephemeral=True)
+
+    @bot.tree.command(name="대화초기화", description="이 채널에서 ChatGPT가 기억하는 이전 대화를 지웁니다.")
+    async def reset_chat(interaction: discord.Interaction):
+        """채널(스레드)의 대화 기억 삭제 (ephemeral)"""
+        if conversation_store.reset(interaction.channel_id):
+            await interaction.response.send_message("🧹 이 채널의 대화 기억을 지웠습니다.", ephemeral=True)
+        else:
+            await interaction.response.send_message("이 채널에 저장된 대화가 없습니다.", ephemeral=True)
@@ -3,6 +3,10 @@ from discord.ext import commands
 from discord import app_commands
 from typing import Optional
 from ai_handlers import generate_image, generate_stability_image
+from message_manager import RegenerateView
+from metrics import latency_metrics, STAGE_DISCORD_SEND
+from request_manager_enhanced import RequestType
+from similarity_index import image_index
 
 async def setup_image_commands(bot):
     """이미지 관련 명령어 설정"""
@@ -17,6 +21,13 @@ async def setup_image_commands(bot):
         2. 이미지를 변환: /이미지 "설명" + 이미지 첨부
         """
         try:
+            # 같은 사용자가 설명만 다르게(문장부호 / 띄어쓰기 / 조사) 최근 생성한 이미지가 있으면 먼저 제안
+            # (생성하지 않으므로 쿼터를 쓰지 않고, 새로 생성 버튼을 누를 때 한 번만 차감)
+            match = None if 이미지 else image_index.find(설명, interaction.user.id)
+            if match is not None:
+                await send_similar_image(interaction, 설명, match[0], match[1])
+                return
+
             # 요청 가능 여부 확인
             can_request, message = await bot.request_manager.can_make_request(
                 interaction.user.id, 'image'
@@ -49,33 +60,77 @@ async def setup_image_commands(bot):
             
             await interaction.response.send_message(processing_msg, ephemeral=True)
 
-            # 이미지 생성 (Discord Attachment 객체 직접 전달)
-            image_url = await generate_image(bot, 설명, 이미지)
-            
-            if image_url.startswith("http"):
-                # 성공적으로 생성된 경우 (ephemeral)
-                if 이미지:
-                    embed_title = "🔄 이미지 변환 완료"
-                    embed_color = 0xff6b6b  # 빨간색 (이미지 변환)
-                else:
-                    embed_title = "🎨 이미지 생성 완료"
-                    embed_color = 0x00ff00  # 초록색 (이미지 생성)
-                
-                embed = discord.Embed(
-                    title=embed_title,
-                    description=설명,
-                    color=embed_color
-                )
-                embed.set_image(url=image_url)
-                await interaction.followup.send(embed=embed, ephemeral=True)
-            else:
-                # 에러 메시지인 경우 (ephemeral)
-                await interaction.followup.send(f"❌ {image_url}", ephemeral=True)
+            await queue_image_request(interaction, generate_and_send, 설명=설명, 이미지=이미지)
                 
         except Exception as e:
             print(f"Image command error: {e}")
             await interaction.followup.send("이미지 생성 중 오류가 발생했습니다.", ephemeral=True)
 
+    async def queue_image_request(interaction: discord.Interaction, handler, regenerate: bool = False, **kwargs):
+        """이미지 생성을 대기열에 추가 (사용량 기준 우선순위, 새로 생성 버튼은 한 단계 낮춤)"""
+        manager = bot.request_manager
+        await manager.submit_interaction(
+            interaction, RequestType.IMAGE, handler,
+            priority=manager.priority_for(interaction.user.id, RequestType.IMAGE, regenerate=regenerate),
+            **kwargs
+        )
+
+    async def generate_and_send(interaction: discord.Interaction, 설명: str, 이미지: Optional[discord.Attachment] = None):
+        """MiniMax 이미지 생성 후 결과 전송 (ephemeral, 대기열 작업자에서 실행)"""
+        try:
+            # 이미지 생성 (Discord Attachment 객체 직접 전달)
+            image_url = await generate_image(bot, 설명, 이미지)
+        except Exception as e:
+            print(f"Image generation error: {e}")
+            await interaction.followup.send("이미지 생성 중 오류가 발생했습니다.", ephemeral=True)
+            return
+        
+        if image_url.startswith("http"):
+            # 성공적으로 생성된 경우 (ephemeral)
+            if 이미지:
+                embed_title = "🔄 이미지 변환 완료"
+                embed_color = 0xff6b6b  # 빨간색 (이미지 변환)
+            else:
+                embed_title = "🎨 이미지 생성 완료"
+                embed_color = 0x00ff00  # 초록색 (이미지 생성)
+                # 다른 사용자에게는 보여 주지 않도록 요청한 사용자 기준으로 등록 (ephemeral 결과)
+                image_index.add(설명, image_url, interaction.user.id)
+            
+            embed = discord.Embed(
+                title=embed_title,
+                description=설명,
+                color=embed_color
+            )
+            embed.set_image(url=image_url)
+            with latency_metrics.timer('image', STAGE_DISCORD_SEND):
+                await interaction.followup.send(embed=embed, ephemeral=True)
+        else:
+            # 에러 메시지인 경우 (ephemeral)
+            await interaction.followup.send(f"❌ {image_url}", ephemeral=True)
+
+    async def send_similar_image(interaction: discord.Interaction, 설명: str, similar: str, image_url: str):
+        """비슷한 설명으로 생성한 이미지를 첫 응답으로 보여 주고 새로 생성 버튼 제공 (ephemeral)"""
+        async def regenerate(button_interaction: discord.Interaction):
+            # 저장된 이미지를 보여 줄 때는 차감하지 않았으므로 새로 생성할 때 처음이자 한 번만 차감
+            can_request, message = await bot.request_manager.can_make_request(
+                button_interaction.user.id, 'image'
+            )
+            if not can_request:
+                await button_interaction.followup.send(f"⚠️ {message}", ephemeral=True)
+                return
+            await button_interaction.followup.send("🎨 새 이미지를 생성하고 있습니다... (최대 60초 소요)", ephemeral=True)
+            await queue_image_request(button_interaction, generate_and_send, regenerate=True, 설명=설명)
+
+        embed = discord.Embed(
+            title="🎨 비슷한 요청으로 생성된 이미지",
+            description=f"{설명}\n\n💡 이전에 요청하신 \"{similar[:100]}\"(으)로 최근 생성된 이미지입니다.",
+            color=0x00ff00
+        )
+        embed.set_image(url=image_url)
+        view = RegenerateView(interaction.user.id, regenerate, "🔄 새로 생성")
+        with latency_metrics.timer('image', STAGE_DISCORD_SEND):
+            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
     @bot.tree.command(name="img", description="Stability AI로 빠른 이미지 생성 (이미지 첨부 가능)")
     async def img(interaction: discord.Interaction, 설명: str, 이미지: Optional[discord.Attachment] = None, 강도: Optional[float] = 0.7):
         """
@@ -126,6 +181,15 @@ async def setup_image_commands(bot):
             
             await interaction.response.send_message(processing_msg, ephemeral=True)
 
+            await queue_image_request(interaction, stability_and_send, 설명=설명, 이미지=이미지, 강도=강도)
+                
+        except Exception as e:
+            print(f"Stability AI command error: {e}")
+            await interaction.followup.send("이미지 생성 중 오류가 발생했습니다.", ephemeral=True)
+
+    async def stability_and_send(interaction: discord.Interaction, 설명: str, 이미지: Optional[discord.Attachment], 강도: float):
+        """Stability AI 이미지 생성 후 결과 전송 (ephemeral, 대기열 작업자에서 실행)"""
+        try:
             # Stability AI 이미지 생성
             result = await generate_stability_image(설명, 이미지, 강도)
             
@@ -152,7 +216,8 @@ async def setup_image_commands(bot):
                 embed.set_image(url="attachment://stability_image.png")
                 embed.set_footer(text="Powered by Stability AI SD3.5 Turbo")
                 
-                await interaction.followup.send(embed=embed, file=file, ephemeral=True)
+                with latency_metrics.timer('image', STAGE_DISCORD_SEND):
+                    await interaction.followup.send(embed=embed, file=file, ephemeral=True)
             else:
                 # 에러 메시지인 경우 (ephemeral)
                 await interaction.followup.send(f"❌ {result}", ephemeral=True)
@@ -1,8 +1,11 @@
 import discord
 import asyncio
+from typing import Optional, Tuple
 from discord.ext import commands
 from discord import app_commands
-from ai_handlers import generate_video
+from ai_handlers import submit_video, wait_for_video
+from request_manager_enhanced import RequestType
+from video_jobs import video_jobs, VIDEO_ASYNC_JOBS
 
 async def setup_video_commands(bot):
     """비디오 관련 명령어 설정"""
@@ -24,6 +27,10 @@ async def setup_video_commands(bot):
                 await interaction.response.send_message(f"⚠️ {message}", ephemeral=True)
                 return
 
+            if VIDEO_ASYNC_JOBS:
+                await _submit_video_job(bot, interaction, 설명)
+                return
+
             # 초기 응답 전송 (ephemeral) - 실제 줄바꿈 사용
             processing_msg = "🎬 MiniMax AI로 비디오 생성 중... (최대 5분 소요)\n⏰ 비디오 생성은 시간이 오래 걸립니다. 잠시만 기다려주세요!\n📹 고품질 비디오를 제작하고 있습니다..."
             await interaction.response.send_message(processing_msg, ephemeral=True)
@@ -32,8 +39,21 @@ async def setup_video_commands(bot):
             update_task = asyncio.create_task(_send_video_progress_updates(interaction))
             
             try:
-                # MiniMax 비디오 생성
-                result = await generate_video(설명)
+                # MiniMax 비디오 작업 제출 (대기열을 거쳐 제출하는 동안만 비디오 동시성 슬롯 점유)
+                submitted = await _queue_video_submit(bot, interaction, 설명)
+                if submitted is None:
+                    # 대기열이 가득 찼거나 마감 초과로 제외됨 (안내는 이미 보냄)
+                    update_task.cancel()
+                    return
+                task_id, error = submitted
+                if not task_id:
+                    update_task.cancel()
+                    await interaction.followup.send(f"❌ {error}", ephemeral=True)
+                    return
+                
+                # 재시작해도 결과를 전달할 수 있도록 작업 등록 후 완료까지 대기
+                job = await video_jobs.add(interaction, 설명, task_id)
+                result = await wait_for_video(task_id)
                 
                 # 업데이트 태스크 취소
                 update_task.cancel()
@@ -42,29 +62,8 @@ async def setup_video_commands(bot):
                 except asyncio.CancelledError:
                     pass
                 
-                if result.startswith("http"):
-                    # 성공적으로 생성된 경우 (ephemeral)
-                    embed = discord.Embed(
-                        title="🎬 MiniMax AI 생성 비디오",
-                        description=설명,
-                        color=0x00c851
-                    )
-                    embed.add_field(
-                        name="📥 다운로드 링크", 
-                        value=f"[비디오 다운로드]({result})", 
-                        inline=False
-                    )
-                    embed.add_field(
-                        name="💡 안내", 
-                        value="링크를 클릭하여 비디오를 다운로드하세요.", 
-                        inline=False
-                    )
-                    embed.set_footer(text="Powered by MiniMax T2V-01 | 비디오 링크는 일정 시간 후 만료됩니다")
-                    
-                    await interaction.followup.send("✅ 비디오 생성이 완료되었습니다!", embed=embed, ephemeral=True)
-                else:
-                    # 에러 메시지인 경우 (ephemeral)
-                    await interaction.followup.send(f"❌ {result}", ephemeral=True)
+                # 결과 전달 (성공 시 임베드, 실패 시 에러 메시지 - ephemeral) 후 등록 해제
+                await video_jobs.finish(job, result)
                     
             except Exception as e:
                 # 업데이트 태스크 취소
@@ -79,6 +78,56 @@ async def setup_video_commands(bot):
             print(f"Video command error: {e}")
             await interaction.followup.send("비디오 생성 중 오류가 발생했습니다.", ephemeral=True)
 
+async def _queue_video_submit(bot, interaction: discord.Interaction, 설명: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """
+    비디오 작업 제출을 대기열에 넣고 제출 결과를 기다림 (사용량 기준 우선순위, 토큰 만료 전 마감)
+    
+    제출만 대기열 작업자에서 실행하므로 비디오 동시성 슬롯은 제출하는 동안만 점유하고
+    렌더링을 기다리는 작업은 슬롯을 쓰지 않습니다.
+    
+    Returns:
+        (작업 ID, 에러 메시지) 또는 None (대기열이 가득 찼거나 마감 초과로 제외 - 안내는 이미 보냄)
+    """
+    submitted = {}
+    
+    async def submit(interaction: discord.Interaction):
+        try:
+            submitted['result'] = await submit_video(설명)
+        except Exception as e:
+            print(f"Video submit error: {e}")
+            submitted['result'] = (None, "비디오 생성 중 오류가 발생했습니다.")
+    
+    manager = bot.request_manager
+    request = await manager.submit_interaction(
+        interaction, RequestType.VIDEO, submit,
+        priority=manager.priority_for(interaction.user.id, RequestType.VIDEO)
+    )
+    if request is None or not await request.done:
+        return None
+    return submitted['result']
+
+async def _submit_video_job(bot, interaction: discord.Interaction, 설명: str):
+    """비동기 모드: 작업을 제출하고 작업 ID로 바로 응답 (완료는 video_jobs가 백그라운드에서 전달)"""
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    
+    submitted = await _queue_video_submit(bot, interaction, 설명)
+    if submitted is None:
+        return
+    task_id, error = submitted
+    if not task_id:
+        await interaction.followup.send(f"❌ {error}", ephemeral=True)
+        return
+    
+    # 재시작해도 결과를 전달할 수 있도록 등록한 뒤 백그라운드에서 완료 대기
+    job = await video_jobs.add(interaction, 설명, task_id)
+    video_jobs.start(job)
+    
+    await interaction.followup.send(
+        f"🎬 비디오 생성 작업을 접수했습니다! (작업 ID: `{task_id}`)\n"
+        "⏰ 보통 몇 분 정도 걸리며, 완료되면 결과를 이 곳(또는 채널 / DM)으로 보내드립니다.",
+        ephemeral=True
+    )
+
 async def _send_video_progress_updates(interaction: discord.Interaction):
     """비디오 생성 중 주기적 업데이트 메시지 전송 (ephemeral)"""
     try:
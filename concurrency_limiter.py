@@ -0,0 +1,172 @@
+"""
+업스트림 제공자별 적응형 동시성 제한 (AIMD + 지연 기울기)
+
+- 지연 시간이 평소 수준을 유지하고 제한까지 꽉 차게 쓰이는 동안에는 제한을 조금씩 올립니다.
+- 최근 지연(단기 EWMA)이 평소 지연(장기 EWMA)보다 크게 늘어나면 조금 줄입니다.
+- 타임아웃이나 429 응답이 나오면 절반으로 줄입니다.
+
+처리 중인 핸들러는 report_overload()로 현재 슬롯에 과부하를 알릴 수 있습니다.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+
+
+class _Slot:
+    """한 요청이 점유한 동시성 슬롯"""
+
+    __slots__ = ("overloaded", "discard")
+
+    def __init__(self):
+        self.overloaded = False
+        self.discard = False  # 업스트림을 호출하지 않은 경우 지연 샘플에서 제외
+
+
+# 현재 태스크가 점유 중인 슬롯 (큐 작업자 밖에서는 None)
+_current_slot: ContextVar[Optional[_Slot]] = ContextVar("concurrency_slot", default=None)
+
+
+def report_overload() -> None:
+    """현재 요청이 타임아웃 / 429 등 과부하 응답을 받았음을 제한기에 알림"""
+    slot = _current_slot.get()
+    if slot is not None:
+        slot.overloaded = True
+
+
+class AdaptiveLimiter:
+    """AIMD 방식 적응형 동시성 제한기"""
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 50,
+                 backoff: float = 0.5, latency_backoff: float = 0.9,
+                 tolerance: float = 1.5):
+        """
+        Args:
+            initial: 초기 동시 처리 한도
+            min_limit / max_limit: 한도 범위
+            backoff: 타임아웃 / 429 발생 시 곱할 비율
+            latency_backoff: 지연 증가 시 곱할 비율
+            tolerance: 단기 지연이 장기 지연의 몇 배를 넘으면 지연 증가로 볼지
+        """
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.backoff = backoff
+        self.latency_backoff = latency_backoff
+        self.tolerance = tolerance
+
+        self.inflight = 0
+        self.short_latency: Optional[float] = None  # 단기 EWMA
+        self.long_latency: Optional[float] = None   # 장기 EWMA (평소 지연)
+        self.overloads = 0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    async def acquire(self) -> None:
+        """슬롯이 빌 때까지 대기 후 점유"""
+        while self.inflight >= self.current_limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except BaseException:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+                if self.inflight < self.current_limit and not waiter.cancelled():
+                    self._wakeup()
+                raise
+        self.inflight += 1
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False) -> None:
+        """
+        슬롯 반납 및 한도 조정
+
+        Args:
+            latency: 처리 시간 (None이면 한도 조정 없이 반납만)
+            overloaded: 타임아웃 / 429 여부
+        """
+        saturated = self.inflight >= self.current_limit
+        self.inflight -= 1
+
+        if overloaded:
+            self.overloads += 1
+            self._decrease(self.backoff)
+        elif latency is not None:
+            self._observe(latency, saturated)
+
+        self._wakeup()
+
+    def _observe(self, latency: float, saturated: bool) -> None:
+        """정상 응답 지연 반영"""
+        if self.long_latency is None:
+            self.short_latency = self.long_latency = latency
+            return
+
+        self.short_latency += 0.3 * (latency - self.short_latency)
+        self.long_latency += 0.05 * (latency - self.long_latency)
+
+        if self.short_latency > self.long_latency * self.tolerance:
+            self._decrease(self.latency_backoff)
+        elif saturated:
+            # 한도만큼 요청이 끝날 때마다 약 1씩 증가 (additive increase)
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _decrease(self, factor: float) -> None:
+        """한도 감소 (동시에 실패한 요청들로 연쇄 감소하지 않도록 평소 지연 한 번에 한 번만)"""
+        now = time.monotonic()
+        cooldown = self.long_latency if self.long_latency is not None else 1.0
+        if now - self._last_decrease < cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * factor)
+
+    def _wakeup(self) -> None:
+        """빈 슬롯 수만큼 대기자 깨우기"""
+        free = self.current_limit - self.inflight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """슬롯을 점유한 채로 요청을 처리하고 결과에 따라 한도 조정"""
+        await self.acquire()
+        slot = _Slot()
+        token = _current_slot.set(slot)
+        start = time.monotonic()
+        latency = None
+        try:
+            yield slot
+            latency = time.monotonic() - start
+        except asyncio.TimeoutError:
+            slot.overloaded = True
+            raise
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            latency = time.monotonic() - start
+            raise
+        finally:
+            _current_slot.reset(token)
+            self.release(None if slot.discard else latency, slot.overloaded)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'limit': self.current_limit,
+            'inflight': self.inflight,
+            'latency_short': round(self.short_latency, 3) if self.short_latency is not None else None,
+            'latency_long': round(self.long_latency, 3) if self.long_latency is not None else None,
+            'overloads': self.overloads,
+        }
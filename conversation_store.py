@@ -0,0 +1,223 @@
+"""
+채널(스레드)별 대화 기억
+
+채널 또는 스레드 ID마다 최근 대화 턴을 LRU로 보관하고, 일정 시간 대화가 없는 세션은
+접근할 때 앞에서부터 제거합니다. 메시지마다 토큰 수를 한 번만 계산해 두고,
+프롬프트를 만들 때는 최신 턴부터 토큰 예산 안에 들어가는 만큼만 넣습니다.
+
+예산을 넘은 오래된 턴은 백그라운드 태스크에서 요약(summarizer가 있으면)해 하나의
+요약 메시지로 합치고, 요약할 수 없으면 버립니다. 요청 경로는 요약을 기다리지 않습니다.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from env_manager import get_env_int
+
+logger = logging.getLogger(__name__)
+
+# 환경 변수에서 설정값 로드 (캐시된 값 사용)
+CONVERSATION_MAX_SESSIONS = get_env_int("CONVERSATION_MAX_SESSIONS", 1000)
+CONVERSATION_IDLE_TIMEOUT = get_env_int("CONVERSATION_IDLE_TIMEOUT", 1800)
+CONVERSATION_TOKEN_BUDGET = get_env_int("CONVERSATION_TOKEN_BUDGET", 3000)
+
+# 메시지 하나당 역할 / 구분자 토큰
+MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토큰 수 근사치 (영문 등 ASCII는 약 4자, 한글 등은 약 1자당 1토큰)
+
+    UTF-8 길이와 문자 수의 차이로 비 ASCII 문자 수를 구하므로 문자를 하나씩 보지 않습니다.
+    (한글 / 한자는 3바이트이므로 (바이트 수 - 문자 수) / 2로 계산)
+    """
+    chars = len(text)
+    non_ascii = (len(text.encode("utf-8")) - chars) // 2
+    return (chars - non_ascii + 3) // 4 + non_ascii + MESSAGE_OVERHEAD
+
+
+class Turn:
+    """대화 메시지 하나 (토큰 수는 생성 시 한 번만 계산)"""
+
+    __slots__ = ("role", "content", "tokens")
+
+    def __init__(self, role: str, content: str):
+        self.role = role
+        self.content = content
+        self.tokens = estimate_tokens(content)
+
+    def as_message(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+
+class Session:
+    """채널 하나의 대화 상태"""
+
+    __slots__ = ("turns", "tokens", "summary", "last_active", "compacting")
+
+    def __init__(self, now: float):
+        self.turns: List[Turn] = []
+        self.tokens = 0  # turns의 토큰 합 (추가 / 제거 시 갱신)
+        self.summary: Optional[Turn] = None
+        self.last_active = now
+        self.compacting = False
+
+
+class ConversationStore:
+    """채널별 대화 세션 LRU 저장소"""
+
+    def __init__(self, max_sessions: int = CONVERSATION_MAX_SESSIONS,
+                 idle_timeout: float = CONVERSATION_IDLE_TIMEOUT,
+                 token_budget: int = CONVERSATION_TOKEN_BUDGET,
+                 summarizer: Optional[Callable[[List[Dict[str, str]]], Awaitable[str]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_sessions: 보관할 최대 세션 수 (넘으면 가장 오래 쓰지 않은 세션 제거)
+            idle_timeout: 이 시간(초) 동안 대화가 없으면 세션 제거
+            token_budget: 프롬프트에 넣을 이전 대화(요약 포함)의 토큰 예산
+            summarizer: 이전 요약과 오래된 턴 메시지 목록을 받아 요약문을 돌려주는 코루틴 함수
+            clock: 단조 증가 시계 함수
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self._clock = clock
+        self._sessions: "OrderedDict[int, Session]" = OrderedDict()
+        self._tasks = set()
+        self.evicted_total = 0
+        self.summarized_total = 0
+        self.dropped_turns = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict_idle(self, now: float) -> None:
+        """가장 오래 쓰지 않은 세션부터 유휴 시간이 지났거나 개수를 넘은 세션 제거"""
+        sessions = self._sessions
+        while sessions:
+            key, session = next(iter(sessions.items()))
+            if now - session.last_active <= self.idle_timeout and len(sessions) <= self.max_sessions:
+                break
+            del sessions[key]
+            self.evicted_total += 1
+
+    def _touch(self, key: int, now: float, create: bool) -> Optional[Session]:
+        session = self._sessions.get(key)
+        if session is not None:
+            self._sessions.move_to_end(key)
+            session.last_active = now
+        elif create:
+            session = self._sessions[key] = Session(now)
+        self._evict_idle(now)
+        return session
+
+    def build_messages(self, key: int, system_prompt: str, prompt: str) -> List[Dict[str, str]]:
+        """
+        시스템 프롬프트 + (요약) + 예산 안의 최근 대화 + 이번 질문으로 메시지 목록 구성
+
+        Args:
+            key: 채널 또는 스레드 ID
+            system_prompt: 시스템 메시지
+            prompt: 이번 사용자 메시지 (예산과 별개로 항상 포함)
+        """
+        session = self._touch(key, self._clock(), create=False)
+        messages = [{"role": "system", "content": system_prompt}]
+        if session is None:
+            messages.append({"role": "user", "content": prompt})
+            return messages
+
+        budget = self.token_budget
+        if session.summary is not None:
+            messages.append(session.summary.as_message())
+            budget -= session.summary.tokens
+
+        # 최신 턴부터 예산 안에 들어가는 만큼 (요약이 끝나기 전에도 예산은 지킴)
+        first = len(session.turns)
+        for turn in reversed(session.turns):
+            if turn.tokens > budget:
+                break
+            budget -= turn.tokens
+            first -= 1
+        messages.extend(turn.as_message() for turn in session.turns[first:])
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def record(self, key: int, prompt: str, reply: str) -> None:
+        """응답이 끝난 질문 / 답변을 세션에 추가하고 예산을 넘으면 백그라운드 요약 예약"""
+        if not reply:
+            return
+        session = self._touch(key, self._clock(), create=True)
+        for turn in (Turn("user", prompt), Turn("assistant", reply)):
+            session.turns.append(turn)
+            session.tokens += turn.tokens
+
+        summary_tokens = session.summary.tokens if session.summary is not None else 0
+        if session.tokens + summary_tokens > self.token_budget and not session.compacting:
+            session.compacting = True
+            task = asyncio.create_task(self._compact(key, session))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def reset(self, key: int) -> bool:
+        """세션 삭제 (삭제했으면 True)"""
+        return self._sessions.pop(key, None) is not None
+
+    async def _compact(self, key: int, session: Session) -> None:
+        """오래된 턴을 요약으로 합쳐 최근 턴이 예산의 절반 이하가 되도록 정리"""
+        try:
+            # 자주 요약하지 않도록 절반까지 줄임
+            target = self.token_budget // 2
+            count = 0
+            tokens = session.tokens
+            while count < len(session.turns) - 1 and tokens > target:
+                tokens -= session.turns[count].tokens
+                count += 1
+            if count % 2:
+                count += 1  # 질문 / 답변 쌍 단위로
+            old = session.turns[:count]
+            if not old:
+                return
+
+            summary = None
+            if self.summarizer is not None:
+                history = [session.summary.as_message()] if session.summary is not None else []
+                history.extend(turn.as_message() for turn in old)
+                try:
+                    summary = await self.summarizer(history)
+                except Exception as e:
+                    logger.warning(f"Conversation summary failed for {key}: {e}")
+
+            # 요약하는 동안 추가된 턴은 그대로 두고 요약한 턴만 제거
+            del session.turns[:count]
+            session.tokens -= sum(turn.tokens for turn in old)
+            if summary:
+                session.summary = Turn("system", f"이전 대화 요약: {summary}")
+                self.summarized_total += 1
+            else:
+                self.dropped_turns += count
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Conversation compaction error for {key}: {e}")
+        finally:
+            session.compacting = False
+
+    def stats(self) -> Dict[str, int]:
+        """세션 수와 제거 / 요약 통계"""
+        return {
+            'sessions': len(self._sessions),
+            'evicted': self.evicted_total,
+            'summarized': self.summarized_total,
+            'dropped_turns': self.dropped_turns,
+        }
+
+
+# 글로벌 인스턴스 생성 (요약 함수는 OpenAI 서비스가 등록)
+conversation_store = ConversationStore()
@@ -47,6 +47,47 @@ def init_environment(force_reload: bool = False) -> None:
         'CHAT_COOLDOWN': int(os.getenv('CHAT_COOLDOWN', '3')),
         'IMAGE_COOLDOWN': int(os.getenv('IMAGE_COOLDOWN', '3')),
         'VIDEO_COOLDOWN': int(os.getenv('VIDEO_COOLDOWN', '10')),
+        'QUOTA_DB_PATH': os.getenv('QUOTA_DB_PATH', 'logs/quota.db'),
+        'QUOTA_FLUSH_INTERVAL': int(os.getenv('QUOTA_FLUSH_INTERVAL', '5')),
+        'QUOTA_LOAD_TIMEOUT_MS': int(os.getenv('QUOTA_LOAD_TIMEOUT_MS', '500')),
+        'CHAT_CONCURRENCY_MAX': int(os.getenv('CHAT_CONCURRENCY_MAX', '40')),
+        'IMAGE_CONCURRENCY_MAX': int(os.getenv('IMAGE_CONCURRENCY_MAX', '20')),
+        'VIDEO_CONCURRENCY_MAX': int(os.getenv('VIDEO_CONCURRENCY_MAX', '4')),
+        'CHAT_WORKERS_MIN': int(os.getenv('CHAT_WORKERS_MIN', '1')),
+        'IMAGE_WORKERS_MIN': int(os.getenv('IMAGE_WORKERS_MIN', '1')),
+        'VIDEO_WORKERS_MIN': int(os.getenv('VIDEO_WORKERS_MIN', '1')),
+        'WORKER_IDLE_TIMEOUT': int(os.getenv('WORKER_IDLE_TIMEOUT', '60')),
+        'METRICS_ENABLED': os.getenv('METRICS_ENABLED', 'false'),
+        'METRICS_HOST': os.getenv('METRICS_HOST', '0.0.0.0'),
+        'METRICS_PORT': int(os.getenv('METRICS_PORT', '9108')),
+        'METRICS_TOP_USERS': int(os.getenv('METRICS_TOP_USERS', '50')),
+        'CONVERSATION_MAX_SESSIONS': int(os.getenv('CONVERSATION_MAX_SESSIONS', '1000')),
+        'CONVERSATION_IDLE_TIMEOUT': int(os.getenv('CONVERSATION_IDLE_TIMEOUT', '1800')),
+        'CONVERSATION_TOKEN_BUDGET': int(os.getenv('CONVERSATION_TOKEN_BUDGET', '3000')),
+        'RESPONSE_CACHE_SIZE': int(os.getenv('RESPONSE_CACHE_SIZE', '1000')),
+        'RESPONSE_CACHE_TTL': int(os.getenv('RESPONSE_CACHE_TTL', '3600')),
+        'RESPONSE_CACHE_PATH': os.getenv('RESPONSE_CACHE_PATH', ''),
+        'NEAR_DUPLICATE_DISTANCE': int(os.getenv('NEAR_DUPLICATE_DISTANCE', '2')),
+        'NEAR_DUPLICATE_INDEX_SIZE': int(os.getenv('NEAR_DUPLICATE_INDEX_SIZE', '5000')),
+        'NEAR_DUPLICATE_TTL': int(os.getenv('NEAR_DUPLICATE_TTL', '3600')),
+        'CHAT_FIRST_TOKEN_TIMEOUT': int(os.getenv('CHAT_FIRST_TOKEN_TIMEOUT', '15')),
+        'CHAT_TOKEN_IDLE_TIMEOUT': int(os.getenv('CHAT_TOKEN_IDLE_TIMEOUT', '10')),
+        'CHAT_STREAM_RETRIES': int(os.getenv('CHAT_STREAM_RETRIES', '1')),
+        'CHAT_HEDGE_PERCENT': int(os.getenv('CHAT_HEDGE_PERCENT', '5')),
+        'CHAT_HEDGE_MODEL': os.getenv('CHAT_HEDGE_MODEL', ''),
+        'OPENAI_HTTP2': os.getenv('OPENAI_HTTP2', 'false'),
+        'OPENAI_KEEPALIVE_EXPIRY': int(os.getenv('OPENAI_KEEPALIVE_EXPIRY', '90')),
+        'OPENAI_WARMUP_CONNECTIONS': int(os.getenv('OPENAI_WARMUP_CONNECTIONS', '2')),
+        'PROVIDER_LIMIT_PER_HOST': int(os.getenv('PROVIDER_LIMIT_PER_HOST', '20')),
+        'PROVIDER_DNS_CACHE_TTL': int(os.getenv('PROVIDER_DNS_CACHE_TTL', '300')),
+        'PROVIDER_KEEPALIVE_TIMEOUT': int(os.getenv('PROVIDER_KEEPALIVE_TIMEOUT', '60')),
+        'MINIMAX_API_BASE': os.getenv('MINIMAX_API_BASE', 'https://api.minimax.io'),
+        'MINIMAX_CALLBACK_URL': os.getenv('MINIMAX_CALLBACK_URL', ''),
+        'MINIMAX_CALLBACK_HOST': os.getenv('MINIMAX_CALLBACK_HOST', '0.0.0.0'),
+        'MINIMAX_CALLBACK_PORT': int(os.getenv('MINIMAX_CALLBACK_PORT', '9109')),
+        'MINIMAX_CALLBACK_SECRET': os.getenv('MINIMAX_CALLBACK_SECRET', ''),
+        'VIDEO_JOBS_DB_PATH': os.getenv('VIDEO_JOBS_DB_PATH', 'logs/video_jobs.db'),
+        'VIDEO_ASYNC_JOBS': os.getenv('VIDEO_ASYNC_JOBS', 'false'),
         'LOG_LEVEL': os.getenv('LOG_LEVEL', 'INFO')
     }
     
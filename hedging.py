@@ -0,0 +1,101 @@
+"""
+채팅 요청 헤징 (hedged request)
+
+첫 토큰이 최근 첫 토큰 시간(ttft)의 p95가 지나도 오지 않으면 같은 요청을 한 번 더 보내고
+먼저 첫 토큰을 보낸 쪽의 스트림을 쓰고 다른 쪽은 취소합니다(stream_guard.guarded_stream).
+두 번째 요청은 CHAT_HEDGE_MODEL이 있으면 그 모델로, 없으면 같은 모델로 보냅니다.
+
+헤지 요청 수는 토큰 예산으로 제한합니다. 요청마다 CHAT_HEDGE_PERCENT / 100 토큰이 쌓이고
+(최대 HEDGE_BURST개) 헤지할 때 1토큰을 쓰므로, 업스트림이 전반적으로 느려져도 추가 요청은
+전체 요청의 CHAT_HEDGE_PERCENT% 이내로 유지됩니다.
+"""
+
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from env_manager import get_env, get_env_int
+from metrics import LatencyHistogram, latency_metrics, STAGE_TTFT
+
+# 환경 변수에서 설정값 로드 (캐시된 값 사용)
+CHAT_HEDGE_PERCENT = get_env_int("CHAT_HEDGE_PERCENT", 5)
+CHAT_HEDGE_MODEL = get_env("CHAT_HEDGE_MODEL", "")
+
+# 짧은 시간에 몰아서 쓸 수 있는 헤지 토큰 수
+HEDGE_BURST = 3
+
+# 이보다 ttft 샘플이 적으면 p95를 믿을 수 없으므로 헤지하지 않음
+HEDGE_MIN_SAMPLES = 20
+
+
+class Hedge:
+    """요청 하나의 헤지 계획 (delay가 지나면 guarded_stream이 start() 호출)"""
+
+    __slots__ = ("delay", "_policy", "_open_stream")
+
+    def __init__(self, delay: float, policy: "HedgePolicy",
+                 open_stream: Callable[[], Awaitable[AsyncIterator]]):
+        self.delay = delay
+        self._policy = policy
+        self._open_stream = open_stream
+
+    def start(self) -> Optional[Callable[[], Awaitable[AsyncIterator]]]:
+        """예산이 남아 있으면 헤지 요청 함수 (없으면 None)"""
+        return self._open_stream if self._policy.acquire() else None
+
+    def won(self) -> None:
+        """헤지 요청이 먼저 첫 토큰을 보냄"""
+        self._policy.wins += 1
+
+
+class HedgePolicy:
+    """ttft p95 기준 헤지 지연과 요청 비율 예산"""
+
+    def __init__(self, percent: int = CHAT_HEDGE_PERCENT, histogram: Optional[LatencyHistogram] = None,
+                 burst: int = HEDGE_BURST, min_samples: int = HEDGE_MIN_SAMPLES):
+        """
+        Args:
+            percent: 헤지할 수 있는 요청 비율 (%, 0이면 사용 안 함)
+            histogram: 헤지 지연을 정할 ttft 히스토그램
+            burst: 모아 둘 수 있는 최대 헤지 토큰 수
+            min_samples: 헤지를 시작할 최소 ttft 샘플 수 (롤링 윈도우 기준)
+        """
+        self.percent = max(0, min(percent, 100))
+        self.histogram = histogram if histogram is not None else latency_metrics.histogram('chat', STAGE_TTFT)
+        self.burst = burst
+        self.min_samples = min_samples
+        self.tokens = 0.0
+        self.hedged = 0
+        self.wins = 0
+
+    def plan(self, open_stream: Callable[[], Awaitable[AsyncIterator]]) -> Optional[Hedge]:
+        """
+        요청 하나에 대한 헤지 계획 (요청마다 한 번 호출해 예산을 쌓음)
+
+        Args:
+            open_stream: 헤지 요청을 보내고 스트림을 돌려주는 코루틴 함수
+
+        Returns:
+            Hedge 또는 None (사용 안 함 / ttft 샘플 부족)
+        """
+        if self.percent <= 0:
+            return None
+        self.tokens = min(float(self.burst), self.tokens + self.percent / 100)
+
+        summary = self.histogram.summary()
+        if summary['count'] < self.min_samples:
+            return None
+        return Hedge(summary['p95'], self, open_stream)
+
+    def acquire(self) -> bool:
+        """헤지 토큰 하나 사용"""
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.hedged += 1
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        return {'hedged': self.hedged, 'wins': self.wins, 'tokens': round(self.tokens, 2)}
+
+
+# 글로벌 인스턴스 생성
+chat_hedging = HedgePolicy()
@@ -0,0 +1,82 @@
+"""
+업스트림 제공자별 공유 aiohttp 세션
+
+MiniMax / Stability 호출은 제공자마다 하나의 ClientSession(연결 풀)을 함께 씁니다.
+요청마다 세션을 새로 만들면 매번 DNS 조회, TCP 연결, TLS 핸드셰이크를 다시 해야 하므로
+연결을 유지(keep-alive)하고 DNS 결과를 캐시하는 TCPConnector를 제공자별로 둡니다.
+
+세션은 봇이 소유합니다. setup_hook에서 open(), close()에서 close()를 호출하고,
+그 밖(스크립트 등)에서 먼저 쓰면 처음 요청할 때 만듭니다.
+타임아웃은 호출마다 다르므로 요청할 때 timeout=으로 지정합니다.
+"""
+
+import logging
+from typing import Dict
+
+import aiohttp
+
+from env_manager import get_env_int
+
+logger = logging.getLogger(__name__)
+
+# 환경 변수에서 설정값 로드 (캐시된 값 사용)
+PROVIDER_LIMIT_PER_HOST = get_env_int("PROVIDER_LIMIT_PER_HOST", 20)
+PROVIDER_DNS_CACHE_TTL = get_env_int("PROVIDER_DNS_CACHE_TTL", 300)
+PROVIDER_KEEPALIVE_TIMEOUT = get_env_int("PROVIDER_KEEPALIVE_TIMEOUT", 60)
+
+# 세션을 미리 만들 제공자
+PROVIDERS = ("minimax", "stability")
+
+
+class SessionRegistry:
+    """제공자별 aiohttp 세션 모음"""
+
+    def __init__(self, limit_per_host: int = PROVIDER_LIMIT_PER_HOST,
+                 dns_cache_ttl: int = PROVIDER_DNS_CACHE_TTL,
+                 keepalive_timeout: int = PROVIDER_KEEPALIVE_TIMEOUT):
+        """
+        Args:
+            limit_per_host: 호스트당 최대 동시 연결 수 (0이면 제한 없음)
+            dns_cache_ttl: DNS 조회 결과 캐시 시간 (초)
+            keepalive_timeout: 유휴 연결 유지 시간 (초)
+        """
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+    def _create(self, provider: str) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=0,  # 전체 상한은 요청 타입별 동시성 제한기가 담당
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        session = self._sessions[provider] = aiohttp.ClientSession(connector=connector)
+        return session
+
+    def get(self, provider: str) -> aiohttp.ClientSession:
+        """제공자의 세션 (없거나 닫혔으면 새로 생성 - 실행 중인 이벤트 루프 안에서 호출)"""
+        session = self._sessions.get(provider)
+        if session is None or session.closed:
+            session = self._create(provider)
+        return session
+
+    async def open(self) -> None:
+        """제공자별 세션 생성 (봇 시작 시)"""
+        for provider in PROVIDERS:
+            self.get(provider)
+        logger.info(f"Opened HTTP sessions for {', '.join(PROVIDERS)} "
+                    f"(per-host limit {self.limit_per_host}, DNS cache {self.dns_cache_ttl}s)")
+
+    async def close(self) -> None:
+        """모든 세션 닫기 (봇 종료 시)"""
+        sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            if not session.closed:
+                await session.close()
+
+
+# 글로벌 인스턴스 생성
+http_sessions = SessionRegistry()
@@ -1,18 +1,50 @@
 import asyncio
 import discord
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable, Optional
+from metrics import latency_metrics, STAGE_DISCORD_SEND
+from stream_renderer import StreamRenderer
 import logging
 
 logger = logging.getLogger(__name__)
 
+class RegenerateView(discord.ui.View):
+    """저장된 결과 대신 새로 생성하는 버튼 (요청한 사용자만, 한 번만 누를 수 있음)"""
+    
+    def __init__(self, owner_id: int, callback: Callable[[discord.Interaction], Awaitable[None]],
+                 label: str = "🔄 새로 생성", timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.owner_id = owner_id
+        self._callback = callback
+        button = discord.ui.Button(label=label, style=discord.ButtonStyle.primary)
+        button.callback = self._on_click
+        self.add_item(button)
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("⚠️ 요청한 사용자만 누를 수 있습니다.", ephemeral=True)
+            return False
+        return True
+    
+    async def _on_click(self, interaction: discord.Interaction) -> None:
+        # 버튼을 비활성화하는 것으로 응답하고, 이후 안내는 followup으로
+        self.stop()
+        for item in self.children:
+            item.disabled = True
+        await interaction.response.edit_message(view=self)
+        await self._callback(interaction)
+
 class MessageManager:
     """메시지 처리 관련 유틸리티"""
     
     @staticmethod
-    async def safe_followup_send(interaction, content: str, ephemeral: bool = False, **kwargs):
-        """안전한 followup 메시지 전송"""
+    async def safe_followup_send(interaction, content: str, ephemeral: bool = False,
+                                 request_type: Optional[str] = None, **kwargs):
+        """안전한 followup 메시지 전송 (request_type이 있으면 전송 시간 기록)"""
         try:
-            return await interaction.followup.send(content, ephemeral=ephemeral, **kwargs)
+            if request_type is None:
+                return await interaction.followup.send(content, ephemeral=ephemeral, **kwargs)
+            with latency_metrics.timer(request_type, STAGE_DISCORD_SEND):
+                return await interaction.followup.send(content, ephemeral=ephemeral, **kwargs)
         except discord.errors.HTTPException as e:
             logger.error(f"Failed to send followup message: {e}")
             return None
@@ -22,75 +54,18 @@ class MessageManager:
     
     @staticmethod 
     async def streaming_response_handler(interaction, content_generator: AsyncGenerator[str, None], 
-                                       prefix: str = "") -> None:
-        """스트리밍 응답 처리 (줄바꿈 수정됨)"""
-        content = ""
-        message = None
-        last_update = 0
-        
-        async for chunk in content_generator:
-            content += chunk
-            
-            # 처음 메시지 또는 300자마다 업데이트
-            if message is None:
-                # 처음 메시지 전송 - 실제 줄바꿈 사용
-                display_content = content if len(content) <= 2000 else content[:1950] + "\n\n**[계속 입력 중...]**"
-                message = await MessageManager.safe_followup_send(
-                    interaction, 
-                    f"{prefix}{display_content}"
-                )
-                last_update = len(content)
-                
-            elif len(content) - last_update >= 300:  # 300자마다 업데이트
-                last_update = len(content)
-                try:
-                    # 기존 메시지 수정 - 실제 줄바꿈 사용
-                    display_content = content if len(content) <= 2000 else content[:1950] + "\n\n**[계속 입력 중...]**"
-                    await message.edit(content=f"{prefix}{display_content}")
-                except discord.errors.HTTPException:
-                    # 수정 실패시 무시하고 계속
-                    pass
-        
-        # 최종 메시지 수정
-        if message is not None:
-            try:
-                if len(content) <= 2000:
-                    # 전체 내용이 2000자 이하인 경우 - 실제 줄바꿈 사용
-                    await message.edit(content=f"{prefix}{content}")
-                else:
-                    # 2000자 초과인 경우 - 실제 줄바꿈 사용
-                    await message.edit(content=f"{prefix}{content[:1950]}\n\n**[계속 ⬇️]**")
-                    
-                    # 나머지 내용을 새 메시지들로 전송
-                    remaining = content[1950:]
-                    chunk_num = 2
-                    while remaining:
-                        chunk = remaining[:1950]
-                        remaining = remaining[1950:]
-                        if remaining:  # 아직 더 있다면 - 실제 줄바꿈 사용
-                            await MessageManager.safe_followup_send(
-                                interaction,
-                                f"**[계속 {chunk_num}]**\n\n{chunk}\n\n**[계속 ⬇️]**"
-                            )
-                        else:  # 마지막 청크 - 실제 줄바꿈 사용
-                            await MessageManager.safe_followup_send(
-                                interaction,
-                                f"**[계속 {chunk_num}]**\n\n{chunk}"
-                            )
-                        chunk_num += 1
-                        
-            except discord.errors.HTTPException:
-                # 수정 실패시 새 메시지로 전송
-                await MessageManager.safe_followup_send(
-                    interaction,
-                    f"**[최종 응답]**\n\n{content[:2000]}"
-                )
-        else:
-            # message가 None인 경우 (매우 짧은 응답) - 실제 줄바꿈 사용
-            await MessageManager.safe_followup_send(
-                interaction,
-                f"{prefix}{content}"
-            )
+                                       prefix: str = "", request_type: str = 'chat') -> str:
+        """스트리밍 응답 처리 (조각을 모아 수정 간격에 맞춰 갱신, 첫 토큰은 바로 전송) 후 전체 응답 반환"""
+        renderer = StreamRenderer(interaction, prefix, request_type=request_type)
+        await renderer.render(content_generator)
+        return renderer.content
+
+    @staticmethod
+    async def offer_regenerate(interaction, content: str, callback: Callable[[discord.Interaction], Awaitable[None]],
+                               label: str = "🔄 새로 생성"):
+        """저장된 결과를 보여 준 뒤 새로 생성할 수 있는 버튼 안내 (ephemeral)"""
+        view = RegenerateView(interaction.user.id, callback, label)
+        return await MessageManager.safe_followup_send(interaction, content, ephemeral=True, view=view)
 
 # 글로벌 인스턴스 생성
 message_manager = MessageManager()
@@ -0,0 +1,265 @@
+"""
+요청 타입 / 처리 단계별 지연 시간 히스토그램
+
+고정된 로그 스케일 버킷(옥타브당 BUCKETS_PER_OCTAVE개)에 횟수만 세므로 기록은 O(1)이고
+메모리는 샘플 수와 무관합니다. 백분위수는 최근 WINDOW_SLICES개 시간 조각을 합쳐서
+(기본: 최근 5분) 계산하며, 상대 오차는 버킷 폭(약 9%) 이내입니다.
+
+처리 단계:
+- queue_wait: 큐에 들어간 뒤 작업자가 꺼낼 때까지
+- provider: 업스트림(OpenAI / MiniMax / Stability) 호출 전체
+- ttft: 채팅 요청 후 첫 토큰까지
+- token_gap: 채팅 스트림 하나에서 가장 길었던 토큰 사이 간격
+- discord_send: Discord 메시지 전송 / 수정 한 번
+
+업스트림 제공자별 호출 결과(성공 / 오류 / 타임아웃 / 429)는 ProviderMetrics로 셉니다.
+"""
+
+import functools
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# 처리 단계
+STAGE_QUEUE_WAIT = "queue_wait"
+STAGE_PROVIDER = "provider"
+STAGE_TTFT = "ttft"
+STAGE_TOKEN_GAP = "token_gap"
+STAGE_DISCORD_SEND = "discord_send"
+
+# 버킷 설정: 1ms부터 약 2^21ms(35분)까지, 그 밖은 양 끝 버킷에 기록
+MIN_LATENCY = 0.001
+BUCKETS_PER_OCTAVE = 8
+_OCTAVES = 21
+NUM_BUCKETS = _OCTAVES * BUCKETS_PER_OCTAVE + 2
+
+# 롤링 윈도우: 60초 조각 5개
+WINDOW_SLICE = 60.0
+WINDOW_SLICES = 5
+
+DEFAULT_PERCENTILES = (0.5, 0.95, 0.99)
+
+
+def bucket_index(value: float) -> int:
+    """지연 시간(초)이 속하는 버킷 번호"""
+    if value < MIN_LATENCY:
+        return 0
+    index = int(math.log2(value / MIN_LATENCY) * BUCKETS_PER_OCTAVE) + 1
+    return min(index, NUM_BUCKETS - 1)
+
+
+def bucket_upper_bound(index: int) -> float:
+    """버킷의 상한 (초) - 마지막 버킷은 무한대"""
+    if index >= NUM_BUCKETS - 1:
+        return float("inf")
+    return MIN_LATENCY * 2 ** (index / BUCKETS_PER_OCTAVE)
+
+
+class LatencyHistogram:
+    """로그 스케일 버킷 히스토그램 (전체 누적 + 최근 롤링 윈도우)"""
+
+    __slots__ = ("_clock", "_slices", "_slice_start", "totals", "count", "sum")
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._slices: Deque[List[int]] = deque([[0] * NUM_BUCKETS], maxlen=WINDOW_SLICES)
+        self._slice_start = clock()
+
+        # 시작 이후 누적 값 (메트릭 내보내기용)
+        self.totals = [0] * NUM_BUCKETS
+        self.count = 0
+        self.sum = 0.0
+
+    def _rotate(self, now: float) -> None:
+        """지난 시간만큼 새 조각 추가 (오래된 조각은 deque maxlen으로 자동 제거)"""
+        elapsed = int((now - self._slice_start) // WINDOW_SLICE)
+        if elapsed <= 0:
+            return
+        for _ in range(min(elapsed, WINDOW_SLICES)):
+            self._slices.append([0] * NUM_BUCKETS)
+        self._slice_start += elapsed * WINDOW_SLICE
+
+    def record(self, value: float) -> None:
+        """지연 시간 한 건 기록 (초)"""
+        self._rotate(self._clock())
+        index = bucket_index(value)
+        self._slices[-1][index] += 1
+        self.totals[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def window_counts(self) -> List[int]:
+        """롤링 윈도우 안의 버킷별 횟수"""
+        self._rotate(self._clock())
+        return [sum(column) for column in zip(*self._slices)]
+
+    def percentiles(self, quantiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[float, Optional[float]]:
+        """
+        롤링 윈도우 기준 백분위수
+
+        Returns:
+            {분위: 해당 버킷 상한 (초)} - 윈도우 안에 기록이 없으면 None
+        """
+        return _quantiles(self.window_counts(), quantiles)
+
+    def summary(self) -> Dict[str, float]:
+        """롤링 윈도우 요약 (횟수, p50 / p95 / p99)"""
+        counts = self.window_counts()
+        summary = {'count': sum(counts)}
+        for q, value in _quantiles(counts, DEFAULT_PERCENTILES).items():
+            # 마지막(상한 없는) 버킷은 범위의 끝 값으로 표시
+            if value is not None:
+                value = round(min(value, bucket_upper_bound(NUM_BUCKETS - 2)), 3)
+            summary[f"p{int(q * 100)}"] = value
+        return summary
+
+
+def _quantiles(counts: List[int], quantiles: Iterable[float]) -> Dict[float, Optional[float]]:
+    """버킷별 횟수에서 분위별 버킷 상한 계산"""
+    total = sum(counts)
+    quantiles = sorted(quantiles)
+    if total == 0:
+        return {q: None for q in quantiles}
+
+    result = {}
+    cumulative = 0
+    index = 0
+    for q in quantiles:
+        # q 분위에 해당하는 순위 (1부터)
+        rank = max(1, math.ceil(q * total))
+        while cumulative + counts[index] < rank:
+            cumulative += counts[index]
+            index += 1
+        result[q] = bucket_upper_bound(index)
+    return result
+
+
+class LatencyMetrics:
+    """(요청 타입, 처리 단계)별 히스토그램 모음"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+    def histogram(self, request_type: str, stage: str) -> LatencyHistogram:
+        key = (request_type, stage)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram(self._clock)
+        return histogram
+
+    def observe(self, request_type: str, stage: str, seconds: float) -> None:
+        """지연 시간 기록"""
+        self.histogram(request_type, stage).record(seconds)
+
+    @contextmanager
+    def timer(self, request_type: str, stage: str):
+        """블록 실행 시간 기록 (예외로 끝나도 기록)"""
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.observe(request_type, stage, self._clock() - start)
+
+    def timed(self, request_type: str, stage: str):
+        """코루틴 함수 실행 시간을 기록하는 데코레이터"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.timer(request_type, stage):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    async def observe_stream(self, stream: AsyncIterator[T], request_type: str,
+                             started: float) -> AsyncIterator[T]:
+        """
+        스트림을 그대로 넘겨주면서 첫 항목까지의 시간(ttft), 가장 긴 항목 간격(token_gap),
+        업스트림 대기 시간 기록
+
+        provider에는 요청 시작부터 스트림 종료까지 중 소비자(Discord 전송 등)가
+        처리하느라 쓴 시간을 뺀, 업스트림을 기다린 시간만 기록합니다.
+
+        Args:
+            stream: 업스트림 응답 스트림
+            request_type: 요청 타입
+            started: 업스트림 요청 시작 시각 (clock 기준)
+        """
+        clock = self._clock
+        waited = 0.0
+        first = True
+        longest_gap = None
+        try:
+            # 스트림 생성까지 걸린 시간
+            waited = clock() - started
+            iterator = stream.__aiter__()
+            while True:
+                wait_start = clock()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    wait = clock() - wait_start
+                    waited += wait
+                    # 멈춰서 끊긴 스트림의 마지막 대기도 간격에 포함
+                    if not first and (longest_gap is None or wait > longest_gap):
+                        longest_gap = wait
+                if first:
+                    self.observe(request_type, STAGE_TTFT, clock() - started)
+                    first = False
+                yield item
+        finally:
+            self.observe(request_type, STAGE_PROVIDER, waited)
+            if longest_gap is not None:
+                self.observe(request_type, STAGE_TOKEN_GAP, longest_gap)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{요청 타입: {처리 단계: 롤링 윈도우 요약}}"""
+        snapshot: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (request_type, stage), histogram in sorted(self.histograms.items()):
+            snapshot.setdefault(request_type, {})[stage] = histogram.summary()
+        return snapshot
+
+
+# 글로벌 인스턴스
+latency_metrics = LatencyMetrics()
+
+
+# 업스트림 호출 결과
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_STALLED = "stalled"  # 스트림 도중 토큰이 끊김
+OUTCOME_RATE_LIMITED = "rate_limited"
+
+
+class ProviderMetrics:
+    """업스트림 제공자별 호출 결과 카운터"""
+
+    def __init__(self):
+        self.counts: Dict[Tuple[str, str], int] = {}
+
+    def count(self, provider: str, outcome: str) -> None:
+        """호출 결과 한 건 기록"""
+        key = (provider, outcome)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """{제공자: {결과: 횟수, 'error_rate': 실패 비율}}"""
+        snapshot: Dict[str, Dict[str, float]] = {}
+        for (provider, outcome), count in sorted(self.counts.items()):
+            snapshot.setdefault(provider, {})[outcome] = count
+        for outcomes in snapshot.values():
+            total = sum(outcomes.values())
+            failed = total - outcomes.get(OUTCOME_OK, 0)
+            outcomes['error_rate'] = round(failed / total, 4)
+        return snapshot
+
+
+# 글로벌 인스턴스
+provider_metrics = ProviderMetrics()
@@ -0,0 +1,297 @@
+"""
+OpenMetrics(Prometheus) 메트릭 HTTP 서버
+
+봇 프로세스 안에서 aiohttp 서버를 띄워 /metrics로 큐 / 작업자 / 동시성 한도 통계,
+사용량 상위 사용자의 쿼터 사용 횟수, 제공자별 호출 결과, 처리 단계별 지연 히스토그램,
+게이트웨이 지연(bot.latency)과 이벤트 루프 지연을 내보냅니다.
+
+METRICS_ENABLED=true일 때만 시작됩니다.
+"""
+
+import asyncio
+import logging
+import math
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from conversation_store import conversation_store
+from response_cache import response_cache
+from similarity_index import chat_index, image_index
+from single_flight import chat_flights
+from hedging import chat_hedging
+from ai_services.minimax_service import video_poller
+from video_jobs import video_jobs
+from env_manager import get_env, get_env_bool, get_env_int
+from metrics import (
+    BUCKETS_PER_OCTAVE, MIN_LATENCY, NUM_BUCKETS, latency_metrics, provider_metrics
+)
+
+logger = logging.getLogger(__name__)
+
+# 환경 변수에서 설정값 로드 (캐시된 값 사용)
+METRICS_ENABLED = get_env_bool("METRICS_ENABLED", False)
+METRICS_HOST = get_env("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = get_env_int("METRICS_PORT", 9108)
+# 사용자별 쿼터 메트릭을 내보낼 최대 사용자 수 (시계열 수 제한)
+METRICS_TOP_USERS = get_env_int("METRICS_TOP_USERS", 50)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# 이벤트 루프 지연 측정 주기 (초)
+LOOP_LAG_INTERVAL = 0.5
+
+PREFIX = "discord_bot"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if math.isnan(value):
+            return "NaN"
+    return repr(value)
+
+
+class _Exposition:
+    """OpenMetrics 텍스트 작성기"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, metric_type: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        self.lines.append(f"# TYPE {PREFIX}_{name} {metric_type}")
+
+    def sample(self, name: str, value: float, labels: Optional[Dict[str, object]] = None) -> None:
+        if labels:
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            self.lines.append(f"{PREFIX}_{name}{{{label_text}}} {_format_value(value)}")
+        else:
+            self.lines.append(f"{PREFIX}_{name} {_format_value(value)}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n# EOF\n"
+
+
+class MetricsServer:
+    """봇 프로세스 내장 메트릭 서버"""
+
+    def __init__(self, bot, host: str = METRICS_HOST, port: int = METRICS_PORT,
+                 top_users: int = METRICS_TOP_USERS):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.top_users = top_users
+        self.loop_lag = 0.0
+        self.loop_lag_max = 0.0  # 마지막 수집 이후 최대값
+        self._runner: Optional[web.AppRunner] = None
+        self._lag_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """HTTP 서버와 이벤트 루프 지연 측정 시작 (포트를 열 수 없으면 메트릭 없이 동작)"""
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            logger.error(f"Failed to start metrics server on {self.host}:{self.port}: {e}")
+            await runner.cleanup()
+            return
+
+        self._runner = runner
+        self._lag_task = asyncio.create_task(self._measure_loop_lag())
+        logger.info(f"Metrics server listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        """서버 종료"""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _measure_loop_lag(self) -> None:
+        """sleep이 예정보다 늦게 깨어난 시간으로 이벤트 루프 지연 측정"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                start = loop.time()
+                await asyncio.sleep(LOOP_LAG_INTERVAL)
+                self.loop_lag = max(0.0, loop.time() - start - LOOP_LAG_INTERVAL)
+                self.loop_lag_max = max(self.loop_lag_max, self.loop_lag)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Loop lag monitor error: {e}")
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        body = await self.render()
+        return web.Response(body=body.encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    async def render(self) -> str:
+        """현재 메트릭을 OpenMetrics 텍스트로 변환"""
+        out = _Exposition()
+        manager = self.bot.request_manager
+        stats = await manager.get_queue_stats()
+
+        self._render_queues(out, stats)
+        self._render_quota(out, manager, stats)
+        self._render_providers(out)
+        self._render_latency(out)
+
+        out.family("conversation_sessions", "gauge", "Channels with remembered chat history")
+        out.sample("conversation_sessions", len(conversation_store))
+
+        out.family("response_cache_entries", "gauge", "Chat replies held in the response cache")
+        out.sample("response_cache_entries", len(response_cache))
+        out.family("response_cache_lookups", "counter", "Response cache lookups by result")
+        out.sample("response_cache_lookups_total", response_cache.hits, {'result': 'hit'})
+        out.sample("response_cache_lookups_total", response_cache.misses, {'result': 'miss'})
+        out.family("response_cache_evictions", "counter", "Response cache entries evicted by the size bound")
+        out.sample("response_cache_evictions_total", response_cache.evictions)
+
+        out.family("near_duplicate_entries", "gauge", "Prompts held in the near-duplicate index")
+        for kind, index in (('chat', chat_index), ('image', image_index)):
+            out.sample("near_duplicate_entries", len(index), {'type': kind})
+        out.family("near_duplicate_lookups", "counter", "Near-duplicate index lookups by result")
+        for kind, index in (('chat', chat_index), ('image', image_index)):
+            out.sample("near_duplicate_lookups_total", index.hits, {'type': kind, 'result': 'hit'})
+            out.sample("near_duplicate_lookups_total", index.misses, {'type': kind, 'result': 'miss'})
+
+        out.family("chat_shared_streams", "gauge", "Upstream chat streams currently being generated")
+        out.sample("chat_shared_streams", len(chat_flights))
+        out.family("chat_upstream_streams", "counter", "Upstream chat streams started")
+        out.sample("chat_upstream_streams_total", chat_flights.started)
+        out.family("chat_coalesced_requests", "counter", "Chat requests served by joining an in-flight stream")
+        out.sample("chat_coalesced_requests_total", chat_flights.coalesced)
+        out.family("chat_hedged_requests", "counter", "Second chat requests sent because the first token was late")
+        out.sample("chat_hedged_requests_total", chat_hedging.hedged)
+        out.family("chat_hedge_wins", "counter", "Hedged chat requests that delivered the first token first")
+        out.sample("chat_hedge_wins_total", chat_hedging.wins)
+
+        out.family("video_jobs_polling", "gauge", "MiniMax video tasks tracked by the status poller")
+        out.sample("video_jobs_polling", len(video_poller))
+        out.family("video_status_polls", "counter", "MiniMax video status queries sent by the poller")
+        out.sample("video_status_polls_total", video_poller.polls)
+        out.family("video_jobs_background", "gauge", "Video jobs awaiting completion in the background")
+        out.sample("video_jobs_background", len(video_jobs))
+        out.family("video_jobs_resumed", "counter", "Unfinished video jobs resumed after a restart")
+        out.sample("video_jobs_resumed_total", video_jobs.resumed)
+        out.family("video_jobs_delivery_retries", "counter", "Video results re-sent after a failed delivery")
+        out.sample("video_jobs_delivery_retries_total", video_jobs.delivery_retries)
+
+        out.family("gateway_latency_seconds", "gauge", "Discord gateway heartbeat latency")
+        gateway_latency = self.bot.latency
+        if math.isfinite(gateway_latency):
+            out.sample("gateway_latency_seconds", gateway_latency)
+
+        out.family("event_loop_lag_seconds", "gauge", "Most recent event loop scheduling delay")
+        out.sample("event_loop_lag_seconds", round(self.loop_lag, 6))
+        out.family("event_loop_lag_max_seconds", "gauge", "Largest event loop delay since the last scrape")
+        out.sample("event_loop_lag_max_seconds", round(self.loop_lag_max, 6))
+        self.loop_lag_max = self.loop_lag
+
+        return out.render()
+
+    def _render_queues(self, out: _Exposition, stats: Dict) -> None:
+        """큐 / 작업자 / 동시성 한도"""
+        out.family("queue_depth", "gauge", "Requests waiting in the queue")
+        for req_type, size in stats['queue_sizes'].items():
+            out.sample("queue_depth", size, {'type': req_type})
+
+        out.family("queue_priority_depth", "gauge", "Requests waiting per priority class")
+        for req_type, classes in stats['priority_classes'].items():
+            for priority, class_stats in classes.items():
+                out.sample("queue_priority_depth", class_stats['depth'],
+                           {'type': req_type, 'priority': priority})
+
+        for name, key, help_text in (
+            ("requests_processed", 'processed_total', "Queued requests processed"),
+            ("requests_failed", 'failed_total', "Queued requests whose handler raised"),
+            ("requests_shed", 'shed_total', "Queued requests dropped past their deadline"),
+        ):
+            out.family(name, "counter", help_text)
+            out.sample(f"{name}_total", stats[key])
+
+        out.family("active_workers", "gauge", "Queue workers currently running a handler")
+        out.sample("active_workers", stats['active_workers'])
+
+        # OpenMetrics는 한 메트릭의 샘플이 연속되어야 하므로 메트릭마다 따로 순회
+        pools = stats['workers']
+        out.family("workers", "gauge", "Queue workers by state")
+        for req_type, pool in pools.items():
+            out.sample("workers", pool['idle'], {'type': req_type, 'state': 'idle'})
+            out.sample("workers", pool['busy'], {'type': req_type, 'state': 'busy'})
+
+        out.family("worker_service_time_seconds", "gauge", "Moving average handler duration")
+        for req_type, pool in pools.items():
+            if pool['service_time'] is not None:
+                out.sample("worker_service_time_seconds", pool['service_time'], {'type': req_type})
+
+        limiters = stats['concurrency_limits']
+        for name, key, metric_type, help_text in (
+            ("concurrency_limit", 'limit', "gauge", "Adaptive concurrency limit"),
+            ("concurrency_inflight", 'inflight', "gauge", "Requests holding a concurrency slot"),
+            ("concurrency_overloads", 'overloads', "counter", "Timeouts and 429 responses seen by the limiter"),
+        ):
+            out.family(name, metric_type, help_text)
+            sample_name = f"{name}_total" if metric_type == "counter" else name
+            for req_type, limiter in limiters.items():
+                out.sample(sample_name, limiter[key], {'type': req_type})
+
+    def _render_quota(self, out: _Exposition, manager, stats: Dict) -> None:
+        """쿼터 상태와 사용량 상위 사용자"""
+        out.family("quota_users", "gauge", "Users with in-memory quota state")
+        out.sample("quota_users", stats['quota_users']['live'])
+        out.family("quota_evicted_users", "counter", "Idle users evicted from quota state")
+        out.sample("quota_evicted_users_total", stats['quota_users']['evicted'])
+
+        out.family("quota_daily_limit", "gauge", "Daily request limit per user")
+        for req_type, limit_info in manager.rate_limits.items():
+            out.sample("quota_daily_limit", limit_info['daily_limit'], {'type': req_type})
+
+        out.family("quota_used", "gauge", "Requests used in the current daily window (top users)")
+        for user_id, usage in manager.quota.top_users(self.top_users):
+            for req_type, used in usage.items():
+                out.sample("quota_used", used, {'user_id': user_id, 'type': req_type})
+
+    def _render_providers(self, out: _Exposition) -> None:
+        """제공자별 호출 결과"""
+        out.family("provider_requests", "counter", "Upstream provider calls by outcome")
+        for (provider, outcome), count in sorted(provider_metrics.counts.items()):
+            out.sample("provider_requests_total", count, {'provider': provider, 'outcome': outcome})
+
+    def _render_latency(self, out: _Exposition) -> None:
+        """처리 단계별 지연 히스토그램 (누적, 옥타브 경계 버킷만 내보냄)"""
+        out.family("latency_seconds", "histogram", "Request latency by type and stage")
+        for (request_type, stage), histogram in sorted(latency_metrics.histograms.items()):
+            labels = {'type': request_type, 'stage': stage}
+            cumulative = 0
+            index = 0
+            # 내부 버킷 i의 상한은 MIN_LATENCY * 2^(i / BUCKETS_PER_OCTAVE)이므로
+            # 옥타브 경계까지의 누적 횟수는 정확히 계산됨
+            for octave in range((NUM_BUCKETS - 2) // BUCKETS_PER_OCTAVE + 1):
+                last = octave * BUCKETS_PER_OCTAVE
+                while index <= last:
+                    cumulative += histogram.totals[index]
+                    index += 1
+                out.sample("latency_seconds_bucket", cumulative,
+                           {**labels, 'le': repr(MIN_LATENCY * 2 ** octave)})
+            out.sample("latency_seconds_bucket", histogram.count, {**labels, 'le': "+Inf"})
+            out.sample("latency_seconds_count", histogram.count, labels)
+            out.sample("latency_seconds_sum", round(histogram.sum, 6), labels)
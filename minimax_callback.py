@@ -0,0 +1,117 @@
+"""
+MiniMax 비디오 완료 콜백 수신 서버
+
+MINIMAX_CALLBACK_URL(외부에서 이 서버로 들어오는 공개 주소)을 설정하면 봇 프로세스 안에서
+aiohttp 서버를 띄우고, 비디오 작업을 제출할 때 그 주소를 callback_url로 함께 보냅니다.
+
+- MiniMax는 먼저 {"challenge": ...}를 보내 주소를 확인하므로 같은 값을 그대로 돌려줍니다.
+- 이후 작업 상태가 바뀔 때마다 {"task_id", "status", "file_id"}를 보내며, 성공 / 실패면
+  그 작업을 바로 조회하도록 video_poller를 깨웁니다 (video_poller.poke).
+- 콜백 내용은 믿지 않습니다. 완료 여부와 file_id는 항상 상태 조회 API의 응답으로 정하므로
+  위조된 콜백으로 작업을 실패 처리하거나 다른 파일의 링크를 받게 할 수 없습니다.
+- 콜백 주소에는 배포마다 정한 비밀값(MINIMAX_CALLBACK_SECRET)을 token 쿼리로 붙이고,
+  token이 맞지 않는 요청은 거부합니다.
+- 콜백이 오지 않는 작업은 video_poller가 CALLBACK_FALLBACK_INTERVAL마다 조회해 마무리합니다.
+
+서버를 시작하지 못하면 콜백 주소를 보내지 않고 기존처럼 폴링만 사용합니다.
+"""
+
+import hmac
+import logging
+import secrets
+from typing import Optional
+from urllib.parse import urlencode, urlparse
+
+from aiohttp import web
+
+from env_manager import get_env, get_env_int
+from ai_services.minimax_service import set_callback_url, video_poller
+
+logger = logging.getLogger(__name__)
+
+# 환경 변수에서 설정값 로드 (캐시된 값 사용)
+MINIMAX_CALLBACK_URL = get_env("MINIMAX_CALLBACK_URL", "")
+MINIMAX_CALLBACK_HOST = get_env("MINIMAX_CALLBACK_HOST", "0.0.0.0")
+MINIMAX_CALLBACK_PORT = get_env_int("MINIMAX_CALLBACK_PORT", 9109)
+MINIMAX_CALLBACK_SECRET = get_env("MINIMAX_CALLBACK_SECRET", "")
+
+# 작업이 끝났음을 알리는 콜백 상태 (이때만 바로 조회)
+_FINISHED_STATUSES = {"success", "fail", "failed"}
+
+
+class CallbackServer:
+    """MiniMax 완료 콜백 수신 HTTP 서버"""
+
+    def __init__(self, public_url: str = MINIMAX_CALLBACK_URL, host: str = MINIMAX_CALLBACK_HOST,
+                 port: int = MINIMAX_CALLBACK_PORT, secret: str = MINIMAX_CALLBACK_SECRET):
+        """
+        Args:
+            public_url: MiniMax가 호출할 공개 주소 (경로까지 포함, 이 경로로 수신)
+            host / port: 수신할 주소
+            secret: 콜백 주소에 붙일 비밀값 (비어 있으면 실행할 때마다 새로 생성 -
+                재시작 전에 제출한 작업의 콜백은 거부되고 폴링으로 마무리됨)
+        """
+        if not secret:
+            logger.warning("MINIMAX_CALLBACK_SECRET is not set, using a random secret for this run")
+            secret = secrets.token_urlsafe(24)
+        self.secret = secret
+        parsed = urlparse(public_url)
+        query = f"{parsed.query}&" if parsed.query else ""
+        self.public_url = parsed._replace(query=query + urlencode({"token": secret})).geturl()
+        self.path = parsed.path or "/"
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+        self.received = 0
+        self.rejected = 0
+        self.woken = 0
+
+    async def start(self) -> None:
+        """서버 시작 후 콜백 주소 등록 (포트를 열 수 없으면 폴링만 사용)"""
+        app = web.Application()
+        app.router.add_post(self.path, self._handle_callback)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            logger.error(f"Failed to start MiniMax callback server on {self.host}:{self.port}: {e}")
+            await runner.cleanup()
+            return
+
+        self._runner = runner
+        set_callback_url(self.public_url)
+        logger.info(f"MiniMax callback server listening on {self.host}:{self.port}{self.path}")
+
+    async def stop(self) -> None:
+        """콜백 주소 해제 후 서버 종료"""
+        set_callback_url(None)
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_callback(self, request: web.Request) -> web.Response:
+        if not hmac.compare_digest(request.query.get("token", ""), self.secret):
+            self.rejected += 1
+            return web.json_response({"error": "forbidden"}, status=403)
+
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.json_response({"error": "invalid json"}, status=400)
+        if not isinstance(data, dict):
+            return web.json_response({"error": "invalid body"}, status=400)
+
+        # 주소 확인 요청 (3초 안에 같은 값을 돌려줘야 함)
+        if "challenge" in data:
+            return web.json_response({"challenge": data["challenge"]})
+
+        self.received += 1
+        task_id = str(data.get("task_id") or "")
+        if task_id and str(data.get("status", "")).lower() in _FINISHED_STATUSES:
+            # 알림으로만 사용 - 결과는 상태 조회 응답으로 확인
+            if video_poller.poke(task_id):
+                self.woken += 1
+                logger.info(f"Video task {task_id} callback received, querying status")
+        return web.json_response({"status": "ok"})
@@ -0,0 +1,328 @@
+"""
+사용자별 쿨다운 / 일일 제한 쿼터 엔진
+
+(사용자, 요청 타입)마다 GCRA(Generic Cell Rate Algorithm)의 TAT(Theoretical
+Arrival Time)와 일일 사용 횟수만 저장합니다. 모든 시각은 time.monotonic() 기준
+float 값이며, 사용자 상태는 dict 대신 array 기반 슬롯에 평탄하게 저장됩니다.
+허용 여부와 재시도까지 남은 시간은 모두 O(1)로 계산됩니다.
+
+모든 쿨다운이 끝나고 일일 윈도우도 지난 사용자는 해시 타이머 휠(sweep)로 제거되며,
+제거된 슬롯은 다음 신규 사용자에게 재사용됩니다.
+"""
+
+import heapq
+import time
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 일일 제한 윈도우 (24시간)
+DAILY_WINDOW = 86400.0
+
+# 거부 사유
+DENY_DAILY = "daily"
+DENY_COOLDOWN = "cooldown"
+
+# 아직 요청한 적 없는 타입의 TAT
+_NEVER = float("-inf")
+
+# 타이머 휠 한 칸의 길이 (초) - 휠 한 바퀴가 일일 윈도우를 덮도록 칸 수를 정함
+WHEEL_TICK = 60.0
+_WHEEL_SIZE = int(DAILY_WINDOW // WHEEL_TICK) + 1
+
+
+class QuotaEngine:
+    """GCRA 기반 쿼터 엔진 (쿨다운 = 버스트 1의 GCRA, 일일 제한 = 고정 윈도우 카운터)"""
+
+    __slots__ = (
+        "_kinds", "_cooldowns", "_daily_limits", "_width", "_clock",
+        "_slots", "_free", "_window_start", "_tat", "_counts",
+        "_wheel", "_wheel_tick", "evicted_total", "_dirty", "_removed",
+    )
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]],
+                 clock: Callable[[], float] = time.monotonic,
+                 track_changes: bool = False):
+        """
+        Args:
+            limits: {요청 타입: (쿨다운 초, 일일 제한)}
+            clock: 단조 증가 시계 함수
+            track_changes: 영속화를 위해 변경/제거된 사용자를 기록할지 여부
+        """
+        self._kinds: Dict[str, int] = {kind: i for i, kind in enumerate(limits)}
+        self._cooldowns = array("d", (float(c) for c, _ in limits.values()))
+        self._daily_limits = array("q", (int(d) for _, d in limits.values()))
+        self._width = len(self._kinds)
+        self._clock = clock
+
+        # user_id -> 슬롯 번호, 반납된 슬롯 목록
+        self._slots: Dict[int, int] = {}
+        self._free: list = []
+
+        # 슬롯별 상태: 일일 윈도우 시작, 타입별 TAT, 타입별 사용 횟수
+        self._window_start = array("d")
+        self._tat = array("d")
+        self._counts = array("q")
+
+        # 만료 예정 사용자 타이머 휠 (각 사용자는 항상 정확히 한 칸에 존재)
+        self._wheel: list = [[] for _ in range(_WHEEL_SIZE)]
+        self._wheel_tick = int(clock() // WHEEL_TICK)
+        self.evicted_total = 0
+
+        # 마지막 drain_changes() 이후 변경 / 제거된 사용자 (영속화용)
+        self._dirty: Optional[set] = set() if track_changes else None
+        self._removed: Optional[set] = set() if track_changes else None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._slots
+
+    def _allocate(self, user_id: int, now: float) -> int:
+        """사용자 슬롯 할당 (반납된 슬롯 우선 재사용)"""
+        width = self._width
+        if self._free:
+            slot = self._free.pop()
+            self._window_start[slot] = now
+            base = slot * width
+            for i in range(base, base + width):
+                self._tat[i] = _NEVER
+                self._counts[i] = 0
+        else:
+            slot = len(self._window_start)
+            self._window_start.append(now)
+            self._tat.extend([_NEVER] * width)
+            self._counts.extend([0] * width)
+        self._slots[user_id] = slot
+        self._schedule(user_id, now + DAILY_WINDOW)
+        return slot
+
+    def _schedule(self, user_id: int, expiry: float) -> None:
+        """만료 예정 시각이 속한 타이머 휠 칸에 사용자 등록"""
+        tick = max(int(expiry // WHEEL_TICK) + 1, self._wheel_tick + 1)
+        self._wheel[tick % _WHEEL_SIZE].append(user_id)
+
+    def _expiry(self, slot: int) -> float:
+        """일일 윈도우 종료와 모든 쿨다운 종료 중 늦은 시각"""
+        base = slot * self._width
+        return max(self._window_start[slot] + DAILY_WINDOW,
+                   max(self._tat[base:base + self._width]))
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        지난 타이머 휠 칸을 돌며 만료된 사용자 제거
+
+        아직 만료되지 않은 사용자(윈도우가 갱신되었거나 쿨다운 중)는
+        새 만료 시각의 칸으로 다시 등록합니다.
+
+        Returns:
+            이번에 제거된 사용자 수
+        """
+        if now is None:
+            now = self._clock()
+
+        target = int(now // WHEEL_TICK)
+        if target <= self._wheel_tick:
+            return 0
+
+        # 한 바퀴 이상 밀렸다면 모든 칸을 한 번씩만 처리
+        start = max(self._wheel_tick + 1, target - _WHEEL_SIZE + 1)
+        self._wheel_tick = target
+
+        evicted = 0
+        for tick in range(start, target + 1):
+            index = tick % _WHEEL_SIZE
+            bucket = self._wheel[index]
+            if not bucket:
+                continue
+            self._wheel[index] = []
+
+            for user_id in bucket:
+                slot = self._slots.get(user_id)
+                if slot is None:
+                    continue
+                expiry = self._expiry(slot)
+                if now > expiry:
+                    del self._slots[user_id]
+                    self._free.append(slot)
+                    evicted += 1
+                    if self._removed is not None:
+                        self._removed.add(user_id)
+                else:
+                    self._schedule(user_id, expiry)
+
+        self.evicted_total += evicted
+        return evicted
+
+    def acquire(self, user_id: int, kind: str,
+                now: Optional[float] = None) -> Tuple[bool, float, str]:
+        """
+        요청 허용 여부 확인 및 기록 (확인과 기록은 하나의 동기 구간에서 수행)
+
+        Returns:
+            (허용 여부, 재시도까지 남은 초, 거부 사유)
+        """
+        k = self._kinds[kind]
+        if now is None:
+            now = self._clock()
+
+        slot = self._slots.get(user_id)
+        if slot is None:
+            slot = self._allocate(user_id, now)
+
+        width = self._width
+        base = slot * width
+
+        # 일일 윈도우 초기화 (24시간 경과 시 모든 타입 횟수 리셋)
+        window_start = self._window_start[slot]
+        if now - window_start > DAILY_WINDOW:
+            window_start = now
+            self._window_start[slot] = now
+            for i in range(base, base + width):
+                self._counts[i] = 0
+            if self._dirty is not None:
+                self._dirty.add(user_id)
+
+        idx = base + k
+
+        # 일일 제한 확인
+        count = self._counts[idx]
+        if count >= self._daily_limits[k]:
+            return False, window_start + DAILY_WINDOW - now, DENY_DAILY
+
+        # 쿨다운 확인 (GCRA: now < TAT 이면 비적합)
+        tat = self._tat[idx]
+        if now < tat:
+            return False, tat - now, DENY_COOLDOWN
+
+        # 허용 및 기록
+        self._tat[idx] = now + self._cooldowns[k]
+        self._counts[idx] = count + 1
+        if self._dirty is not None:
+            self._dirty.add(user_id)
+        return True, 0.0, ""
+
+    def usage(self, user_id: int, now: Optional[float] = None) -> Optional[Dict[str, int]]:
+        """사용자의 현재 일일 윈도우 내 타입별 사용 횟수 (데이터가 없으면 None)"""
+        slot = self._slots.get(user_id)
+        if slot is None:
+            return None
+
+        if now is None:
+            now = self._clock()
+        if now - self._window_start[slot] > DAILY_WINDOW:
+            return {kind: 0 for kind in self._kinds}
+
+        base = slot * self._width
+        return {kind: self._counts[base + k] for kind, k in self._kinds.items()}
+
+    def top_users(self, n: int, now: Optional[float] = None) -> List[Tuple[int, Dict[str, int]]]:
+        """현재 일일 윈도우 사용 횟수 합이 가장 많은 사용자 n명과 타입별 사용 횟수"""
+        if now is None:
+            now = self._clock()
+
+        width = self._width
+        counts = self._counts
+        window_start = self._window_start
+
+        def total(item):
+            _, slot = item
+            if now - window_start[slot] > DAILY_WINDOW:
+                return 0
+            base = slot * width
+            return sum(counts[base:base + width])
+
+        top = heapq.nlargest(n, self._slots.items(), key=total)
+        return [(user_id, self.usage(user_id, now)) for user_id, slot in top if total((user_id, slot))]
+
+    def export(self, user_id: int) -> Optional[Tuple[float, Dict[str, Tuple[float, int]]]]:
+        """사용자 상태 내보내기: (윈도우 시작, {요청 타입: (TAT, 사용 횟수)})"""
+        slot = self._slots.get(user_id)
+        if slot is None:
+            return None
+
+        base = slot * self._width
+        return self._window_start[slot], {
+            kind: (self._tat[base + k], self._counts[base + k])
+            for kind, k in self._kinds.items()
+        }
+
+    def restore(self, user_id: int, window_start: float,
+                state: Dict[str, Tuple[float, int]], now: Optional[float] = None) -> bool:
+        """
+        저장된 사용자 상태 복원 (이미 메모리에 있거나 이미 만료된 상태는 무시)
+
+        Returns:
+            복원 여부
+        """
+        if user_id in self._slots:
+            return False
+
+        if now is None:
+            now = self._clock()
+        latest_tat = max((tat for tat, _ in state.values()), default=_NEVER)
+        if now - window_start > DAILY_WINDOW and now >= latest_tat:
+            return False
+
+        slot = self._allocate(user_id, window_start)
+        base = slot * self._width
+        for kind, (tat, count) in state.items():
+            k = self._kinds.get(kind)
+            if k is None:
+                continue
+            self._tat[base + k] = tat
+            self._counts[base + k] = count
+        return True
+
+    def merge(self, user_id: int, window_start: float,
+              state: Dict[str, Tuple[float, int]], now: Optional[float] = None) -> bool:
+        """
+        저장된 상태를 늦게 불러왔을 때 이미 메모리에서 허용한 기록과 합치기
+
+        저장소 조회가 제한 시간 안에 끝나지 않아 메모리에서 먼저 허용한 사용자용입니다.
+        메모리에 없으면 restore()와 같고, 있으면 타입별로 늦은 TAT를 쓰고
+        저장된 윈도우가 아직 유효하면 그 윈도우 시작과 두 사용 횟수의 합을 씁니다.
+        (그 사이 메모리에서 허용한 요청만큼은 일일 제한을 넘을 수 있음)
+
+        Returns:
+            상태가 바뀌었는지 여부
+        """
+        if user_id not in self._slots:
+            return self.restore(user_id, window_start, state, now)
+
+        if now is None:
+            now = self._clock()
+        slot = self._slots[user_id]
+        base = slot * self._width
+        window_live = now - window_start <= DAILY_WINDOW
+        if window_live:
+            # 메모리 윈도우는 재시작 후 첫 요청에서 시작했으므로 저장된 윈도우 안에 있음
+            self._window_start[slot] = window_start
+        for kind, (tat, count) in state.items():
+            k = self._kinds.get(kind)
+            if k is None:
+                continue
+            self._tat[base + k] = max(self._tat[base + k], tat)
+            if window_live:
+                self._counts[base + k] += count
+        if self._dirty is not None:
+            self._dirty.add(user_id)
+        return True
+
+    def mark_changed(self, dirty: Iterable[int], removed: Iterable[int] = ()) -> None:
+        """drain_changes()로 꺼낸 변경분을 다시 기록 (저장 실패 / 저장 보류 시)"""
+        if self._dirty is None:
+            return
+        self._dirty.update(dirty)
+        self._removed.update(removed)
+
+    def drain_changes(self) -> Tuple[set, set]:
+        """마지막 호출 이후 변경된 사용자와 제거된 사용자 반환 후 초기화"""
+        if self._dirty is None:
+            return set(), set()
+
+        changed = self._dirty | self._removed
+        self._dirty, self._removed = set(), set()
+        # 현재 메모리에 있는 사용자는 갱신, 없는 사용자는 삭제 대상
+        dirty = {user_id for user_id in changed if user_id in self._slots}
+        return dirty, changed - dirty
@@ -0,0 +1,120 @@
+"""
+쿼터 상태 영속화 저장소 (SQLite WAL)
+
+컨테이너 재시작 후에도 일일 사용 횟수와 쿨다운이 유지되도록 QuotaEngine 상태를
+SQLite에 저장합니다. 모든 디스크 작업은 전용 스레드 하나에서 직렬로 실행되며,
+이벤트 루프에서는 run_in_executor로만 호출합니다.
+
+메모리의 시각은 time.monotonic() 기준이므로 저장 시 벽시계(time.time())로,
+불러올 때 다시 monotonic 기준으로 변환합니다.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (윈도우 시작, {요청 타입: (TAT, 사용 횟수)})
+QuotaRecord = Tuple[float, Dict[str, Tuple[float, int]]]
+
+# 한 번에 조회할 최대 사용자 수 (SQLite 바인드 변수 수 제한 이내)
+LOAD_BATCH_SIZE = 500
+
+
+def _wall_offset() -> float:
+    """monotonic 시각을 벽시계 시각으로 바꾸기 위한 오프셋"""
+    return time.time() - time.monotonic()
+
+
+class QuotaStore:
+    """사용자별 쿼터 상태 SQLite 저장소"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        # 연결은 이 스레드에서만 사용
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quota-store")
+
+    def open(self) -> None:
+        """데이터베이스 열기 및 테이블 생성 (전용 스레드에서 호출, 실패 시 영속화 없이 동작)"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS quota_state ("
+                " user_id INTEGER PRIMARY KEY,"
+                " window_start REAL NOT NULL,"
+                " state TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+            logger.info(f"Quota store opened: {self.path}")
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Failed to open quota store {self.path}: {e}")
+
+    def load(self, user_id: int) -> Optional[QuotaRecord]:
+        """사용자 한 명의 상태 조회 (기본 키 단건 조회)"""
+        return self.load_many([user_id]).get(user_id)
+
+    def load_many(self, user_ids: List[int]) -> Dict[int, QuotaRecord]:
+        """여러 사용자의 상태를 묶어서 조회 (저장된 상태가 없는 사용자는 결과에 없음)"""
+        if self._conn is None:
+            return {}
+
+        offset = _wall_offset()
+        records: Dict[int, QuotaRecord] = {}
+        for i in range(0, len(user_ids), LOAD_BATCH_SIZE):
+            chunk = user_ids[i:i + LOAD_BATCH_SIZE]
+            rows = self._conn.execute(
+                "SELECT user_id, window_start, state FROM quota_state"
+                f" WHERE user_id IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for user_id, window_start, state_json in rows:
+                state = {
+                    kind: (float("-inf") if tat is None else tat - offset, count)
+                    for kind, (tat, count) in json.loads(state_json).items()
+                }
+                records[user_id] = (window_start - offset, state)
+        return records
+
+    def write_batch(self, records: Dict[int, QuotaRecord], deleted: Iterable[int]) -> None:
+        """변경된 사용자 상태를 하나의 트랜잭션으로 저장"""
+        if self._conn is None:
+            return
+
+        offset = _wall_offset()
+        now = time.time()
+        rows = []
+        for user_id, (window_start, state) in records.items():
+            state_wall = {
+                kind: (None if tat == float("-inf") else tat + offset, count)
+                for kind, (tat, count) in state.items()
+            }
+            rows.append((user_id, window_start + offset, json.dumps(state_wall), now))
+
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM quota_state WHERE user_id = ?", [(user_id,) for user_id in deleted]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO quota_state (user_id, window_start, state, updated_at)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def close(self) -> None:
+        """데이터베이스 닫기 (전용 스레드에서 호출)"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -1,8 +1,16 @@
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, Tuple, Optional, Callable, Any
+import functools
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Set, Tuple, Optional, Callable, Any
 import logging
-from env_manager import get_env_int
+from env_manager import get_env, get_env_int
+from quota_engine import QuotaEngine, DENY_DAILY, WHEEL_TICK
+from quota_store import QuotaStore
+from request_scheduler import FairScheduler
+from concurrency_limiter import AdaptiveLimiter, report_overload
+from worker_pool import WorkerPool
+from metrics import latency_metrics, provider_metrics, STAGE_QUEUE_WAIT
 from dataclasses import dataclass
 from enum import Enum
 
@@ -16,6 +24,30 @@ CHAT_COOLDOWN = get_env_int("CHAT_COOLDOWN", 3)
 IMAGE_COOLDOWN = get_env_int("IMAGE_COOLDOWN", 3)
 VIDEO_COOLDOWN = get_env_int("VIDEO_COOLDOWN", 10)
 
+# 쿼터 영속화 설정 (경로를 비우면 비활성화)
+QUOTA_DB_PATH = get_env("QUOTA_DB_PATH", "logs/quota.db")
+QUOTA_FLUSH_INTERVAL = get_env_int("QUOTA_FLUSH_INTERVAL", 5)
+# 재시작 후 처음 보는 사용자의 저장된 상태를 기다리는 최대 시간 (밀리초)
+QUOTA_LOAD_TIMEOUT_MS = get_env_int("QUOTA_LOAD_TIMEOUT_MS", 500)
+
+# 적응형 동시성 한도 상한
+CHAT_CONCURRENCY_MAX = get_env_int("CHAT_CONCURRENCY_MAX", 40)
+IMAGE_CONCURRENCY_MAX = get_env_int("IMAGE_CONCURRENCY_MAX", 20)
+VIDEO_CONCURRENCY_MAX = get_env_int("VIDEO_CONCURRENCY_MAX", 4)
+
+# 작업자 풀 설정 (최대 작업자 수 = 동시성 한도)
+CHAT_WORKERS_MIN = get_env_int("CHAT_WORKERS_MIN", 1)
+IMAGE_WORKERS_MIN = get_env_int("IMAGE_WORKERS_MIN", 1)
+VIDEO_WORKERS_MIN = get_env_int("VIDEO_WORKERS_MIN", 1)
+WORKER_IDLE_TIMEOUT = get_env_int("WORKER_IDLE_TIMEOUT", 60)
+
+# Discord 인터랙션 후속 메시지 토큰 유효 시간과 결과 전달에 남겨 둘 여유 (초)
+INTERACTION_TOKEN_TTL = 15 * 60
+DELIVERY_MARGIN = 30
+
+# 예상 대기 시간이 이 값(초) 이상일 때만 대기열 순서 안내
+QUEUE_NOTICE_THRESHOLD = 3
+
 class RequestType(Enum):
     CHAT = "chat"
     IMAGE = "image"
@@ -30,38 +62,64 @@ class QueuedRequest:
     kwargs: dict
     created_at: datetime
     priority: int = 1  # 1=highest, 5=lowest
+    guild_id: Optional[int] = None  # 공정 분배 단위 (DM은 None)
+    deadline: Optional[float] = None  # 결과를 전달할 수 있는 마지막 시각 (monotonic)
+    enqueued_at: float = 0.0  # 큐 진입 시각 (monotonic)
+    seq: int = 0  # 큐 진입 순번
+    queue_position: int = 0  # 큐 진입 시점의 예상 대기 순서
+    eta: Optional[float] = None  # 큐 진입 시점의 예상 대기 시간 (초)
+    done: Optional[asyncio.Future] = None  # 핸들러를 실행했으면 True, 마감 초과로 제외했으면 False
+
+def interaction_deadline(interaction) -> Optional[float]:
+    """인터랙션 토큰 만료 전에 결과를 전달해야 하는 마감 시각 (monotonic)"""
+    created_at = getattr(interaction, 'created_at', None)
+    if created_at is None:
+        return None
+    
+    expires_at = created_at + timedelta(seconds=INTERACTION_TOKEN_TTL)
+    remaining = (expires_at - datetime.now(timezone.utc)).total_seconds() - DELIVERY_MARGIN
+    return time.monotonic() + remaining
 
 class EnhancedRequestManager:
     """향상된 요청 관리자 - 큐 시스템과 동시성 제어 + Docker 최적화"""
     
     def __init__(self):
-        # 기존 기능
-        self.user_cooldowns: Dict[int, Dict[str, datetime]] = {}
-        self.user_daily_counts: Dict[int, Dict[str, int]] = {}
-        self.user_daily_reset: Dict[int, datetime] = {}
-        self.lock = asyncio.Lock()
-        
-        # 새로운 큐 시스템
-        self.request_queues: Dict[RequestType, asyncio.Queue] = {
-            RequestType.CHAT: asyncio.Queue(maxsize=100),
-            RequestType.IMAGE: asyncio.Queue(maxsize=50),
-            RequestType.VIDEO: asyncio.Queue(maxsize=20)
+        # 새로운 큐 시스템 (우선순위 클래스 / 길드 / 사용자 공정 분배)
+        self.request_queues: Dict[RequestType, FairScheduler] = {
+            RequestType.CHAT: FairScheduler(maxsize=100),
+            RequestType.IMAGE: FairScheduler(maxsize=50),
+            RequestType.VIDEO: FairScheduler(maxsize=20)
         }
         
-        # 동시성 제어
-        self.concurrency_limits = {
-            RequestType.CHAT: asyncio.Semaphore(10),    # 동시 10개 채팅
-            RequestType.IMAGE: asyncio.Semaphore(5),    # 동시 5개 이미지
-            RequestType.VIDEO: asyncio.Semaphore(2)     # 동시 2개 비디오
+        # 동시성 제어 (지연 / 429 / 타임아웃에 따라 한도를 자동 조정)
+        self.concurrency_limits: Dict[RequestType, AdaptiveLimiter] = {
+            RequestType.CHAT: AdaptiveLimiter(10, max_limit=CHAT_CONCURRENCY_MAX),    # 초기 동시 10개 채팅
+            RequestType.IMAGE: AdaptiveLimiter(5, max_limit=IMAGE_CONCURRENCY_MAX),   # 초기 동시 5개 이미지
+            RequestType.VIDEO: AdaptiveLimiter(2, max_limit=VIDEO_CONCURRENCY_MAX)    # 초기 동시 2개 비디오
         }
         
-        # 작업자 태스크들
-        self.worker_tasks: Dict[RequestType, list] = {
-            RequestType.CHAT: [],
-            RequestType.IMAGE: [],
-            RequestType.VIDEO: []
+        # 작업자 풀 (대기열 길이와 처리 시간에 따라 자동 확장 / 축소)
+        worker_bounds = {
+            RequestType.CHAT: (CHAT_WORKERS_MIN, CHAT_CONCURRENCY_MAX),
+            RequestType.IMAGE: (IMAGE_WORKERS_MIN, IMAGE_CONCURRENCY_MAX),
+            RequestType.VIDEO: (VIDEO_WORKERS_MIN, VIDEO_CONCURRENCY_MAX)
+        }
+        self.worker_pools: Dict[RequestType, WorkerPool] = {
+            request_type: WorkerPool(
+                request_type.value,
+                self.request_queues[request_type],
+                self.concurrency_limits[request_type],
+                functools.partial(self._process_request, request_type),
+                min_workers=min_workers,
+                max_workers=max_workers,
+                idle_timeout=WORKER_IDLE_TIMEOUT
+            )
+            for request_type, (min_workers, max_workers) in worker_bounds.items()
         }
         
+        # 작업자 외 백그라운드 태스크들 (통계 수집, 쿼터 정리)
+        self.background_tasks: list = []
+        
         # 레이트 리미트 설정 (환경 변수에서 로드)
         self.rate_limits = {
             'chat': {'cooldown': CHAT_COOLDOWN, 'daily_limit': CHAT_DAILY_LIMIT},
@@ -69,10 +127,25 @@ class EnhancedRequestManager:
             'video': {'cooldown': VIDEO_COOLDOWN, 'daily_limit': VIDEO_DAILY_LIMIT}
         }
         
+        # 쿨다운 / 일일 제한 쿼터 엔진 + 영속화 저장소 (write-behind)
+        self.quota_store: Optional[QuotaStore] = QuotaStore(QUOTA_DB_PATH) if QUOTA_DB_PATH else None
+        self.quota = QuotaEngine({
+            request_type: (limit_info['cooldown'], limit_info['daily_limit'])
+            for request_type, limit_info in self.rate_limits.items()
+        }, track_changes=self.quota_store is not None)
+        
+        # 저장된 상태를 불러올 사용자 (모아서 한 번에 조회) / 조회 중인 사용자 / 조회 완료 대기
+        self._quota_pending: Set[int] = set()
+        self._quota_loading: Set[int] = set()
+        self._quota_waiters: Dict[int, asyncio.Future] = {}
+        self._quota_loader: Optional[asyncio.Task] = None
+        
         # 통계
         self.stats = {
             'processed': 0,
             'failed': 0,
+            'shed': 0,
+            'quota_load_timeouts': 0,
             'queue_sizes': {},
             'active_workers': 0
         }
@@ -81,132 +154,325 @@ class EnhancedRequestManager:
 
     async def can_make_request(self, user_id: int, request_type: str) -> Tuple[bool, str]:
         """사용자가 요청을 할 수 있는지 확인"""
-        async with self.lock:
-            current_time = datetime.now()
-            
-            # 사용자 데이터 초기화
-            if user_id not in self.user_cooldowns:
-                self.user_cooldowns[user_id] = {}
-                self.user_daily_counts[user_id] = {}
-                self.user_daily_reset[user_id] = current_time
-            
-            # 일일 제한 초기화 확인 (24시간마다)
-            if current_time - self.user_daily_reset[user_id] > timedelta(days=1):
-                self.user_daily_counts[user_id] = {}
-                self.user_daily_reset[user_id] = current_time
-            
-            # 일일 제한 확인
-            daily_count = self.user_daily_counts[user_id].get(request_type, 0)
-            if daily_count >= self.rate_limits[request_type]['daily_limit']:
-                return False, "일일 사용 제한에 도달했습니다. 내일 다시 시도해주세요."
-            
-            # 쿨다운 확인
-            last_request = self.user_cooldowns[user_id].get(request_type)
-            if last_request:
-                time_diff = (current_time - last_request).total_seconds()
-                cooldown = self.rate_limits[request_type]['cooldown']
-                if time_diff < cooldown:
-                    remaining = cooldown - int(time_diff)
-                    return False, f"재사용까지 {remaining}초 남았습니다."
-            
-            # 요청 허용 및 정보 업데이트
-            self.user_cooldowns[user_id][request_type] = current_time
-            self.user_daily_counts[user_id][request_type] = daily_count + 1
+        # 재시작 후 처음 보는 사용자는 저장된 쿨다운 / 일일 사용량을 합친 뒤 판단
+        # (같은 이벤트 루프 한 바퀴에 들어온 사용자를 묶어서 조회하고 최대 QUOTA_LOAD_TIMEOUT_MS만 기다림)
+        if self.quota_store is not None and user_id not in self.quota:
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(self._schedule_quota_load(user_id)), QUOTA_LOAD_TIMEOUT_MS / 1000
+                )
+            except asyncio.TimeoutError:
+                # 저장소가 느리면 메모리에서 판단하고 불러온 상태는 도착하는 대로 합침
+                self.stats['quota_load_timeouts'] += 1
+                logger.warning(f"Quota state for user {user_id} not loaded within {QUOTA_LOAD_TIMEOUT_MS}ms")
+        
+        # 확인과 기록은 await 없이 quota.acquire 한 번에 끝나므로 이벤트 루프 안에서
+        # 원자적으로 실행됨 - 전역 락 없이 모든 사용자의 허용 판단을 병렬로 처리
+        allowed, retry_after, reason = self.quota.acquire(user_id, request_type)
+        
+        if allowed:
             return True, ""
+        
+        # 일일 제한 초과
+        if reason == DENY_DAILY:
+            return False, "일일 사용 제한에 도달했습니다. 내일 다시 시도해주세요."
+        
+        # 쿨다운 중 (경과 시간의 정수 부분 기준으로 남은 초 표시)
+        cooldown = self.rate_limits[request_type]['cooldown']
+        remaining = cooldown - int(cooldown - retry_after)
+        return False, f"재사용까지 {remaining}초 남았습니다."
+
+    def _schedule_quota_load(self, user_id: int) -> asyncio.Future:
+        """
+        저장된 상태 조회 예약 (이벤트 루프가 한 바퀴 도는 동안 들어온 사용자를 묶어서 조회)
+
+        Returns:
+            그 사용자의 상태를 합치면 (조회에 실패해도) 완료되는 Future
+        """
+        waiter = self._quota_waiters.get(user_id)
+        if waiter is not None:
+            # 같은 사용자의 요청이 조회를 기다리는 중
+            return waiter
+        waiter = self._quota_waiters[user_id] = asyncio.get_running_loop().create_future()
+        self._quota_pending.add(user_id)
+        self._quota_loading.add(user_id)
+        if self._quota_loader is None or self._quota_loader.done():
+            self._quota_loader = asyncio.ensure_future(self._load_quota_states())
+        return waiter
+
+    async def _load_quota_states(self) -> None:
+        """예약된 사용자 상태를 저장소 스레드에서 묶어서 조회한 뒤 메모리 상태와 합침"""
+        loop = asyncio.get_running_loop()
+        while self._quota_pending:
+            user_ids, self._quota_pending = self._quota_pending, set()
+            try:
+                records = await loop.run_in_executor(
+                    self.quota_store.executor, self.quota_store.load_many, list(user_ids)
+                )
+                for user_id, record in records.items():
+                    self.quota.merge(user_id, *record)
+            except Exception as e:
+                logger.error(f"Failed to load quota state for {len(user_ids)} users: {e}")
+            finally:
+                self._quota_loading -= user_ids
+                for user_id in user_ids:
+                    waiter = self._quota_waiters.pop(user_id, None)
+                    if waiter is not None and not waiter.done():
+                        waiter.set_result(None)
+
+    async def _flush_quota_state(self) -> None:
+        """변경된 쿼터 상태를 모아서 저장소 스레드에서 한 번에 기록"""
+        dirty, removed = self.quota.drain_changes()
+        
+        # 저장된 상태를 아직 합치지 않은 사용자는 덮어쓰지 않도록 다음 저장으로 미룸
+        deferred = dirty & self._quota_loading
+        if deferred:
+            dirty -= deferred
+            self.quota.mark_changed(deferred)
+        if not dirty and not removed:
+            return
+        
+        # 스냅샷은 이벤트 루프에서 만들고 디스크 쓰기만 저장소 스레드로 넘김
+        records = {user_id: self.quota.export(user_id) for user_id in dirty}
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                self.quota_store.executor, self.quota_store.write_batch, records, removed
+            )
+        except Exception:
+            # 쓰기에 실패한 변경분은 다음 저장 때 다시 기록
+            self.quota.mark_changed(dirty, removed)
+            raise
+
+    async def _quota_flusher(self):
+        """주기적으로 쿼터 상태 일괄 저장"""
+        while True:
+            try:
+                await asyncio.sleep(QUOTA_FLUSH_INTERVAL)
+                await self._flush_quota_state()
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Quota flusher error: {e}")
 
     async def queue_request(self, user_id: int, request_type: RequestType, 
-                          handler: Callable, *args, **kwargs) -> bool:
-        """요청을 큐에 추가"""
+                          handler: Callable, *args, priority: int = 1,
+                          guild_id: Optional[int] = None, deadline: Optional[float] = None,
+                          **kwargs) -> Optional[QueuedRequest]:
+        """요청을 큐에 추가 (성공 시 예상 대기 순서 / 시간이 담긴 요청 반환, 실패 시 None)"""
         try:
+            interaction = kwargs.get('interaction')
+            
+            # 길드가 지정되지 않았으면 인터랙션에서 가져옴
+            if guild_id is None:
+                guild_id = getattr(interaction, 'guild_id', None)
+            
+            # 마감 시각이 지정되지 않았으면 인터랙션 토큰 만료 기준으로 설정
+            if deadline is None:
+                deadline = interaction_deadline(interaction)
+            
             request = QueuedRequest(
                 user_id=user_id,
                 request_type=request_type,
                 handler=handler,
                 args=args,
                 kwargs=kwargs,
-                created_at=datetime.now()
+                created_at=datetime.now(),
+                priority=priority,
+                guild_id=guild_id,
+                deadline=deadline,
+                done=asyncio.get_running_loop().create_future()
             )
             
             # 큐에 추가 (논블로킹)
             queue = self.request_queues[request_type]
             if queue.full():
                 logger.warning(f"Queue for {request_type.value} is full, dropping request")
-                return False
+                return None
             
-            await queue.put(request)
-            logger.info(f"Queued {request_type.value} request for user {user_id}")
-            return True
+            request.queue_position, request.eta = self.estimate_wait(request_type)
+            queue.put_nowait(request)
+            self.worker_pools[request_type].scale()
+            logger.info(f"Queued {request_type.value} request for user {user_id} "
+                        f"(position {request.queue_position}, eta {request.eta})")
+            return request
             
         except Exception as e:
             logger.error(f"Failed to queue request: {e}")
-            return False
+            return None
 
-    async def _process_queue_worker(self, request_type: RequestType, worker_id: int):
-        """큐 처리 작업자"""
-        queue = self.request_queues[request_type]
-        semaphore = self.concurrency_limits[request_type]
+    def priority_for(self, user_id: int, request_type: RequestType, regenerate: bool = False) -> int:
+        """
+        요청 우선순위 클래스 (1=최고, 5=최저)
         
-        logger.info(f"Started {request_type.value} worker {worker_id}")
+        오늘 그 타입을 적게 쓴 사용자일수록 먼저 처리합니다 (일일 제한 대비 사용량 25%마다 한 단계).
+        이미 결과를 받은 요청을 다시 만드는 경우(새로 생성 버튼)는 한 단계 낮춥니다.
+        """
+        usage = self.quota.usage(user_id) or {}
+        daily_limit = self.rate_limits[request_type.value]['daily_limit']
+        share = usage.get(request_type.value, 0) / daily_limit if daily_limit > 0 else 0.0
+        priority = 1 + min(3, int(share * 4))
+        return min(5, priority + 1) if regenerate else priority
+
+    async def submit_interaction(self, interaction, request_type: RequestType, handler: Callable,
+                                 *args, priority: int = 1, **kwargs) -> Optional[QueuedRequest]:
+        """
+        명령어 요청을 큐에 추가하고 대기 상황 안내 (첫 응답을 보낸 인터랙션 - 안내는 후속 메시지)
         
-        while True:
+        핸들러는 interaction 키워드 인자와 함께 작업자에서 실행되며 실패 안내는 핸들러가 직접 보냅니다.
+        큐가 가득 차면 바쁘다고 안내하고 None을, 대기가 길어지면 순서와 예상 대기 시간을 안내합니다.
+        """
+        request = await self.queue_request(
+            interaction.user.id, request_type, handler, *args,
+            priority=priority, interaction=interaction, **kwargs
+        )
+        
+        if request is None:
+            notice = "⚠️ 서버가 바쁩니다. 잠시 후 다시 시도해주세요."
+        elif request.eta is not None and request.eta >= QUEUE_NOTICE_THRESHOLD:
+            notice = f"⏳ 대기열 {request.queue_position}번째 · 예상 대기 약 {int(request.eta)}초"
+        else:
+            return request
+        try:
+            await interaction.followup.send(notice, ephemeral=True)
+        except Exception as e:
+            logger.error(f"Failed to send queue notice: {e}")
+        return request
+
+    def estimate_wait(self, request_type: RequestType) -> Tuple[int, Optional[float]]:
+        """
+        지금 큐에 넣을 요청의 예상 대기 순서와 대기 시간 (측정된 처리 시간 기준)
+        
+        Returns:
+            (대기 순서, 예상 대기 초 - 처리 시간 측정 전이면 None)
+        """
+        pool = self.worker_pools[request_type]
+        ahead = self.request_queues[request_type].qsize()
+        servers = max(1, min(pool.max_workers, self.concurrency_limits[request_type].current_limit))
+        
+        if pool.service_time is None:
+            return ahead + 1, None
+        
+        # 앞선 요청과 처리 중인 요청이 모두 빠져야 시작 가능
+        waves = (ahead + pool.busy) // servers
+        return ahead + 1, round(waves * pool.service_time, 1)
+
+    async def _process_request(self, request_type: RequestType, request: QueuedRequest) -> bool:
+        """
+        큐에서 꺼낸 요청 하나 처리 (작업자 풀에서 호출)
+        
+        Returns:
+            핸들러를 실행했으면 True, 마감 초과로 제외했으면 False (처리 시간 측정에서 제외)
+        """
+        latency_metrics.observe(request_type.value, STAGE_QUEUE_WAIT, time.monotonic() - request.enqueued_at)
+        
+        # 마감 전에 끝낼 수 없는 요청은 업스트림 호출 전에 제외
+        if self._should_shed(request_type, request):
+            await self._shed_request(request)
+            return False
+        
+        served = False
+        try:
+            served = await self._run_request(request_type, request)
+        finally:
+            # 요청을 넣은 쪽에 결과 알림 (작업자가 취소되어도)
+            if request.done is not None and not request.done.done():
+                request.done.set_result(served)
+        return served
+
+    async def _run_request(self, request_type: RequestType, request: QueuedRequest) -> bool:
+        """동시성 슬롯 안에서 핸들러 실행 (슬롯을 기다리는 동안 마감이 지나면 제외)"""
+        limiter = self.concurrency_limits[request_type]
+        
+        # 동시성 제어
+        async with limiter.slot() as slot:
+            # 슬롯을 기다리는 동안 마감이 지났을 수 있으므로 한 번 더 확인
+            if self._should_shed(request_type, request):
+                slot.discard = True
+                await self._shed_request(request)
+                return False
+            
+            self.stats['active_workers'] += 1
             try:
-                # 큐에서 요청 가져오기
-                request = await queue.get()
+                # 요청 처리
+                await request.handler(*request.args, **request.kwargs)
+                self.stats['processed'] += 1
                 
-                # 동시성 제어
-                async with semaphore:
-                    self.stats['active_workers'] += 1
-                    try:
-                        # 요청 처리
-                        await request.handler(*request.args, **request.kwargs)
-                        self.stats['processed'] += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Request processing failed: {e}")
-                        self.stats['failed'] += 1
-                        
-                    finally:
-                        self.stats['active_workers'] -= 1
-                        queue.task_done()
-                        
-            except asyncio.CancelledError:
-                logger.info(f"{request_type.value} worker {worker_id} cancelled")
-                break
             except Exception as e:
-                logger.error(f"Worker error: {e}")
-                await asyncio.sleep(1)
+                logger.error(f"Request processing failed: {e}")
+                self.stats['failed'] += 1
+                if isinstance(e, asyncio.TimeoutError):
+                    report_overload()
+                
+            finally:
+                self.stats['active_workers'] -= 1
+        return True
+
+    def _should_shed(self, request_type: RequestType, request: QueuedRequest) -> bool:
+        """예상 처리 시간을 더해도 마감 안에 끝낼 수 없는지 확인"""
+        if request.deadline is None:
+            return False
+        expected = self.worker_pools[request_type].service_time or 0.0
+        return time.monotonic() + expected > request.deadline
+
+    async def _shed_request(self, request: QueuedRequest) -> None:
+        """마감 초과 요청 제외 및 (토큰이 아직 유효하면) 사용자에게 안내"""
+        self.stats['shed'] += 1
+        if request.done is not None and not request.done.done():
+            request.done.set_result(False)
+        logger.warning(f"Shedding {request.request_type.value} request for user {request.user_id} "
+                       f"(waited {time.monotonic() - request.enqueued_at:.1f}s)")
+        
+        interaction = request.kwargs.get('interaction')
+        if interaction is None or time.monotonic() > request.deadline + DELIVERY_MARGIN:
+            return
+        try:
+            await interaction.followup.send(
+                "⏰ 대기 시간이 길어져 요청을 처리하지 못했습니다. 잠시 후 다시 시도해주세요.",
+                ephemeral=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to notify shed request: {e}")
 
     def start_queue_processor(self, bot) -> None:
-        """큐 프로세서 시작 - 각 타입별로 여러 작업자 생성"""
-        worker_counts = {
-            RequestType.CHAT: 3,    # 채팅 작업자 3개
-            RequestType.IMAGE: 2,   # 이미지 작업자 2개  
-            RequestType.VIDEO: 1    # 비디오 작업자 1개
-        }
+        """큐 프로세서 시작 - 타입별 작업자 풀 시작 (최소 작업자부터, 부하에 따라 확장)"""
+        for pool in self.worker_pools.values():
+            pool.start()
         
-        for request_type, count in worker_counts.items():
-            for i in range(count):
-                task = asyncio.create_task(
-                    self._process_queue_worker(request_type, i + 1)
-                )
-                self.worker_tasks[request_type].append(task)
+        # 통계 수집 / 유휴 사용자 정리 태스크
+        self.background_tasks.append(asyncio.create_task(self._stats_collector()))
+        self.background_tasks.append(asyncio.create_task(self._quota_sweeper()))
         
-        # 통계 수집 태스크
-        asyncio.create_task(self._stats_collector())
+        # 쿼터 저장소 열기 (저장소 스레드는 순서대로 실행되므로 이후 조회/쓰기는 열린 뒤에 처리됨)
+        if self.quota_store is not None:
+            asyncio.get_running_loop().run_in_executor(self.quota_store.executor, self.quota_store.open)
+            self.background_tasks.append(asyncio.create_task(self._quota_flusher()))
         
-        logger.info("Enhanced queue processor started with multiple workers")
+        logger.info("Enhanced queue processor started with autoscaling worker pools")
 
     async def _stats_collector(self):
         """통계 수집"""
+        ticks = 0
         while True:
             try:
-                # 큐 크기 업데이트
+                # 큐 크기 업데이트 및 작업자 수 재조정 (한도 변화 반영)
                 for req_type, queue in self.request_queues.items():
                     self.stats['queue_sizes'][req_type.value] = queue.qsize()
+                    self.worker_pools[req_type].scale()
                 
-                # 1분마다 통계 로그
-                if self.stats['processed'] % 10 == 0:
-                    logger.info(f"Stats: {self.stats}")
+                # 1분마다 통계 로그 (처리 건수와 무관하게 주기적으로)
+                ticks += 1
+                if ticks % 2 == 0:
+                    logger.info(f"Stats: processed={self.stats['processed']} failed={self.stats['failed']} "
+                                f"shed={self.stats['shed']} queues={self.stats['queue_sizes']}")
+                    for req_type, stages in latency_metrics.snapshot().items():
+                        summary = ", ".join(
+                            f"{stage} p50={w['p50']} p95={w['p95']} p99={w['p99']} (n={w['count']})"
+                            for stage, w in stages.items() if w['count']
+                        )
+                        if summary:
+                            logger.info(f"Latency [{req_type}]: {summary}")
                 
                 await asyncio.sleep(30)  # 30초마다 수집
                 
@@ -215,17 +481,44 @@ class EnhancedRequestManager:
             except Exception as e:
                 logger.error(f"Stats collector error: {e}")
 
+    async def _quota_sweeper(self):
+        """쿨다운과 일일 윈도우가 모두 끝난 사용자 상태 정리"""
+        while True:
+            try:
+                await asyncio.sleep(WHEEL_TICK)
+                evicted = self.quota.sweep()
+                if evicted:
+                    logger.info(f"Evicted {evicted} idle users from quota state ({len(self.quota)} live)")
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Quota sweeper error: {e}")
+
     async def stop_queue_processor(self) -> None:
         """큐 프로세서 중지"""
         logger.info("Stopping queue processor...")
         
-        # 모든 작업자 태스크 취소
-        for request_type, tasks in self.worker_tasks.items():
-            for task in tasks:
-                task.cancel()
-            
-            # 취소 완료 대기
-            await asyncio.gather(*tasks, return_exceptions=True)
+        # 모든 작업자 풀 중지 (취소 완료까지 대기)
+        for pool in self.worker_pools.values():
+            await pool.stop()
+        
+        for task in self.background_tasks:
+            task.cancel()
+        await asyncio.gather(*self.background_tasks, return_exceptions=True)
+        self.background_tasks.clear()
+        
+        # 남은 쿼터 변경분 저장 후 저장소 닫기 (불러오는 중인 상태를 먼저 합친 뒤)
+        if self.quota_store is not None:
+            if self._quota_loader is not None:
+                await asyncio.gather(self._quota_loader, return_exceptions=True)
+            try:
+                await self._flush_quota_state()
+            except Exception as e:
+                logger.error(f"Final quota flush failed: {e}")
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.quota_store.executor, self.quota_store.close)
+            self.quota_store.executor.shutdown(wait=False)
             
         logger.info("Queue processor stopped")
 
@@ -236,19 +529,32 @@ class EnhancedRequestManager:
                           for req_type, queue in self.request_queues.items()},
             'processed_total': self.stats['processed'],
             'failed_total': self.stats['failed'],
+            'shed_total': self.stats['shed'],
             'active_workers': self.stats['active_workers'],
-            'concurrency_limits': {req_type.value: sem._value 
-                                 for req_type, sem in self.concurrency_limits.items()}
+            'workers': {req_type.value: pool.stats()
+                        for req_type, pool in self.worker_pools.items()},
+            'concurrency_limits': {req_type.value: limiter.stats()
+                                 for req_type, limiter in self.concurrency_limits.items()},
+            'priority_classes': {req_type.value: queue.class_stats()
+                               for req_type, queue in self.request_queues.items()},
+            'quota_users': {
+                'live': len(self.quota),
+                'evicted': self.quota.evicted_total
+            },
+            # 요청 타입 / 처리 단계별 최근 5분 지연 시간 (초)
+            'latency': latency_metrics.snapshot(),
+            'providers': provider_metrics.snapshot()
         }
 
     async def get_user_stats(self, user_id: int) -> Dict[str, any]:
         """사용자 통계 정보 반환"""
-        if user_id not in self.user_daily_counts:
+        usage = self.quota.usage(user_id)
+        if usage is None:
             return {"message": "사용자 데이터가 없습니다."}
         
         stats = {}
         for request_type, limit_info in self.rate_limits.items():
-            used = self.user_daily_counts[user_id].get(request_type, 0)
+            used = usage.get(request_type, 0)
             remaining = limit_info['daily_limit'] - used
             stats[request_type] = {
                 "daily_used": used,
@@ -0,0 +1,218 @@
+"""
+공정 분배 요청 스케줄러
+
+우선순위 클래스 → 길드 → 사용자 3단계 DRR(Deficit Round Robin)로 대기 요청을 꺼냅니다.
+- 우선순위 클래스는 가중치만큼 더 자주 선택되지만 낮은 클래스도 굶지 않습니다.
+- 같은 클래스 안에서는 길드끼리, 같은 길드 안에서는 사용자끼리 번갈아 처리되므로
+  한 사용자나 한 길드가 요청을 몰아 넣어도 다른 사용자의 작업이 밀리지 않습니다.
+- 마감 시각(deadline)이 있는 요청은 사용자 안에서 마감이 빠른 순서로 꺼내며,
+  마감까지 여유가 urgent_slack 이하로 줄어든 요청은 DRR 순서보다 먼저(EDF) 꺼냅니다.
+
+asyncio.Queue와 같은 put_nowait / get / qsize / full 인터페이스를 제공합니다.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+# 우선순위 클래스별 DRR 가중치 (1=최고, 5=최저)
+PRIORITY_WEIGHTS: Dict[int, int] = {1: 16, 2: 8, 3: 4, 4: 2, 5: 1}
+
+# 대기 시간 통계에 사용할 최근 샘플 수
+_WAIT_SAMPLES = 200
+
+# 마감 시각이 없는 요청의 정렬 키
+_NO_DEADLINE = float("inf")
+
+
+class _DrrNode:
+    """DRR 한 단계 - 요청이 남아 있는 자식만 순서대로 보관"""
+
+    __slots__ = ("children", "deficits")
+
+    def __init__(self):
+        self.children: "OrderedDict[Any, Any]" = OrderedDict()
+        self.deficits: Dict[Any, int] = {}
+
+    def pick(self, weights: Optional[Dict[Any, int]] = None):
+        """이번에 처리할 자식 키 선택 (차례가 끝난 자식은 맨 뒤로 이동)"""
+        key = next(iter(self.children))
+        deficit = self.deficits.get(key, 0)
+        if deficit < 1:
+            # 새 차례 시작 - 가중치만큼 처리 권한 부여
+            deficit += weights.get(key, 1) if weights else 1
+        deficit -= 1
+        self.deficits[key] = deficit
+        if deficit < 1:
+            self.children.move_to_end(key)
+        return key
+
+    def remove(self, key) -> None:
+        """비어 있는 자식 제거 (DRR 규칙대로 남은 권한도 초기화)"""
+        del self.children[key]
+        self.deficits.pop(key, None)
+
+
+class FairScheduler:
+    """우선순위 클래스 / 길드 / 사용자 단위 공정 분배 큐"""
+
+    def __init__(self, maxsize: int = 0, weights: Dict[int, int] = PRIORITY_WEIGHTS,
+                 urgent_slack: float = 60.0):
+        self.maxsize = maxsize
+        self.weights = weights
+        self.urgent_slack = urgent_slack
+        # 예상 처리 시간 (작업자 풀이 측정값으로 갱신) - 마감 여유 계산에 사용
+        self.expected_service = 0.0
+        self._root = _DrrNode()
+        self._size = 0
+        self._seq = itertools.count()
+        # 마감 시각이 있는 대기 요청 (deadline, seq, request) - 꺼낸 요청은 지연 삭제
+        self._deadlines: List[tuple] = []
+        self._queued: set = set()
+        self._class_sizes: Dict[int, int] = {priority: 0 for priority in weights}
+        self._class_waits: Dict[int, Deque[float]] = {
+            priority: deque(maxlen=_WAIT_SAMPLES) for priority in weights
+        }
+        self._getters: Deque[asyncio.Future] = deque()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= self._size
+
+    def _priority_class(self, priority: int) -> int:
+        """범위를 벗어난 우선순위는 가장 가까운 클래스로 보정"""
+        if priority in self.weights:
+            return priority
+        return min(self.weights, key=lambda p: abs(p - priority))
+
+    def put_nowait(self, request) -> None:
+        """요청 추가 (가득 찬 경우 asyncio.QueueFull)"""
+        if self.full():
+            raise asyncio.QueueFull
+
+        priority = self._priority_class(request.priority)
+        request.priority = priority
+        request.enqueued_at = time.monotonic()
+        request.seq = next(self._seq)
+        entry = (request.deadline if request.deadline is not None else _NO_DEADLINE,
+                 request.seq, request)
+
+        guilds = self._root.children.get(priority)
+        if guilds is None:
+            guilds = self._root.children[priority] = _DrrNode()
+            # 새로 활성화된 클래스가 현재 차례인 클래스보다 높으면 바로 다음 차례로
+            # (앞 클래스의 남은 처리 권한은 유지되므로 가중치 비율은 그대로)
+            if priority < next(iter(self._root.children)):
+                self._root.children.move_to_end(priority, last=False)
+        users = guilds.children.get(request.guild_id)
+        if users is None:
+            users = guilds.children[request.guild_id] = _DrrNode()
+        pending = users.children.get(request.user_id)
+        if pending is None:
+            pending = users.children[request.user_id] = []
+        heapq.heappush(pending, entry)
+        if request.deadline is not None:
+            heapq.heappush(self._deadlines, entry)
+        self._queued.add(request.seq)
+
+        self._size += 1
+        self._class_sizes[priority] += 1
+        self._wakeup_getter()
+
+    def get_nowait(self):
+        """다음 요청 꺼내기 (비어 있으면 asyncio.QueueEmpty)"""
+        if self._size == 0:
+            raise asyncio.QueueEmpty
+
+        request = self._pop_urgent()
+        if request is None:
+            priority = self._root.pick(self.weights)
+            guilds = self._root.children[priority]
+            guild_id = guilds.pick()
+            users = guilds.children[guild_id]
+            user_id = users.pick()
+            # 같은 사용자 안에서는 마감이 빠른 요청부터
+            request = heapq.heappop(users.children[user_id])[2]
+            self._prune(priority, guild_id, user_id)
+
+        self._queued.discard(request.seq)
+        self._size -= 1
+        self._class_sizes[request.priority] -= 1
+        self._class_waits[request.priority].append(time.monotonic() - request.enqueued_at)
+        return request
+
+    def _pop_urgent(self):
+        """마감 여유가 urgent_slack 이하인 가장 급한 요청을 DRR 순서와 무관하게 꺼냄"""
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][1] not in self._queued:
+            heapq.heappop(deadlines)
+        if not deadlines:
+            return None
+
+        deadline, _, request = deadlines[0]
+        if deadline - time.monotonic() - self.expected_service > self.urgent_slack:
+            return None
+
+        entry = heapq.heappop(deadlines)
+        pending = self._root.children[request.priority].children[request.guild_id].children[request.user_id]
+        pending.remove(entry)
+        heapq.heapify(pending)
+        self._prune(request.priority, request.guild_id, request.user_id)
+        return request
+
+    def _prune(self, priority: int, guild_id, user_id) -> None:
+        """비워진 단계는 상위부터 정리"""
+        guilds = self._root.children[priority]
+        users = guilds.children[guild_id]
+        if users.children[user_id]:
+            return
+        users.remove(user_id)
+        if not users.children:
+            guilds.remove(guild_id)
+            if not guilds.children:
+                self._root.remove(priority)
+
+    async def get(self):
+        """요청이 들어올 때까지 기다렸다가 꺼내기"""
+        while self._size == 0:
+            getter = asyncio.get_running_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await getter
+            except BaseException:
+                getter.cancel()
+                try:
+                    self._getters.remove(getter)
+                except ValueError:
+                    pass
+                # 깨워진 직후 취소된 경우 다른 대기자에게 넘김
+                if self._size and not getter.cancelled():
+                    self._wakeup_getter()
+                raise
+        return self.get_nowait()
+
+    def _wakeup_getter(self) -> None:
+        while self._getters:
+            getter = self._getters.popleft()
+            if not getter.done():
+                getter.set_result(None)
+                break
+
+    def class_stats(self) -> Dict[int, Dict[str, float]]:
+        """우선순위 클래스별 대기 중인 요청 수와 최근 대기 시간 (초)"""
+        stats = {}
+        for priority, waits in self._class_waits.items():
+            stats[priority] = {
+                'depth': self._class_sizes[priority],
+                'avg_wait': round(sum(waits) / len(waits), 3) if waits else 0.0,
+                'max_wait': round(max(waits), 3) if waits else 0.0,
+            }
+        return stats
@@ -0,0 +1,239 @@
+"""
+채팅 응답 캐시
+
+정규화한 질문, 모델, 생성 파라미터, 이전 대화 맥락의 해시를 키로 완성된 응답을 보관합니다.
+같은 질문이 없으면 같은 사용자가 같은 맥락에서 한 비슷한 질문(similarity_index)의 응답을 찾습니다.
+비슷한 질문은 원래 질문을 함께 보여 주므로 다른 사용자의 질문과는 비교하지 않습니다.
+항목은 TTL이 지나면 만료되고, 최대 개수를 넘으면 가장 오래 쓰지 않은 항목부터 제거됩니다(LRU).
+
+path를 지정하면 SQLite에 함께 저장해 재시작 후에도 캐시를 이어서 사용합니다.
+조회는 항상 메모리에서만 하고, 디스크 쓰기는 전용 스레드 하나에서 직렬로 실행됩니다.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from env_manager import get_env, get_env_int
+from similarity_index import chat_index
+
+logger = logging.getLogger(__name__)
+
+# 환경 변수에서 설정값 로드 (캐시된 값 사용)
+RESPONSE_CACHE_SIZE = get_env_int("RESPONSE_CACHE_SIZE", 1000)
+RESPONSE_CACHE_TTL = get_env_int("RESPONSE_CACHE_TTL", 3600)
+RESPONSE_CACHE_PATH = get_env("RESPONSE_CACHE_PATH", "")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """대소문자 / 전각·반각 / 공백 차이를 없앤 질문"""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", prompt).casefold()).strip()
+
+
+def context_fingerprint(model: str, params: Dict[str, Any],
+                        context: Optional[List[Dict[str, str]]] = None) -> str:
+    """
+    질문 외에 응답에 영향을 주는 모든 것의 해시
+
+    Args:
+        model: 모델 이름
+        params: 응답에 영향을 주는 생성 파라미터
+        context: 질문 앞에 함께 보내는 메시지 (시스템 프롬프트, 이전 대화)
+    """
+    material = json.dumps([model, params, context or []], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def cache_key(prompt: str, fingerprint: str) -> str:
+    """정규화한 질문과 맥락 해시로 만든 캐시 키 (SHA-256)"""
+    material = f"{fingerprint}\n{normalize_prompt(prompt)}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+async def replay(value: str) -> AsyncIterator[str]:
+    """캐시된 응답을 스트림처럼 전달 (실제 응답과 같은 렌더링 경로를 타도록)"""
+    yield value
+
+
+class ResponseCache:
+    """TTL + LRU 응답 캐시 (선택적 SQLite 영속화)"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL,
+                 path: Optional[str] = RESPONSE_CACHE_PATH, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            max_entries: 메모리에 보관할 최대 항목 수
+            ttl: 항목 유효 시간 (초)
+            path: SQLite 파일 경로 (비어 있으면 메모리에만 보관)
+            clock: 벽시계 함수 (만료 시각을 디스크에 그대로 저장하므로 time.time 기준)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path or None
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()  # key -> (만료 시각, 응답)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, count: bool = True) -> Optional[str]:
+        """캐시된 응답 (없거나 만료되었으면 None, count=False면 적중 / 미스 통계에서 제외)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += count
+                return value
+            del self._entries[key]
+        self.misses += count
+        return None
+
+    def put(self, key: str, value: str) -> None:
+        """완성된 응답 저장 (최대 개수를 넘으면 가장 오래 쓰지 않은 항목 제거)"""
+        if not value or self.max_entries <= 0:
+            return
+        expires_at = self._clock() + self.ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+
+        removed = []
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            removed.append(old_key)
+            self.evictions += 1
+
+        if self._executor is not None:
+            self._executor.submit(self._write, key, expires_at, value, removed)
+
+    async def open(self) -> None:
+        """디스크 캐시 열기 및 만료되지 않은 항목 불러오기 (path가 없으면 아무것도 안 함)"""
+        if self.path is None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache")
+        rows = await asyncio.get_running_loop().run_in_executor(self._executor, self._open)
+        for key, expires_at, value in rows:
+            self._entries[key] = (expires_at, value)
+        if rows:
+            logger.info(f"Response cache restored {len(rows)} entries from {self.path}")
+
+    async def close(self) -> None:
+        """대기 중인 쓰기를 마치고 디스크 캐시 닫기"""
+        if self._executor is None:
+            return
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close)
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    def _open(self) -> List[Tuple[str, float, str]]:
+        """데이터베이스 열기 (전용 스레드, 실패 시 메모리 캐시로만 동작)"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                " key TEXT PRIMARY KEY,"
+                " expires_at REAL NOT NULL,"
+                " value TEXT NOT NULL)"
+            )
+            with conn:
+                conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (self._clock(),))
+            # 만료가 늦은(최근에 저장한) 항목이 LRU의 최근 쪽에 오도록 오름차순
+            rows = conn.execute(
+                "SELECT key, expires_at, value FROM"
+                " (SELECT * FROM response_cache ORDER BY expires_at DESC LIMIT ?)"
+                " ORDER BY expires_at", (self.max_entries,)
+            ).fetchall()
+            self._conn = conn
+            return rows
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Failed to open response cache {self.path}: {e}")
+            return []
+
+    def _write(self, key: str, expires_at: float, value: str, removed: List[str]) -> None:
+        """항목 저장 및 제거된 항목 삭제 (전용 스레드)"""
+        if self._conn is None:
+            return
+        try:
+            with self._conn:
+                self._conn.executemany("DELETE FROM response_cache WHERE key = ?", [(k,) for k in removed])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                    (key, expires_at, value),
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Response cache write failed: {e}")
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def stats(self) -> Dict[str, float]:
+        """항목 수와 적중 / 미스 통계"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# 글로벌 인스턴스 생성
+response_cache = ResponseCache()
+
+
+def find_reply(prompt: str, fingerprint: str, key: str,
+               user_id: int) -> Tuple[Optional[str], Optional[str]]:
+    """
+    같은 질문, 없으면 같은 사용자가 같은 맥락에서 한 비슷한 질문의 캐시된 응답 조회
+
+    Args:
+        key: 이 질문의 캐시 키 (cache_key)
+        user_id: 질문한 사용자 (비슷한 질문은 이 사용자의 질문만 비교)
+
+    Returns:
+        (캐시된 응답, 비슷한 질문으로 찾았으면 그 질문)
+    """
+    reply = response_cache.get(key)
+    if reply is not None:
+        return reply, None
+
+    match = chat_index.find(prompt, (user_id, fingerprint))
+    if match is not None:
+        similar, similar_key, _ = match
+        reply = response_cache.get(similar_key, count=False)
+        if reply is not None:
+            return reply, similar
+    return None, None
+
+
+def store_reply(prompt: str, fingerprint: str, key: str, reply: str, user_id: int) -> None:
+    """완성된 응답을 캐시에 저장하고 질문한 사용자의 비슷한 질문 인덱스에 등록"""
+    if not reply:
+        return
+    response_cache.put(key, reply)
+    chat_index.add(prompt, key, (user_id, fingerprint))
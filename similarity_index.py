@@ -0,0 +1,230 @@
+"""
+비슷한 질문 / 이미지 설명 탐지 (로컬 SimHash 인덱스)
+
+문장부호, 띄어쓰기, 조사만 다른 요청을 같은 요청으로 보기 위해 텍스트를 정규화한 뒤
+띄어쓰기를 뺀 글자 2-gram의 64비트 SimHash를 만들고, 해밍 거리가 허용 거리 이하인 이전 요청을
+찾습니다. 문장부호 / 띄어쓰기 / 조사 차이는 정규화로 거리 0이 되므로 허용 거리는 오타 정도만 흡수하면
+됩니다. 한 단어만 바뀌어도 뜻이 달라지므로("TCP and UDP" / "TCP and HTTP") 허용 거리는 2-gram
+SHINGLES_PER_BIT개마다 1씩, 최대 max_distance까지만 늘어납니다 (짧은 텍스트는 정규화 후 같아야 함).
+숫자는 한 글자만 달라도 다른 질문이므로("1부터 100까지" / "1부터 1000까지",
+"python 2 vs python 3" / "python 3 vs python 2") 숫자들이 순서까지 같은 항목끼리만 비교합니다.
+
+비트를 (max_distance + 1)개 밴드로 나눠 밴드 값마다 항목을 색인하므로, 비둘기집 원리에 따라
+거리가 max_distance 이하인 항목은 적어도 한 밴드가 정확히 일치해 후보에 반드시 포함됩니다.
+후보만 비교하므로 조회는 인덱스 크기와 거의 무관하게 수십 마이크로초 수준입니다.
+
+외부 임베딩 서비스는 사용하지 않습니다.
+"""
+
+import functools
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from env_manager import get_env_int
+
+# 환경 변수에서 설정값 로드 (캐시된 값 사용)
+NEAR_DUPLICATE_DISTANCE = get_env_int("NEAR_DUPLICATE_DISTANCE", 2)
+NEAR_DUPLICATE_INDEX_SIZE = get_env_int("NEAR_DUPLICATE_INDEX_SIZE", 5000)
+NEAR_DUPLICATE_TTL = get_env_int("NEAR_DUPLICATE_TTL", 3600)
+
+FINGERPRINT_BITS = 64
+
+# 정규화 후 이보다 짧은 텍스트는 특징이 너무 적어 색인하지 않음
+MIN_LENGTH = 4
+
+# 허용 해밍 거리 1당 필요한 2-gram 수 (2-gram이 적을수록 한 단어 차이가 차지하는 비중이 큼)
+SHINGLES_PER_BIT = 16
+
+# 단어 끝에서 떼어 낼 조사 (긴 것부터 확인)
+_PARTICLES = (
+    "에서는", "으로는", "에게서", "이라고", "에서", "에게", "으로", "이랑", "까지", "부터",
+    "처럼", "보다", "라고", "하고", "은", "는", "이", "가", "을", "를", "의", "에",
+    "로", "와", "과", "도", "만", "랑", "요",
+)
+
+_PARTICLE_SET = frozenset(_PARTICLES)
+
+_WORD_RE = re.compile(r"\w+")
+_NUMBER_RE = re.compile(r"\d+")
+
+# 바이트 값의 각 비트를 16비트 칸 하나씩에 펼친 값 (비트별 개수를 정수 덧셈 한 번으로 셈)
+_SLOT = 16
+_SPREAD = tuple(
+    sum(((byte >> bit) & 1) << (_SLOT * bit) for bit in range(8)) for byte in range(256)
+)
+
+
+def _strip_particle(word: str) -> str:
+    """단어 끝의 조사를 (남는 글자가 있을 때까지) 떼어 냄"""
+    stripped = True
+    while stripped:
+        stripped = False
+        for particle in _PARTICLES:
+            if len(word) > len(particle) and word.endswith(particle):
+                word = word[:-len(particle)]
+                stripped = True
+                break
+    return word
+
+
+def normalize(text: str) -> str:
+    """대소문자 / 전각·반각 / 문장부호 / 조사 차이를 없애고 단어를 공백 하나로 구분한 텍스트"""
+    words = _WORD_RE.findall(unicodedata.normalize("NFKC", text).casefold())
+    # 띄어 쓴 조사("파이썬 에서")는 단어째 버림
+    return " ".join(_strip_particle(word) for word in words if word not in _PARTICLE_SET)
+
+
+def numbers(normalized: str) -> Tuple[str, ...]:
+    """텍스트에 나온 숫자들 (순서대로, 이 값이 같은 항목끼리만 비교)"""
+    return tuple(_NUMBER_RE.findall(normalized))
+
+
+@functools.lru_cache(maxsize=65536)
+def _spread_hash(feature: str) -> int:
+    """특징의 64비트 해시를 비트마다 16비트 칸에 펼친 값 (자주 나오는 특징은 캐시)"""
+    value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    spread = 0
+    for index in range(8):
+        spread |= _SPREAD[(value >> (8 * index)) & 0xFF] << (_SLOT * 8 * index)
+    return spread
+
+
+def simhash(normalized: str) -> int:
+    """정규화한 텍스트의 글자 2-gram SimHash (64비트, 띄어쓰기 무관)"""
+    compact = normalized.replace(" ", "")
+    features = [compact[i:i + 2] for i in range(len(compact) - 1)] or [compact]
+    # 모든 특징의 펼친 해시를 더하면 칸마다 그 비트가 1인 특징 수가 쌓임
+    total = sum(map(_spread_hash, features))
+    half = len(features) / 2
+    mask = (1 << _SLOT) - 1
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        if (total >> (_SLOT * bit)) & mask > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class SimilarityIndex:
+    """SimHash 밴딩 인덱스 (크기 제한 LRU + TTL)"""
+
+    def __init__(self, max_entries: int = NEAR_DUPLICATE_INDEX_SIZE,
+                 max_distance: int = NEAR_DUPLICATE_DISTANCE, ttl: float = NEAR_DUPLICATE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_entries: 보관할 최대 항목 수 (0이면 사용 안 함)
+            max_distance: 같은 요청으로 볼 최대 해밍 거리 (0~63, 긴 텍스트에만 전부 적용)
+            ttl: 항목 유효 시간 (초)
+            clock: 단조 증가 시계 함수
+        """
+        self.max_entries = max_entries
+        self.max_distance = max(0, min(max_distance, FINGERPRINT_BITS - 1))
+        self.ttl = ttl
+        self._clock = clock
+
+        bands = self.max_distance + 1
+        width = FINGERPRINT_BITS // bands
+        self._bands: List[Tuple[int, int]] = [(band * width, (1 << width) - 1) for band in range(bands)]
+        self._buckets: List[Dict[int, set]] = [{} for _ in range(bands)]
+        # ((네임스페이스, 숫자들), 지문) -> (만료 시각, 원래 텍스트, 값)
+        self._entries: "OrderedDict[Tuple[Any, int], Tuple[float, str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_keys(self, fingerprint: int):
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            yield buckets, (fingerprint >> shift) & mask
+
+    def _remove(self, entry_key: Tuple[Any, int]) -> None:
+        del self._entries[entry_key]
+        for buckets, band in self._band_keys(entry_key[1]):
+            members = buckets.get(band)
+            if members is not None:
+                members.discard(entry_key)
+                if not members:
+                    del buckets[band]
+
+    def add(self, text: str, value: Any, namespace: Any = None) -> None:
+        """
+        텍스트와 그에 대한 값(캐시 키, 이미지 URL 등) 등록
+
+        Args:
+            namespace: 같은 네임스페이스 안에서만 비교 (예: 사용자, 사용자와 대화 맥락)
+        """
+        normalized = normalize(text)
+        if self.max_entries <= 0 or len(normalized.replace(" ", "")) < MIN_LENGTH:
+            return
+
+        entry_key = ((namespace, numbers(normalized)), simhash(normalized))
+        if entry_key in self._entries:
+            self._entries.move_to_end(entry_key)
+        else:
+            for buckets, band in self._band_keys(entry_key[1]):
+                buckets.setdefault(band, set()).add(entry_key)
+        self._entries[entry_key] = (self._clock() + self.ttl, text, value)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def find(self, text: str, namespace: Any = None) -> Optional[Tuple[str, Any, int]]:
+        """
+        가장 비슷한 이전 항목
+
+        Returns:
+            (원래 텍스트, 값, 해밍 거리) 또는 None
+        """
+        normalized = normalize(text)
+        if self.max_entries <= 0 or len(normalized.replace(" ", "")) < MIN_LENGTH:
+            return None
+
+        scope = (namespace, numbers(normalized))
+        fingerprint = simhash(normalized)
+        limit = self.limit(normalized)
+        candidates = set()
+        for buckets, band in self._band_keys(fingerprint):
+            members = buckets.get(band)
+            if members:
+                candidates.update(members)
+
+        now = self._clock()
+        best = None
+        best_distance = limit + 1
+        for entry_key in candidates:
+            if entry_key[0] != scope:
+                continue
+            expires_at = self._entries[entry_key][0]
+            if expires_at <= now:
+                self._remove(entry_key)
+                continue
+            distance = (entry_key[1] ^ fingerprint).bit_count()
+            if distance < best_distance:
+                best, best_distance = entry_key, distance
+
+        if best is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(best)
+        _, original, value = self._entries[best]
+        return original, value, best_distance
+
+    def limit(self, normalized: str) -> int:
+        """정규화한 텍스트의 허용 해밍 거리 (2-gram SHINGLES_PER_BIT개마다 1, 최대 max_distance)"""
+        shingles = len(normalized.replace(" ", "")) - 1
+        return min(self.max_distance, shingles // SHINGLES_PER_BIT)
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# 글로벌 인스턴스 생성 (채팅 질문 / 이미지 설명 - 결과에 원래 요청이 보이므로 사용자별 네임스페이스로 사용)
+chat_index = SimilarityIndex()
+image_index = SimilarityIndex()
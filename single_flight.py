@@ -0,0 +1,165 @@
+"""
+같은 요청의 업스트림 스트림 공유 (single-flight)
+
+같은 키의 요청이 처리 중이면 새 업스트림 요청을 보내지 않고 진행 중인 스트림을 구독합니다.
+업스트림은 요청한 쪽과 분리된 태스크 하나가 읽어 조각을 쌓아 두고, 구독자마다 자기 속도로
+처음 조각부터 따라 읽으므로 늦게 합류하거나 Discord 전송이 느린 구독자가 다른 구독자를
+막지 않습니다. 업스트림이 실패하면 모든 구독자에게 같은 예외가 전달됩니다.
+
+구독자가 모두 떠나면(전송 실패, 인터랙션 취소) 아무도 받지 않을 토큰을 더 쓰지 않도록
+업스트림을 중단합니다. 완성된 응답은 구독자가 아니라 업스트림을 읽은 태스크가 저장하므로
+처음 요청한 쪽이 중간에 실패해도 끝까지 받은 응답은 캐시에 남습니다.
+
+구독할 때 member(예: 채널)를 넘기면 완료 처리(on_complete)에 중복 없이 모아서 전달하므로,
+같은 채널의 요청이 여러 개 합류해도 대화 기록 같은 후처리는 채널마다 한 번만 합니다.
+"""
+
+import asyncio
+import logging
+from typing import AbstractSet, Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class SharedStream:
+    """업스트림 스트림 하나를 여러 구독자에게 나눠 주는 버퍼"""
+
+    __slots__ = ("chunks", "done", "error", "subscribers", "joined", "members", "pump", "_changed")
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0  # 지금 읽고 있는 구독자 수
+        self.joined = 0  # 지금까지 구독한 수
+        self.members: Set[Any] = set()  # 완료 처리를 받을 구독자 측 값 (중복 제거)
+        self.pump: Optional[asyncio.Task] = None  # 업스트림을 읽는 태스크
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        # 기다리던 구독자는 이전 이벤트를 들고 있으므로 새 이벤트로 교체
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def push(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def subscribe(self, member: Any = None) -> AsyncIterator[str]:
+        """처음 조각부터 스트림 끝까지 (업스트림 실패 시 같은 예외 발생)"""
+        # 읽기 시작 전에 세어야 첫 조각 전에 다른 구독자가 떠나도 업스트림이 중단되지 않음
+        self.subscribers += 1
+        self.joined += 1
+        if member is not None:
+            self.members.add(member)
+        return self._read()
+
+    async def _read(self) -> AsyncIterator[str]:
+        index = 0
+        try:
+            while True:
+                while index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.pump is not None:
+                # 모두 떠남 - 아무도 받지 않을 토큰을 더 읽지 않도록 업스트림 중단
+                self.pump.cancel()
+
+
+class SingleFlight:
+    """키별 진행 중 스트림 레지스트리"""
+
+    def __init__(self):
+        self._flights: Dict[str, SharedStream] = {}
+        self._tasks = set()
+        self.started = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._flights
+
+    def join(self, key: str, member: Any = None) -> Optional[AsyncIterator[str]]:
+        """
+        같은 키의 진행 중 스트림 구독 (없으면 None)
+
+        Args:
+            member: 완료 처리(on_complete)에 넘길 값 (예: 채널 ID, 같은 값은 한 번만)
+        """
+        shared = self._flights.get(key)
+        if shared is None or shared.subscribers == 0:
+            # 구독자가 모두 떠나 중단 중인 스트림에는 합류하지 않음
+            return None
+        self.coalesced += 1
+        return shared.subscribe(member)
+
+    def start(self, key: str, factory: Callable[[], AsyncIterator[str]],
+              on_complete: Optional[Callable[[str, AbstractSet[Any]], None]] = None,
+              member: Any = None) -> AsyncIterator[str]:
+        """
+        업스트림 스트림을 시작하고 첫 구독자로 구독
+
+        Args:
+            key: 같은 요청을 식별하는 키 (응답 캐시 키)
+            factory: 업스트림 스트림을 만드는 함수 (별도 태스크에서 한 번만 읽음)
+            on_complete: 업스트림을 끝까지 읽었을 때 (완성된 응답, 구독자들의 member 집합)으로
+                한 번 호출 (예: 응답 캐시 저장, 채널마다 대화 기록)
+            member: 첫 구독자의 member (join 참고)
+        """
+        shared = SharedStream()
+        # await 전에 등록해야 동시에 들어온 같은 요청이 합류할 수 있음
+        self._flights[key] = shared
+        self.started += 1
+
+        subscription = shared.subscribe(member)
+        shared.pump = asyncio.create_task(self._pump(key, shared, factory, on_complete))
+        self._tasks.add(shared.pump)
+        shared.pump.add_done_callback(self._tasks.discard)
+        return subscription
+
+    async def _pump(self, key: str, shared: SharedStream,
+                    factory: Callable[[], AsyncIterator[str]],
+                    on_complete: Optional[Callable[[str, AbstractSet[Any]], None]]) -> None:
+        """업스트림을 끝까지 읽어 버퍼에 쌓기 (구독자가 하나라도 남아 있는 동안 계속)"""
+        error = None
+        try:
+            async for chunk in factory():
+                shared.push(chunk)
+            if on_complete is not None:
+                try:
+                    on_complete("".join(shared.chunks), frozenset(shared.members))
+                except Exception as e:
+                    logger.error(f"Shared stream completion handler failed: {e}")
+        except asyncio.CancelledError as e:
+            error = e
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            # 끝난 스트림에는 더 이상 합류하지 않음 (완성된 응답은 on_complete로 응답 캐시에 저장)
+            if self._flights.get(key) is shared:
+                del self._flights[key]
+            shared.finish(error)
+            if shared.joined > 1:
+                logger.info(f"Shared upstream stream with {shared.joined} requests")
+
+    def stats(self) -> Dict[str, int]:
+        return {'inflight': len(self._flights), 'started': self.started, 'coalesced': self.coalesced}
+
+
+# 글로벌 인스턴스 생성
+chat_flights = SingleFlight()
@@ -0,0 +1,165 @@
+"""
+업스트림 스트림 시간 제한 (첫 토큰 / 토큰 간격)
+
+요청 전체에 타임아웃 하나를 거는 대신 두 가지를 따로 제한합니다.
+- first_token: 요청을 보낸 뒤 첫 청크가 올 때까지 (스트림 생성 포함)
+- idle: 그 뒤 청크와 청크 사이 간격
+
+제한을 넘으면 기다리던 읽기를 취소하고 스트림(HTTP 응답)을 닫은 뒤 StreamTimeout을 올립니다.
+어느 단계에서 몇 개의 청크를 받은 뒤 멈췄는지 알 수 있으므로, 호출하는 쪽은 아직 아무것도
+보여 주지 않았을 때만 안전하게 다시 시도할 수 있습니다.
+
+hedge(hedging.Hedge)를 주면 첫 청크가 hedge.delay 안에 오지 않을 때 두 번째 요청을 보내고
+먼저 첫 청크를 보낸 쪽을 이어서 읽으며 다른 쪽은 취소합니다.
+"""
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+from env_manager import get_env_int
+
+T = TypeVar("T")
+
+# 환경 변수에서 설정값 로드 (캐시된 값 사용)
+CHAT_FIRST_TOKEN_TIMEOUT = get_env_int("CHAT_FIRST_TOKEN_TIMEOUT", 15)
+CHAT_TOKEN_IDLE_TIMEOUT = get_env_int("CHAT_TOKEN_IDLE_TIMEOUT", 10)
+CHAT_STREAM_RETRIES = get_env_int("CHAT_STREAM_RETRIES", 1)
+
+# 제한 단계
+STAGE_FIRST_TOKEN = "first_token"
+STAGE_IDLE = "idle"
+
+
+class StreamTimeout(asyncio.TimeoutError):
+    """첫 토큰 또는 토큰 간격 제한 초과"""
+
+    def __init__(self, stage: str, limit: float, received: int):
+        super().__init__(f"No {'first chunk' if stage == STAGE_FIRST_TOKEN else 'chunk'} "
+                         f"within {limit}s (received {received})")
+        self.stage = stage
+        self.limit = limit
+        self.received = received
+
+
+# 첫 청크 없이 끝난 스트림
+_EMPTY = object()
+
+
+async def _close(stream) -> None:
+    close = getattr(stream, "close", None)
+    if close is not None:
+        await close()
+
+
+async def _open_first(open_stream: Callable[[], Awaitable[AsyncIterator[T]]]) -> tuple:
+    """
+    요청을 보내고 첫 청크까지 읽기 (실패 / 취소되면 스트림을 닫음)
+
+    Returns:
+        (스트림, 이터레이터, 첫 청크 또는 _EMPTY)
+    """
+    stream = await open_stream()
+    try:
+        iterator = stream.__aiter__()
+        try:
+            item = await iterator.__anext__()
+        except StopAsyncIteration:
+            item = _EMPTY
+        return stream, iterator, item
+    except BaseException:
+        await _close(stream)
+        raise
+
+
+async def _race_first(open_stream: Callable[[], Awaitable[AsyncIterator[T]]], hedge) -> tuple:
+    """첫 청크가 늦으면 헤지 요청을 보내 먼저 첫 청크를 보낸 쪽 선택"""
+    primary = asyncio.create_task(_open_first(open_stream))
+    pending = {primary}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=hedge.delay)
+        if not done:
+            open_hedge = hedge.start()
+            if open_hedge is not None:
+                pending.add(asyncio.create_task(_open_first(open_hedge)))
+
+        error = None
+        while True:
+            winners = [task for task in done if task.exception() is None]
+            if winners:
+                # 동시에 끝났으면 첫 요청을 쓰고 나머지 연결은 닫음
+                winners.sort(key=lambda task: task is not primary)
+                for task in winners[1:]:
+                    await _close(task.result()[0])
+                if winners[0] is not primary:
+                    hedge.won()
+                return winners[0].result()
+            for task in done:
+                error = error or task.exception()
+            if not pending:
+                raise error
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        await _discard(pending)
+
+
+async def _discard(tasks) -> None:
+    """
+    진 쪽 요청 정리
+
+    아직 진행 중이면 취소하고(_open_first가 연결을 닫음), 승자를 고르는 사이 이미 스트림을 열고
+    끝난 요청은 취소가 효과가 없으므로 그 스트림을 직접 닫아 연결을 풀에 돌려줍니다.
+    """
+    if not tasks:
+        return
+    for task in tasks:
+        task.cancel()
+    await asyncio.wait(tasks)
+    for task in tasks:
+        if not task.cancelled() and task.exception() is None:
+            await _close(task.result()[0])
+
+
+async def guarded_stream(open_stream: Callable[[], Awaitable[AsyncIterator[T]]],
+                         first_token_timeout: float = CHAT_FIRST_TOKEN_TIMEOUT,
+                         idle_timeout: float = CHAT_TOKEN_IDLE_TIMEOUT,
+                         hedge=None) -> AsyncIterator[T]:
+    """
+    시간 제한을 건 업스트림 스트림
+
+    Args:
+        open_stream: 업스트림 요청을 보내고 스트림을 돌려주는 코루틴 함수 (첫 토큰 제한에 포함)
+        first_token_timeout: 첫 청크까지 제한 (초)
+        idle_timeout: 청크 사이 간격 제한 (초)
+        hedge: 첫 청크가 늦을 때 보낼 헤지 요청 계획 (hedging.Hedge, 없으면 헤지 안 함)
+    """
+    stream = None
+    received = 0
+    stage, limit = STAGE_FIRST_TOKEN, first_token_timeout
+    # 첫 청크는 요청 시작부터, 이후 청크는 직전 청크부터 잼
+    deadline = asyncio.timeout(first_token_timeout)
+    try:
+        async with deadline:
+            if hedge is None:
+                stream, iterator, item = await _open_first(open_stream)
+            else:
+                stream, iterator, item = await _race_first(open_stream, hedge)
+        if item is _EMPTY:
+            return
+        while True:
+            received += 1
+            yield item
+            stage, limit = STAGE_IDLE, idle_timeout
+            # 소비자가 처리하는 시간은 제한에 넣지 않도록 읽기만 감쌈
+            deadline = asyncio.timeout(idle_timeout)
+            async with deadline:
+                item = await iterator.__anext__()
+    except StopAsyncIteration:
+        return
+    except TimeoutError:
+        if deadline.expired():
+            raise StreamTimeout(stage, limit, received) from None
+        raise
+    finally:
+        # 멈춘 응답을 끝까지 기다리지 않도록 연결 정리
+        if stream is not None:
+            await _close(stream)
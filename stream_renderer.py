@@ -0,0 +1,273 @@
+"""
+스트리밍 응답 렌더러
+
+토큰 수신과 Discord 메시지 수정을 분리합니다. 수신한 조각은 버퍼에 모아 두고,
+별도 태스크가 수정 간격(time budget)에 맞춰 그 시점의 최신 내용으로 한 번만 수정합니다.
+- 첫 토큰이 오면 바로 첫 메시지를 보냅니다.
+- 수정 간격은 Discord 응답에 따라 조정됩니다. 429 응답의 Retry-After /
+  X-RateLimit-Reset-After 헤더만큼 수정을 미루고 간격을 두 배로 늘립니다.
+  discord.py가 버킷 소진으로 대기하느라 수정이 느려져도 간격을 늘리고,
+  빠르게 성공하면 조금씩 줄입니다.
+- 내용이 바뀌지 않았으면 수정하지 않습니다.
+- 한 메시지가 가득 차면 문단 / 줄 / 문장 / 단어 경계에서 페이지를 끊고
+  바로 새 메시지를 보내 그 메시지에 이어서 스트리밍합니다.
+  페이지 나누기는 split_message와 같은 utils.paginate 규칙을 따르므로
+  코드 블록은 페이지마다 닫고 다음 페이지에서 다시 엽니다.
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional, Tuple
+
+import discord
+
+from metrics import latency_metrics, STAGE_DISCORD_SEND
+from utils import next_page, render_page, skip_newlines
+
+logger = logging.getLogger(__name__)
+
+# Discord 메시지 최대 길이
+MESSAGE_LIMIT = 2000
+
+# 수정 간격 범위 (초) - 메시지당 수정은 대략 5초에 5번까지 허용됨
+EDIT_MIN_INTERVAL = 1.0
+EDIT_MAX_INTERVAL = 8.0
+
+# 이보다 오래 걸린 수정은 레이트 리밋 대기가 포함된 것으로 봄 (초)
+SLOW_EDIT = 1.0
+
+# 다음 페이지가 있는 메시지 끝에 붙는 표시
+NEXT_MARKER = "\n\n**[계속 ⬇️]**"
+
+def _retry_after(error: discord.HTTPException) -> Optional[float]:
+    """429 응답 헤더에서 다시 시도할 수 있을 때까지의 시간 (초)"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    for header in ('Retry-After', 'X-RateLimit-Reset-After'):
+        value = headers.get(header)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                continue
+    return None
+
+
+class StreamRenderer:
+    """토큰 스트림을 Discord 메시지(가득 차면 다음 메시지)로 점진 렌더링"""
+
+    def __init__(self, interaction, prefix: str = "", request_type: str = 'chat',
+                 min_interval: float = EDIT_MIN_INTERVAL, max_interval: float = EDIT_MAX_INTERVAL):
+        self.interaction = interaction
+        self.prefix = prefix
+        self.request_type = request_type
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+        self.message = None  # 현재 페이지 메시지
+        self.page = 1
+        self.edits = 0
+        self.rate_limited = 0
+
+        self._parts: List[str] = []
+        self._content = ""
+        self._page_start = 0  # 현재 페이지가 시작하는 내용 오프셋
+        self._fence: Optional[str] = None  # 현재 페이지 시작 시 열려 있는 코드 블록
+        self._rendered: Optional[str] = None  # 마지막으로 표시한 내용
+        self._next_edit = 0.0
+        self._send_failed = False
+        self._changed = asyncio.Event()
+        self._done = asyncio.Event()
+
+    @property
+    def content(self) -> str:
+        """지금까지 받은 전체 내용 (조각은 필요할 때만 합침)"""
+        if self._parts:
+            self._content += "".join(self._parts)
+            self._parts.clear()
+        return self._content
+
+    async def render(self, deltas: AsyncIterator[str]) -> None:
+        """스트림을 끝까지 소비하며 렌더링하고 최종 내용으로 마무리"""
+        editor = asyncio.create_task(self._edit_loop())
+        try:
+            async for delta in deltas:
+                if delta:
+                    self._parts.append(delta)
+                    self._changed.set()
+        except BaseException:
+            editor.cancel()
+            # 중간에 그만두면 스트림을 바로 닫아 공유 업스트림이 구독자가 떠났음을 알게 함
+            aclose = getattr(deltas, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            raise
+
+        self._done.set()
+        self._changed.set()
+        await editor
+        await self._finalize()
+
+    def _header(self) -> str:
+        """페이지 머리말 (첫 페이지는 prefix)"""
+        return self.prefix if self.page == 1 else f"**[계속 {self.page}]**\n\n"
+
+    def _body_limit(self) -> int:
+        """현재 페이지에 담을 수 있는 본문 길이 (다음 페이지 표시 자리 포함)"""
+        return MESSAGE_LIMIT - len(self._header()) - len(NEXT_MARKER)
+
+    def _page_end(self) -> Tuple[int, Optional[str]]:
+        """현재 페이지를 끊을 위치와 그 위치에서 열려 있는 코드 블록"""
+        return next_page(self.content, self._page_start, self._body_limit(), self._fence)
+
+    def _overflowing(self) -> bool:
+        return self._page_end()[0] < len(self.content)
+
+    def _display(self) -> str:
+        """현재 페이지에 표시할 내용 (열린 코드 블록은 닫아서 표시)"""
+        end, fence_out = self._page_end()
+        return f"{self._header()}{render_page(self.content, self._page_start, end, self._fence, fence_out)}"
+
+    async def _edit_loop(self) -> None:
+        """새 내용이 들어오면 수정 간격에 맞춰 최신 내용으로 수정"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            if self._done.is_set() or self._send_failed:
+                return
+
+            if self.message is None:
+                # 첫 토큰은 바로 전송
+                await self._send_page()
+                continue
+
+            # 페이지가 가득 찼으면 바로 다음 메시지로 넘어감
+            while self.message is not None and self._overflowing():
+                await self._roll_over()
+            if self.message is None:
+                return
+
+            delay = self._next_edit - loop.time()
+            if delay > 0:
+                try:
+                    # 기다리는 동안 스트림이 끝나면 최종 수정으로 넘어감
+                    await asyncio.wait_for(self._done.wait(), delay)
+                    return
+                except asyncio.TimeoutError:
+                    pass
+
+            await self._edit(self._display())
+
+    async def _send_page(self) -> None:
+        """현재 페이지 첫 메시지 전송"""
+        loop = asyncio.get_running_loop()
+        text = self._display()
+        try:
+            with latency_metrics.timer(self.request_type, STAGE_DISCORD_SEND):
+                self.message = await self.interaction.followup.send(text)
+        except discord.HTTPException as e:
+            logger.error(f"Failed to send streaming message: {e}")
+            self._send_failed = True
+            return
+        self._rendered = text
+        self._next_edit = loop.time() + self.interval
+
+    async def _wait_for_budget(self) -> None:
+        """다음 수정 가능 시각까지 대기"""
+        delay = self._next_edit - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _close_page(self) -> str:
+        """현재 페이지를 자연스러운 경계에서 끊고 다음 페이지로 넘김 (끊은 페이지 내용 반환)"""
+        content = self.content
+        start = self._page_start
+        end, fence_out = self._page_end()
+        text = f"{self._header()}{render_page(content, start, end, self._fence, fence_out)}{NEXT_MARKER}"
+
+        # 코드 블록 안의 빈 줄은 내용이므로 유지
+        self._page_start = end if fence_out else skip_newlines(content, end)
+        self._fence = fence_out
+        self.page += 1
+        return text
+
+    async def _roll_over(self) -> None:
+        """다음 메시지를 바로 보내 이어서 스트리밍하고 이전 메시지는 끊은 내용으로 마무리"""
+        previous = self.message
+        text = self._close_page()
+        self.message = None
+        self._rendered = None
+        await self._send_page()
+
+        if not await self._edit(text, previous):
+            # 레이트 리밋이면 알려준 시간 뒤에 한 번 더
+            await self._wait_for_budget()
+            await self._edit(text, previous)
+
+    async def _edit(self, text: str, message=None) -> bool:
+        """메시지 수정(기본: 현재 페이지) 및 응답에 따른 수정 간격 조정"""
+        current = message is None
+        if current:
+            if text == self._rendered:
+                return True
+            message = self.message
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            with latency_metrics.timer(self.request_type, STAGE_DISCORD_SEND):
+                await message.edit(content=text)
+        except discord.HTTPException as e:
+            now = loop.time()
+            if e.status == 429:
+                # 헤더가 알려준 시간만큼 미루고 간격 두 배 (multiplicative decrease)
+                self.rate_limited += 1
+                self.interval = min(self.max_interval, self.interval * 2)
+                self._next_edit = now + max(_retry_after(e) or 0.0, self.interval)
+                logger.warning(f"Streaming edit rate limited, next edit in {self._next_edit - now:.1f}s")
+            else:
+                logger.warning(f"Streaming edit failed: {e}")
+                self._next_edit = now + self.interval
+            return False
+
+        now = loop.time()
+        self.edits += 1
+        if current:
+            self._rendered = text
+        if now - start > SLOW_EDIT:
+            # discord.py가 버킷 소진으로 대기한 것 - 간격 늘림
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        else:
+            self.interval = max(self.min_interval, self.interval - 0.1)
+        self._next_edit = now + self.interval
+        return True
+
+    async def _send(self, text: str) -> None:
+        """추가 메시지 전송 (실패는 로그만)"""
+        try:
+            with latency_metrics.timer(self.request_type, STAGE_DISCORD_SEND):
+                await self.interaction.followup.send(text)
+        except discord.HTTPException as e:
+            logger.error(f"Failed to send followup message: {e}")
+
+    async def _finalize(self) -> None:
+        """스트림 종료 후 최종 내용 반영"""
+        while self.message is not None and self._overflowing():
+            await self._roll_over()
+
+        if self.message is None:
+            # 첫 전송 전에 끝났거나 전송 실패 - 남은 내용을 페이지로 나눠 새 메시지로
+            while self._overflowing():
+                await self._send(self._close_page())
+            await self._send(self._display())
+            return
+
+        # 레이트 리밋으로 미뤄진 경우 그 시간까지 대기
+        if self.rate_limited:
+            await self._wait_for_budget()
+        if not await self._edit(self._display()):
+            await self._send(self._display())
@@ -0,0 +1,87 @@
+"""
+명령어 테스트용 가짜 Discord 객체 (봇 / 명령어 트리 / 인터랙션)
+
+보낸 메시지는 인터랙션마다 sent 목록에 (종류, 내용, 키워드 인자)로 기록됩니다.
+"""
+
+import itertools
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_ids = itertools.count(1000)
+
+
+class FakeTree:
+    """bot.tree.command 데코레이터로 등록한 명령어 보관"""
+
+    def __init__(self):
+        self.commands: Dict[str, Callable] = {}
+
+    def command(self, name: str, description: str = ""):
+        def decorator(func):
+            self.commands[name] = func
+            return func
+        return decorator
+
+
+class FakeBot:
+    def __init__(self, request_manager=None):
+        self.tree = FakeTree()
+        self.request_manager = request_manager
+
+
+class _Response:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def send_message(self, content: Optional[str] = None, **kwargs) -> None:
+        assert not self.done, "interaction already responded"
+        self.done = True
+        self._interaction.sent.append(("response", content, kwargs))
+
+    async def defer(self, **kwargs) -> None:
+        assert not self.done, "interaction already responded"
+        self.done = True
+        self._interaction.sent.append(("defer", None, kwargs))
+
+    async def edit_message(self, **kwargs) -> None:
+        self.done = True
+        self._interaction.sent.append(("edit", None, kwargs))
+
+
+class _Followup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content: Optional[str] = None, **kwargs):
+        self._interaction.sent.append(("followup", content, kwargs))
+        return SimpleNamespace(id=next(_ids), content=content)
+
+
+class FakeInteraction:
+    """슬래시 명령어 / 버튼 인터랙션"""
+
+    def __init__(self, user_id: int = 1, guild_id: Optional[int] = 10, channel_id: int = 100):
+        self.id = next(_ids)
+        self.user = SimpleNamespace(id=user_id)
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.application_id = 1
+        self.token = f"token-{self.id}"
+        self.created_at = datetime.now(timezone.utc)
+        self.expires_at = self.created_at + timedelta(minutes=15)
+        self.sent: List[Tuple[str, Optional[str], Dict[str, Any]]] = []
+        self.response = _Response(self)
+        self.followup = _Followup(self)
+
+    def last(self, kind: Optional[str] = None) -> Tuple[str, Optional[str], Dict[str, Any]]:
+        """마지막으로 보낸 (그 종류의) 메시지"""
+        for entry in reversed(self.sent):
+            if kind is None or entry[0] == kind:
+                return entry
+        raise AssertionError(f"no {kind or 'message'} sent")
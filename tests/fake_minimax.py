@@ -0,0 +1,96 @@
+"""
+로컬 가짜 MiniMax 비디오 API (MINIMAX_API_BASE를 이 서버로 바꿔 끝까지 테스트할 때 사용)
+
+- POST /v1/video_generation: 작업을 만들고, callback_url이 있으면 challenge로 주소를 확인
+- GET /v1/query/video_generation: 작업 상태 (complete()로 바꾸기 전에는 Processing)
+- GET /v1/files/retrieve: file_id별 다운로드 URL
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+
+class FakeMiniMax:
+    """테스트용 MiniMax 서버"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.tasks: Dict[str, Dict[str, str]] = {}  # task_id -> {"status", "file_id"}
+        self.callback_urls: Dict[str, str] = {}
+        self.challenge_ok: Dict[str, bool] = {}
+        self.queries: List[str] = []
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/v1/video_generation", self._submit)
+        app.router.add_get("/v1/query/video_generation", self._query)
+        app.router.add_get("/v1/files/retrieve", self._files)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @staticmethod
+    def download_url(file_id: str) -> str:
+        return f"https://files.example/{file_id}.mp4"
+
+    async def complete(self, task_id: str, status: str = "Success", notify: bool = True) -> None:
+        """작업을 끝내고 (notify면) 등록된 콜백 주소로 알림"""
+        self.tasks[task_id] = {"status": status, "file_id": f"file-{task_id}" if status == "Success" else ""}
+        if notify and task_id in self.callback_urls:
+            await self.post_callback(self.callback_urls[task_id], {
+                "task_id": task_id,
+                "status": status.lower(),
+                "file_id": self.tasks[task_id]["file_id"],
+            })
+
+    @staticmethod
+    async def post_callback(url: str, body: dict) -> int:
+        """콜백 주소로 POST (위조 요청 테스트에도 사용), 응답 상태 코드 반환"""
+        async with aiohttp.ClientSession() as session:
+            async with session.post(url, json=body) as response:
+                return response.status
+
+    async def _submit(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        task_id = f"task-{len(self.tasks) + 1}"
+        self.tasks[task_id] = {"status": "Processing", "file_id": ""}
+        callback_url = body.get("callback_url")
+        if callback_url:
+            self.callback_urls[task_id] = callback_url
+            asyncio.get_running_loop().create_task(self._verify(task_id, callback_url))
+        return web.json_response({"task_id": task_id})
+
+    async def _verify(self, task_id: str, url: str) -> None:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(url, json={"challenge": task_id}) as response:
+                self.challenge_ok[task_id] = (
+                    response.status == 200 and (await response.json()).get("challenge") == task_id
+                )
+
+    async def _query(self, request: web.Request) -> web.Response:
+        task_id = request.query["task_id"]
+        self.queries.append(task_id)
+        task = self.tasks.get(task_id)
+        if task is None:
+            return web.json_response({"status": "Fail", "file_id": ""})
+        return web.json_response(task)
+
+    async def _files(self, request: web.Request) -> web.Response:
+        file_id = request.query["file_id"]
+        return web.json_response({"file": {"download_url": self.download_url(file_id)}})
@@ -0,0 +1,116 @@
+"""
+/이미지 비슷한 요청 재사용 테스트 (저장된 이미지를 보여 줄 때는 쿼터를 쓰지 않고 새로 생성할 때 한 번만 차감)
+
+생성은 실제 명령어처럼 요청 관리자의 대기열 작업자에서 실행됩니다.
+
+실행:
+    python -m pytest tests/test_image_commands.py
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import request_manager_enhanced
+from commands import image_commands
+from fake_discord import FakeBot, FakeInteraction
+from quota_engine import QuotaEngine
+from request_manager_enhanced import RequestType
+from similarity_index import SimilarityIndex
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def drain(manager):
+    """대기열의 이미지 요청이 모두 처리될 때까지 대기"""
+    pool = manager.worker_pools[RequestType.IMAGE]
+    while manager.request_queues[RequestType.IMAGE].qsize() or pool.busy:
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    """저장소 없는 요청 관리자 + 가짜 시계 쿼터 + 빈 인덱스 + 가짜 이미지 생성으로 /이미지 등록"""
+    monkeypatch.setattr(request_manager_enhanced, "QUOTA_DB_PATH", "")
+    manager = request_manager_enhanced.EnhancedRequestManager()
+    clock = FakeClock()
+    manager.quota = QuotaEngine({
+        request_type: (limit['cooldown'], limit['daily_limit'])
+        for request_type, limit in manager.rate_limits.items()
+    }, clock=clock)
+    monkeypatch.setattr(image_commands, "image_index", SimilarityIndex(max_entries=100))
+
+    generated = []
+
+    async def fake_generate_image(bot, prompt, image=None):
+        generated.append(prompt)
+        return f"https://images.example/{len(generated)}.png"
+
+    monkeypatch.setattr(image_commands, "generate_image", fake_generate_image)
+
+    bot = FakeBot(manager)
+    asyncio.run(image_commands.setup_image_commands(bot))
+    return bot, manager, clock, generated
+
+
+def test_similar_hit_is_free_and_regenerate_charges_once(setup):
+    bot, manager, clock, generated = setup
+    image = bot.tree.commands["이미지"]
+
+    async def main():
+        manager.start_queue_processor(bot)
+        await image(FakeInteraction(user_id=1), "공원에서 뛰어노는 고양이")
+        await drain(manager)
+        assert manager.quota.usage(1)['image'] == 1
+
+        # 쿨다운이 끝난 뒤 비슷한 설명 - 저장된 이미지를 보여 주고 차감하지 않음
+        clock.now += 10
+        hit = FakeInteraction(user_id=1)
+        await image(hit, "공원에서 뛰어노는 고양이!")
+        kind, _, kwargs = hit.last()
+        assert kind == "response" and "view" in kwargs
+        assert manager.quota.usage(1)['image'] == 1
+        assert generated == ["공원에서 뛰어노는 고양이"]
+
+        # 바로 새로 생성 버튼 - 쿨다운에 막히지 않고 한 번만 차감
+        button = FakeInteraction(user_id=1)
+        await kwargs["view"].children[0].callback(button)
+        await drain(manager)
+        assert manager.quota.usage(1)['image'] == 2
+        assert generated == ["공원에서 뛰어노는 고양이", "공원에서 뛰어노는 고양이!"]
+        assert "embed" in button.last("followup")[2]
+        await manager.stop_queue_processor()
+
+    asyncio.run(main())
+
+
+def test_similar_image_is_not_shown_to_other_users(setup):
+    bot, manager, clock, generated = setup
+    image = bot.tree.commands["이미지"]
+
+    async def main():
+        manager.start_queue_processor(bot)
+        await image(FakeInteraction(user_id=1, guild_id=10), "공원에서 뛰어노는 고양이")
+        await drain(manager)
+
+        # 다른 길드의 다른 사용자 - 첫 사용자의 이미지와 설명을 보지 않고 새로 생성
+        other = FakeInteraction(user_id=2, guild_id=20)
+        await image(other, "공원에서 뛰어노는 고양이!")
+        await drain(manager)
+        assert generated == ["공원에서 뛰어노는 고양이", "공원에서 뛰어노는 고양이!"]
+        assert manager.quota.usage(2)['image'] == 1
+        assert "view" not in other.last("followup")[2]
+        await manager.stop_queue_processor()
+
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+MiniMax 완료 콜백 끝까지 테스트 (로컬 가짜 MiniMax 서버 + 콜백 서버)
+
+실행:
+    python -m pytest tests/test_minimax_callback.py
+"""
+
+import asyncio
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import minimax_callback
+from ai_services import minimax_service
+from fake_minimax import FakeMiniMax
+from http_sessions import http_sessions
+from video_poller import VideoPoller
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def run(monkeypatch):
+    """가짜 서버와 콜백 서버를 띄우고 (fake, callback) 인자로 테스트 코루틴 실행"""
+    monkeypatch.setattr(minimax_service, "MINIMAX_API_KEY", "test-key")
+    # 이벤트 루프마다 새 폴러 (콜백이 오지 않으면 60초 뒤에나 조회하므로 결과는 콜백 덕분)
+    poller = VideoPoller(minimax_service._query_video_status)
+    monkeypatch.setattr(minimax_service, "video_poller", poller)
+    monkeypatch.setattr(minimax_callback, "video_poller", poller)
+
+    def runner(test):
+        async def main():
+            fake = FakeMiniMax()
+            await fake.start()
+            monkeypatch.setattr(minimax_service, "MINIMAX_API_BASE", fake.base_url)
+            port = _free_port()
+            callback = minimax_callback.CallbackServer(
+                f"http://127.0.0.1:{port}/minimax/callback", "127.0.0.1", port, secret=SECRET
+            )
+            await callback.start()
+            try:
+                await asyncio.wait_for(test(fake, callback), 10)
+            finally:
+                await callback.stop()
+                await poller.stop()
+                await http_sessions.close()
+                await fake.stop()
+        asyncio.run(main())
+    return runner
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_for_task(fake: FakeMiniMax) -> str:
+    while not fake.tasks:
+        await asyncio.sleep(0.01)
+    return next(iter(fake.tasks))
+
+
+def test_callback_finishes_job_with_queried_result(run):
+    async def test(fake, callback):
+        video = asyncio.create_task(minimax_service.generate_video("고양이"))
+        task_id = await _wait_for_task(fake)
+        await fake.complete(task_id)
+
+        assert await video == fake.download_url(f"file-{task_id}")
+        assert fake.challenge_ok[task_id]
+        assert "token=" + SECRET in fake.callback_urls[task_id]
+        assert fake.queries == [task_id]  # 콜백 후 한 번만 조회
+    run(test)
+
+
+def test_spoofed_callback_cannot_finish_job(run):
+    async def test(fake, callback):
+        video = asyncio.create_task(minimax_service.generate_video("고양이"))
+        task_id = await _wait_for_task(fake)
+        url = fake.callback_urls[task_id]
+
+        # 토큰이 없으면 거부
+        no_token = url.split("?")[0]
+        assert await fake.post_callback(no_token, {"task_id": task_id, "status": "fail"}) == 403
+
+        # 토큰이 맞아도 본문은 믿지 않음 - 조회해 보면 아직 진행 중
+        for body in ({"task_id": task_id, "status": "fail"},
+                     {"task_id": task_id, "status": "success", "file_id": "someone-elses-file"}):
+            assert await fake.post_callback(url, body) == 200
+        await asyncio.sleep(0.2)
+        assert not video.done()
+
+        await fake.complete(task_id)
+        assert await video == fake.download_url(f"file-{task_id}")
+        assert callback.rejected == 1
+    run(test)
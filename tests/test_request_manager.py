@@ -0,0 +1,95 @@
+"""
+요청 관리자 테스트
+- 재시작 후 쿼터 판단 (처음 보는 사용자는 저장된 쿨다운을 합친 뒤 판단, 저장소가 느리면 메모리에서 판단)
+- 사용량 기준 우선순위 클래스
+
+실행:
+    python -m pytest tests/test_request_manager.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import request_manager_enhanced
+from quota_engine import QuotaEngine
+from request_manager_enhanced import EnhancedRequestManager, RequestType
+
+
+async def open_manager() -> EnhancedRequestManager:
+    manager = EnhancedRequestManager()
+    store = manager.quota_store
+    await asyncio.get_running_loop().run_in_executor(store.executor, store.open)
+    return manager
+
+
+async def close_manager(manager: EnhancedRequestManager) -> None:
+    store = manager.quota_store
+    await asyncio.get_running_loop().run_in_executor(store.executor, store.close)
+    store.executor.shutdown(wait=False)
+
+
+def test_stored_cooldown_applies_to_first_request_after_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_manager_enhanced, "QUOTA_DB_PATH", str(tmp_path / "quota.db"))
+
+    async def main():
+        before = await open_manager()
+        assert (await before.can_make_request(1, 'video'))[0]
+        await before._flush_quota_state()
+        await close_manager(before)
+
+        # 재시작 - 쿨다운 안의 첫 요청은 저장된 상태를 합친 뒤 거절
+        after = await open_manager()
+        allowed, message = await after.can_make_request(1, 'video')
+        assert not allowed and "재사용까지" in message
+        assert after.stats['quota_load_timeouts'] == 0
+        # 다른 사용자는 영향 없음
+        assert (await after.can_make_request(2, 'video'))[0]
+        await close_manager(after)
+
+    asyncio.run(main())
+
+
+def test_slow_store_falls_back_to_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_manager_enhanced, "QUOTA_DB_PATH", str(tmp_path / "quota.db"))
+    monkeypatch.setattr(request_manager_enhanced, "QUOTA_LOAD_TIMEOUT_MS", 10)
+
+    async def main():
+        manager = await open_manager()
+        load_many = manager.quota_store.load_many
+
+        def slow_load_many(user_ids):
+            time.sleep(0.1)
+            return load_many(user_ids)
+
+        manager.quota_store.load_many = slow_load_many
+        started = time.monotonic()
+        assert (await manager.can_make_request(1, 'chat'))[0]
+        assert time.monotonic() - started < 0.1
+        assert manager.stats['quota_load_timeouts'] == 1
+        await manager._quota_loader
+        await close_manager(manager)
+
+    asyncio.run(main())
+
+
+def test_priority_drops_with_daily_usage(monkeypatch):
+    monkeypatch.setattr(request_manager_enhanced, "QUOTA_DB_PATH", "")
+    manager = EnhancedRequestManager()
+    manager.rate_limits['video'] = {'cooldown': 0, 'daily_limit': 8}
+    manager.quota = QuotaEngine({'video': (0, 8)})
+
+    # 처음 보는 사용자는 최고 우선순위, 새로 생성은 한 단계 낮음
+    assert manager.priority_for(1, RequestType.VIDEO) == 1
+    assert manager.priority_for(1, RequestType.VIDEO, regenerate=True) == 2
+
+    # 일일 제한(8) 대비 25%마다 한 단계씩 낮아지고 4에서 멈춤
+    priorities = []
+    for _ in range(8):
+        manager.quota.acquire(1, 'video')
+        priorities.append(manager.priority_for(1, RequestType.VIDEO))
+    assert priorities == [1, 2, 2, 3, 3, 4, 4, 4]
+    assert manager.priority_for(1, RequestType.VIDEO, regenerate=True) == 5
@@ -0,0 +1,36 @@
+"""
+채팅 응답 캐시의 비슷한 질문 조회 테스트 (같은 사용자의 질문만 비교)
+
+실행:
+    python -m pytest tests/test_response_cache.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import response_cache
+from response_cache import ResponseCache, cache_key, find_reply, store_reply
+from similarity_index import SimilarityIndex
+
+FINGERPRINT = "empty-history"
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "response_cache", ResponseCache(max_entries=100, ttl=3600, path=""))
+    monkeypatch.setattr(response_cache, "chat_index", SimilarityIndex(max_entries=100))
+
+
+def test_similar_question_only_matches_same_user():
+    prompt = "파이썬에서 리스트를 정렬하는 방법"
+    store_reply(prompt, FINGERPRINT, cache_key(prompt, FINGERPRINT), "sorted()를 쓰세요", user_id=1)
+
+    asked = "파이썬 에서 리스트 정렬하는 방법!"
+    key = cache_key(asked, FINGERPRINT)
+    assert find_reply(asked, FINGERPRINT, key, user_id=1) == ("sorted()를 쓰세요", prompt)
+    # 맥락이 같아도(대화 기록 없음) 다른 사용자에게는 첫 사용자의 질문과 답변을 보여 주지 않음
+    assert find_reply(asked, FINGERPRINT, key, user_id=2) == (None, None)
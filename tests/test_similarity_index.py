@@ -0,0 +1,51 @@
+"""
+비슷한 질문 인덱스 회귀 테스트
+
+실행:
+    python -m pytest tests/test_similarity_index.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from similarity_index import SimilarityIndex
+
+
+@pytest.fixture
+def index():
+    return SimilarityIndex(max_entries=100, max_distance=5, ttl=3600)
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("1부터 100까지 더하면?", "1부터 1000까지 더하면?"),
+    ("python 2 vs python 3 differences", "python 3 vs python 2 differences"),
+])
+def test_different_numbers_do_not_match(index, stored, asked):
+    index.add(stored, "answer")
+    assert index.find(asked) is None
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("explain the difference between TCP and UDP", "explain the difference between TCP and HTTP"),
+    ("서울 날씨 알려줘", "부산 날씨 알려줘"),
+    ("리액트에서 상태 관리하는 방법", "뷰에서 상태 관리하는 방법"),
+])
+def test_short_prompts_differing_by_one_word_do_not_match(index, stored, asked):
+    # 짧은 질문은 설정한 최대 거리(5)보다 작은 허용 거리를 씀
+    index.add(stored, "answer")
+    assert index.find(asked) is None
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("1부터 100까지 더하면?", "1 부터 100 까지 더하면"),
+    ("머신러닝이 뭐야?", "머신 러닝이 뭐야"),
+    ("파이썬에서 리스트를 정렬하는 방법", "파이썬 에서 리스트 정렬하는 방법!"),
+])
+def test_punctuation_spacing_and_particles_match(index, stored, asked):
+    index.add(stored, "answer")
+    match = index.find(asked)
+    assert match is not None and match[1] == "answer"
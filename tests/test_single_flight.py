@@ -0,0 +1,117 @@
+"""
+공유 스트림 테스트 (구독자가 모두 떠나면 업스트림 중단, 응답 저장과 대화 기록은 업스트림 태스크가 한 번만)
+
+실행:
+    python -m pytest tests/test_single_flight.py
+"""
+
+import asyncio
+import contextlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from single_flight import SingleFlight
+
+
+class FakeUpstream:
+    """조각을 하나씩 내보내는 가짜 업스트림 (몇 조각을 읽었는지, 닫혔는지 기록)"""
+
+    def __init__(self, chunks, delay=0.01):
+        self.chunks = chunks
+        self.delay = delay
+        self.sent = 0
+        self.closed = False
+
+    async def stream(self):
+        try:
+            for chunk in self.chunks:
+                await asyncio.sleep(self.delay)
+                self.sent += 1
+                yield chunk
+        finally:
+            self.closed = True
+
+
+def test_upstream_stops_when_every_subscriber_leaves():
+    async def main():
+        flights = SingleFlight()
+        upstream = FakeUpstream([str(i) for i in range(100)])
+        stored = []
+
+        async def consume(stream, limit):
+            # StreamRenderer처럼 중간에 그만두면 스트림을 닫음
+            async with contextlib.aclosing(stream):
+                received = 0
+                async for _ in stream:
+                    received += 1
+                    if received == limit:
+                        raise RuntimeError("Discord 전송 실패")
+
+        async def cancelled(stream):
+            async for _ in stream:
+                pass
+
+        first = asyncio.create_task(consume(flights.start("key", upstream.stream, lambda reply, members: stored.append(reply)), 2))
+        # 인터랙션 취소 - 조각을 기다리던 중 취소됨
+        second = asyncio.create_task(cancelled(flights.join("key")))
+        await asyncio.sleep(0.035)
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0.05)
+
+        assert upstream.closed
+        assert upstream.sent < 10
+        assert stored == []
+        assert "key" not in flights
+        # 중단된 스트림에 합류하지 않고 새로 시작
+        assert flights.join("key") is None
+
+    asyncio.run(main())
+
+
+def test_reply_is_stored_when_starter_fails():
+    async def main():
+        flights = SingleFlight()
+        upstream = FakeUpstream(["안녕", "하세요", "!"])
+        stored = []
+
+        async def failing_starter(stream):
+            async for _ in stream:
+                raise RuntimeError("Discord 전송 실패")
+
+        async def joiner(stream):
+            return "".join([chunk async for chunk in stream])
+
+        starter = asyncio.create_task(failing_starter(flights.start("key", upstream.stream, lambda reply, members: stored.append(reply))))
+        reply = await joiner(flights.join("key"))
+        await asyncio.gather(starter, return_exceptions=True)
+
+        assert reply == "안녕하세요!"
+        assert stored == ["안녕하세요!"]
+        assert upstream.sent == 3
+
+    asyncio.run(main())
+
+
+def test_completion_runs_once_with_every_member():
+    async def main():
+        flights = SingleFlight()
+        upstream = FakeUpstream(["같은", " 답변"])
+        completed = []
+
+        async def read(stream):
+            return "".join([chunk async for chunk in stream])
+
+        # 같은 채널의 두 사용자와 다른 채널의 사용자가 같은 질문에 합류
+        streams = [flights.start("key", upstream.stream, lambda reply, members: completed.append((reply, members)), "channel-a")]
+        streams.append(flights.join("key", "channel-a"))
+        streams.append(flights.join("key", "channel-b"))
+        replies = await asyncio.gather(*(read(stream) for stream in streams))
+        await asyncio.sleep(0)
+
+        assert replies == ["같은 답변"] * 3
+        assert completed == [("같은 답변", frozenset({"channel-a", "channel-b"}))]
+
+    asyncio.run(main())
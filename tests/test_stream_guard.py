@@ -0,0 +1,64 @@
+"""
+헤지 경합 테스트 (진 쪽 요청이 이미 스트림을 열었으면 그 스트림도 닫음)
+
+실행:
+    python -m pytest tests/test_stream_guard.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stream_guard import _race_first
+
+
+class FakeStream:
+    """첫 청크를 바로 보내는 가짜 업스트림 스트림 (닫혔는지 기록)"""
+
+    def __init__(self):
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return "안녕"
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeHedge:
+    """헤지 요청을 보내기 전에 끝나는 경우만 보는 헤지 계획"""
+
+    delay = 10
+
+    def start(self):
+        return None
+
+    def won(self):
+        pass
+
+
+def test_finished_loser_stream_is_closed_when_race_is_cancelled():
+    async def main():
+        gate = asyncio.Event()
+        stream = FakeStream()
+
+        async def open_stream():
+            await gate.wait()
+            return stream
+
+        race = asyncio.create_task(_race_first(open_stream, FakeHedge()))
+        await asyncio.sleep(0)
+        # 첫 청크를 받은 직후, 승자를 고르기 전에 첫 토큰 제한으로 취소됨
+        gate.set()
+        race.cancel()
+        await asyncio.gather(race, return_exceptions=True)
+
+        assert race.cancelled()
+        assert stream.closed
+
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""
+/비디오 제출 대기열 테스트 (제출은 대기열 작업자가 비디오 동시성 슬롯 안에서 실행, 마감 초과 시 제출하지 않음)
+
+실행:
+    python -m pytest tests/test_video_commands.py
+"""
+
+import asyncio
+import os
+import sys
+from datetime import timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import request_manager_enhanced
+from commands import video_commands
+from fake_discord import FakeBot, FakeInteraction
+from request_manager_enhanced import EnhancedRequestManager, RequestType, INTERACTION_TOKEN_TTL
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    """저장소 없는 요청 관리자 + 슬롯 점유를 기록하는 가짜 비디오 제출"""
+    monkeypatch.setattr(request_manager_enhanced, "QUOTA_DB_PATH", "")
+    manager = EnhancedRequestManager()
+    limiter = manager.concurrency_limits[RequestType.VIDEO]
+    submitted = []
+
+    async def fake_submit_video(prompt):
+        submitted.append((prompt, limiter.inflight))
+        return "task-1", None
+
+    monkeypatch.setattr(video_commands, "submit_video", fake_submit_video)
+    return FakeBot(manager), manager, submitted
+
+
+def test_submit_runs_in_queue_worker_with_video_slot(setup):
+    bot, manager, submitted = setup
+
+    async def main():
+        manager.start_queue_processor(bot)
+        interaction = FakeInteraction(user_id=1)
+        assert await video_commands._queue_video_submit(bot, interaction, "고양이") == ("task-1", None)
+        assert submitted == [("고양이", 1)]
+        # 제출이 끝나면 렌더링을 기다리는 동안 슬롯을 쓰지 않음
+        assert manager.concurrency_limits[RequestType.VIDEO].inflight == 0
+        await manager.stop_queue_processor()
+
+    asyncio.run(main())
+
+
+def test_expired_request_is_shed_without_submitting(setup):
+    bot, manager, submitted = setup
+
+    async def main():
+        manager.start_queue_processor(bot)
+        # 토큰 만료까지 전달 여유가 없는 인터랙션
+        interaction = FakeInteraction(user_id=1)
+        interaction.created_at -= timedelta(seconds=INTERACTION_TOKEN_TTL)
+        assert await video_commands._queue_video_submit(bot, interaction, "고양이") is None
+        assert submitted == []
+        assert manager.stats['shed'] == 1
+        await manager.stop_queue_processor()
+
+    asyncio.run(main())
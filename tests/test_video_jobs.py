@@ -0,0 +1,185 @@
+"""
+비디오 작업 결과 전달 테스트 (후속 메시지 / 채널 / DM 순서, 전달 실패 시 작업 유지 / 다시 전달 / 재시작 후 저장된 결과 전달)
+
+실행:
+    python -m pytest tests/test_video_jobs.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import discord
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import video_jobs as video_jobs_module
+from video_jobs import VideoJob, VideoJobs
+
+
+def make_job(task_id="task-1", token_ttl=900):
+    now = time.time()
+    return VideoJob(
+        task_id=task_id, user_id=1, channel_id=2, application_id=3, interaction_token="token",
+        prompt="고양이", token_expires_at=now + token_ttl, deadline=now + 600,
+    )
+
+
+class Recipient:
+    """메시지를 기록하는 가짜 채널 / 사용자 / 웹훅 (fail이면 전송 실패)"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+
+    async def send(self, content, **kwargs):
+        if self.fail:
+            raise discord.DiscordException("Missing Access")
+        self.sent.append((content, kwargs))
+
+
+class DeliveryBot:
+    """캐시에 없는 채널 / 사용자는 API로 조회하는 가짜 봇"""
+
+    def __init__(self, channel, user):
+        self.channel = channel
+        self.user = user
+        self.fetched = []
+
+    def get_channel(self, channel_id):
+        return None
+
+    async def fetch_channel(self, channel_id):
+        self.fetched.append(('channel', channel_id))
+        return self.channel
+
+    def get_user(self, user_id):
+        return None
+
+    async def fetch_user(self, user_id):
+        self.fetched.append(('user', user_id))
+        return self.user
+
+
+class FlakyDelivery:
+    """앞의 몇 번은 전달에 실패하는 가짜 전달"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.sent = []
+
+    async def __call__(self, job, result):
+        if self.failures > 0:
+            self.failures -= 1
+            return False
+        self.sent.append((job.task_id, result))
+        return True
+
+
+def rows(jobs):
+    return jobs.store._conn.execute("SELECT task_id, result FROM video_jobs").fetchall()
+
+
+def test_failed_delivery_keeps_job_and_retries(tmp_path, monkeypatch):
+    monkeypatch.setattr(video_jobs_module, "DELIVERY_RETRY_INITIAL", 0.01)
+
+    async def main():
+        jobs = VideoJobs(str(tmp_path / "jobs.db"))
+        await jobs.open(bot=None)
+        jobs.deliver = FlakyDelivery(failures=2)
+
+        job = make_job()
+        await jobs._run(jobs.store.save, job)
+        await jobs.finish(job, "https://example.com/video.mp4")
+
+        # 첫 전달 실패 - 결과와 함께 남아 있음
+        assert rows(jobs) == [("task-1", "https://example.com/video.mp4")]
+        await asyncio.gather(*jobs._retrying)
+
+        assert jobs.deliver.sent == [("task-1", "https://example.com/video.mp4")]
+        assert jobs.delivery_retries == 2
+        assert rows(jobs) == []
+        await jobs.close()
+
+    asyncio.run(main())
+
+
+def test_undelivered_result_is_resent_after_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(video_jobs_module, "DELIVERY_RETRY_INITIAL", 60)
+    path = str(tmp_path / "jobs.db")
+
+    async def first_run():
+        jobs = VideoJobs(path)
+        await jobs.open(bot=None)
+        jobs.deliver = FlakyDelivery(failures=1)
+        job = make_job()
+        await jobs._run(jobs.store.save, job)
+        await jobs.finish(job, "https://example.com/video.mp4")
+        # 다시 보내기 전에 종료
+        await jobs.close()
+
+    async def second_run():
+        jobs = VideoJobs(path)
+        delivery = FlakyDelivery(failures=0)
+        jobs.deliver = delivery
+        await jobs.open(bot=None)
+        # 다시 조회하지 않고 저장된 결과를 바로 전달
+        assert not jobs._running
+        await asyncio.gather(*jobs._retrying)
+
+        assert delivery.sent == [("task-1", "https://example.com/video.mp4")]
+        assert rows(jobs) == []
+        await jobs.close()
+
+    asyncio.run(first_run())
+    asyncio.run(second_run())
+
+
+def test_deliver_uses_followup_while_token_is_valid(tmp_path, monkeypatch):
+    webhook = Recipient()
+    created = []
+
+    def partial(id, token, **kwargs):
+        created.append((id, token, kwargs))
+        return webhook
+
+    monkeypatch.setattr(discord.Webhook, "partial", partial)
+
+    async def main():
+        bot = DeliveryBot(Recipient(), Recipient())
+        jobs = VideoJobs(str(tmp_path / "jobs.db"))
+        await jobs.open(bot=bot)
+
+        assert await jobs.deliver(make_job(), "https://example.com/video.mp4")
+        assert created == [(3, "token", {'client': bot})]
+        assert webhook.sent[0][1]['ephemeral'] is True
+        assert bot.fetched == []
+        await jobs.close()
+
+    asyncio.run(main())
+
+
+def test_deliver_falls_back_to_channel_then_dm_after_token_expires(tmp_path):
+    async def main():
+        channel, user = Recipient(), Recipient()
+        jobs = VideoJobs(str(tmp_path / "jobs.db"))
+        await jobs.open(bot=DeliveryBot(channel, user))
+
+        # 토큰 만료 - 명령어를 보낸 채널에 멘션과 함께 전달
+        assert await jobs.deliver(make_job(token_ttl=-1), "https://example.com/video.mp4")
+        content, kwargs = channel.sent[0]
+        assert content.startswith("<@1> ") and "embed" in kwargs
+        assert user.sent == []
+
+        # 채널에 보낼 수 없으면 DM
+        channel.fail = True
+        assert await jobs.deliver(make_job(token_ttl=-1), "https://example.com/video.mp4")
+        assert len(user.sent) == 1
+
+        # 어디에도 보낼 수 없으면 실패 (작업은 남겨 두고 다시 전달)
+        user.fail = True
+        assert not await jobs.deliver(make_job(token_ttl=-1), "https://example.com/video.mp4")
+        await jobs.close()
+
+    asyncio.run(main())
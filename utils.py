@@ -1,6 +1,8 @@
 import asyncio
+import bisect
 import functools
-from typing import Callable, Any, List
+import unicodedata
+from typing import Callable, Any, Iterator, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,34 +31,230 @@ def async_retry(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0):
         return wrapper
     return decorator
 
+# 페이지를 끊을 자연스러운 경계 (앞쪽일수록 우선) / 코드 블록 안에서는 줄 단위로만
+_BREAKS = ("\n\n", "\n", ". ", "! ", "? ", "。", " ")
+_CODE_BREAKS = ("\n",)
+
+# 앞 글자와 하나의 글자(grapheme cluster)로 묶이는 문자
+_ZWJ = "\u200d"
+_EXTEND_RANGES = (
+    (0xFE00, 0xFE0F),     # 변형 선택자
+    (0x1F3FB, 0x1F3FF),   # 이모지 피부색
+    (0xE0020, 0xE007F),   # 태그 문자 (국기 이모지)
+    (0x1160, 0x11FF),     # 한글 조합형 중성 / 종성
+    (0xD7B0, 0xD7FF),     # 한글 조합형 중성 / 종성 확장
+)
+
+
+def _is_extend(char: str) -> bool:
+    """앞 글자에 붙어 하나의 글자를 이루는 문자인지"""
+    code = ord(char)
+    if code < 0x300:
+        return False
+    if unicodedata.combining(char) or char == _ZWJ:
+        return True
+    return any(low <= code <= high for low, high in _EXTEND_RANGES)
+
+
+def _is_regional_indicator(char: str) -> bool:
+    return 0x1F1E6 <= ord(char) <= 0x1F1FF
+
+
+def _grapheme_safe(text: str, start: int, index: int) -> int:
+    """index가 글자 중간이면 그 글자 앞으로 당긴 위치 (start보다 앞으로는 가지 않음)"""
+    while index > start + 1 and index < len(text):
+        if _is_extend(text[index]) or text[index - 1] == _ZWJ or (text[index - 1] == "\r" and text[index] == "\n"):
+            index -= 1
+            continue
+        if _is_regional_indicator(text[index]) and _is_regional_indicator(text[index - 1]):
+            # 국기는 지역 표시 문자 두 개가 한 쌍 - 앞쪽 연속 개수가 홀수면 쌍의 중간
+            run = 0
+            i = index - 1
+            while i >= start and _is_regional_indicator(text[i]):
+                run += 1
+                i -= 1
+            if run % 2:
+                index -= 1
+                continue
+        break
+    return index
+
+
+def _fence_marker(fence: str) -> str:
+    """여는 줄에서 표시 부분만 (예: "```python" -> "```")"""
+    return fence[:len(fence) - len(fence.lstrip(fence[0]))]
+
+
+def _fence_lines(text: str, start: int, end: int) -> Iterator[Tuple[int, str, str]]:
+    """
+    text[start:end] 안의 코드 블록 여닫는 줄 (``` 또는 ~~~, 앞 공백 3칸까지)
+
+    정규식으로 모든 줄 시작을 검사하지 않고 str.find로 후보만 찾습니다.
+
+    Yields:
+        (위치, 표시, 앞뒤 공백을 뺀 줄)
+    """
+    positions = {"`": text.find("```", start, end), "~": text.find("~~~", start, end)}
+    index = start
+    while True:
+        for char, position in positions.items():
+            if -1 < position < index:
+                positions[char] = text.find(char * 3, index, end)
+        candidates = [position for position in positions.values() if position != -1]
+        if not candidates:
+            return
+        found = min(candidates)
+
+        line_start = found
+        while line_start > 0 and found - line_start < 4 and text[line_start - 1] == " ":
+            line_start -= 1
+        line_end = text.find("\n", found, end)
+        if line_end == -1:
+            line_end = end
+        if (line_start == 0 or text[line_start - 1] == "\n") and found - line_start <= 3:
+            char = text[found]
+            marker_end = found + 3
+            while marker_end < line_end and text[marker_end] == char:
+                marker_end += 1
+            yield found, text[found:marker_end], text[found:line_end].strip()
+        index = line_end
+
+
+def _apply_fences(lines, fence: Optional[str]) -> Optional[str]:
+    """여닫는 줄들을 차례로 지난 뒤 열려 있는 코드 블록의 여는 줄"""
+    for _, marker, line in lines:
+        if fence is None:
+            fence = line
+            continue
+        # 같은 문자로 여는 표시 이상 길이이고 다른 내용이 없는 줄이 블록을 닫음
+        opening = _fence_marker(fence)
+        if marker[0] == opening[0] and len(marker) >= len(opening) and line == marker:
+            fence = None
+    return fence
+
+
+def fence_after(text: str, start: int, end: int, fence: Optional[str] = None) -> Optional[str]:
+    """
+    text[start:end]를 지난 뒤 열려 있는 코드 블록의 여는 줄
+
+    Args:
+        fence: start 시점에 열려 있던 코드 블록의 여는 줄 (없으면 None)
+
+    Returns:
+        end 시점에 열려 있는 코드 블록의 여는 줄 (닫혀 있으면 None)
+    """
+    return _apply_fences(_fence_lines(text, start, end), fence)
+
+
+class FenceIndex:
+    """텍스트의 코드 블록 여닫는 줄 목록 (한 번 훑어 두고 페이지마다 이분 탐색으로 조회)"""
+
+    def __init__(self, text: str, start: int = 0, end: Optional[int] = None):
+        self.lines = list(_fence_lines(text, start, len(text) if end is None else end))
+        self.positions = [position for position, _, _ in self.lines]
+
+    def after(self, start: int, end: int, fence: Optional[str] = None) -> Optional[str]:
+        """fence_after와 같지만 미리 찾아 둔 줄만 확인"""
+        low = bisect.bisect_left(self.positions, start)
+        high = bisect.bisect_left(self.positions, end, low)
+        if low == high:
+            return fence
+        return _apply_fences(self.lines[low:high], fence)
+
+
+def next_page(text: str, start: int, budget: int, fence: Optional[str] = None,
+              fences: Optional[FenceIndex] = None) -> Tuple[int, Optional[str]]:
+    """
+    start에서 시작하는 페이지를 끊을 위치 (문자열 복사 없이 오프셋으로 탐색)
+
+    페이지가 너무 짧아지지 않도록 범위의 뒤쪽 절반에서만 자연스러운 경계를 찾고,
+    없으면 글자가 깨지지 않는 위치에서 자릅니다. 코드 블록을 다시 열고 닫는 줄의
+    길이도 budget에 포함해 계산합니다.
+
+    Args:
+        budget: render_page 결과가 넘지 않아야 할 길이
+        fence: start 시점에 열려 있는 코드 블록의 여는 줄
+        fences: 여러 페이지를 이어서 나눌 때 재사용할 FenceIndex (없으면 이 페이지 범위만 훑음)
+
+    Returns:
+        (끊을 위치, 그 위치에서 열려 있는 코드 블록의 여는 줄)
+    """
+    room = max(budget - (len(fence) + 1 if fence else 0), 1)
+    if fences is None:
+        fences = FenceIndex(text, start, min(len(text), start + room))
+
+    if len(text) - start <= room:
+        fence_out = fences.after(start, len(text), fence)
+        if fence_out is None or len(text) - start + len(_fence_marker(fence_out)) + 1 <= room:
+            return len(text), fence_out
+
+    # 닫는 줄(보통 "\n```") 자리를 남기고 탐색
+    limit = min(len(text), start + max(room - 4, 1))
+    floor = start + (limit - start) // 2
+    separators = _CODE_BREAKS if fences.after(start, limit, fence) else _BREAKS
+    end = limit
+    for separator in separators:
+        index = text.rfind(separator, floor, limit)
+        if index != -1:
+            end = index + len(separator)
+            break
+    end = _grapheme_safe(text, start, end)
+    fence_out = fences.after(start, end, fence)
+
+    # 더 긴 표시(````)로 열린 블록이라 닫는 줄이 길어진 경우
+    excess = end - start + (len(_fence_marker(fence_out)) + 1 if fence_out else 0) - room
+    if excess > 0:
+        end = _grapheme_safe(text, start, max(end - excess, start + 1))
+        fence_out = fences.after(start, end, fence)
+    return end, fence_out
+
+
+def render_page(text: str, start: int, end: int,
+                fence_in: Optional[str] = None, fence_out: Optional[str] = None) -> str:
+    """페이지 내용 (앞 페이지에서 이어진 코드 블록은 다시 열고, 열린 채 끝나면 닫음)"""
+    body = text[start:end].rstrip()
+    if fence_in:
+        body = f"{fence_in}\n{body}"
+    if fence_out:
+        body = f"{body}\n{_fence_marker(fence_out)}"
+    return body
+
+
+def skip_newlines(text: str, index: int) -> int:
+    """다음 페이지는 줄바꿈 없이 시작"""
+    while index < len(text) and text[index] == "\n":
+        index += 1
+    return index
+
+
+def paginate(text: str, max_length: int = 2000) -> Iterator[Tuple[int, int, Optional[str], Optional[str]]]:
+    """
+    텍스트를 max_length 이하 페이지들로 나눔 (한 번 훑으며 오프셋만 계산)
+
+    Yields:
+        (시작, 끝, 시작 시 열려 있던 코드 블록, 끝에서 열려 있는 코드 블록)
+    """
+    fences = FenceIndex(text)
+    start = skip_newlines(text, 0)
+    fence = None
+    while start < len(text):
+        end, fence_out = next_page(text, start, max_length, fence, fences)
+        yield start, end, fence, fence_out
+        # 코드 블록 안의 빈 줄은 내용이므로 유지
+        start = end if fence_out else skip_newlines(text, end)
+        fence = fence_out
+
+
 def split_message(content: str, max_length: int = 2000) -> List[str]:
-    """긴 메시지를 여러 청크로 분할"""
+    """긴 메시지를 여러 청크로 분할 (자연스러운 경계 우선, 코드 블록은 청크마다 닫고 다시 엶)"""
     if len(content) <= max_length:
         return [content]
     
     chunks = []
-    current_chunk = ""
-    
-    # 줄바꿈을 기준으로 분할 시도
-    lines = content.split('\n')
-    
-    for line in lines:
-        if len(current_chunk) + len(line) + 1 <= max_length:
-            current_chunk += line + '\n'
-        else:
-            if current_chunk:
-                chunks.append(current_chunk.rstrip())
-                current_chunk = line + '\n'
-            else:
-                # 한 줄이 너무 긴 경우 강제 분할
-                while len(line) > max_length:
-                    chunks.append(line[:max_length])
-                    line = line[max_length:]
-                current_chunk = line + '\n'
-    
-    if current_chunk:
-        chunks.append(current_chunk.rstrip())
-    
+    for start, end, fence_in, fence_out in paginate(content, max_length):
+        chunk = render_page(content, start, end, fence_in, fence_out)
+        if chunk.strip():
+            chunks.append(chunk)
     return chunks
 
 def sanitize_filename(filename: str) -> str:
@@ -0,0 +1,363 @@
+"""
+비디오 작업 등록부 (SQLite WAL)
+
+제출한 비디오 작업(task_id)과 결과를 전달할 곳(사용자, 채널, 인터랙션 토큰)을 마감 시각과 함께
+저장해 두고, 결과를 전달하면 지웁니다. 기다리는 도중 봇이 재시작되어도 이미 비용을 낸 작업을
+잃지 않도록 시작할 때 남은 작업을 모두 다시 조회합니다(video_poller).
+
+결과가 나오면 결과도 함께 저장합니다. 어디에도 전달하지 못하면 작업을 지우지 않고 간격을 늘려 가며
+다시 보내고, 재시작하면 다시 조회하지 않고 저장된 결과를 바로 다시 보냅니다.
+전달은 최소 한 번입니다. 전송 직후 삭제 전에 봇이 종료되면 재시작 후 같은 결과를 한 번 더 보낼 수
+있습니다 (비용을 낸 결과를 잃는 것보다 중복 메시지가 낫다고 봄).
+
+결과 전달 순서:
+1. 인터랙션 토큰이 아직 유효하면(15분) 원래 명령어의 후속 메시지(ephemeral)
+2. 아니면 명령어를 보낸 채널에 사용자 멘션과 함께
+3. 채널에 보낼 수 없으면 사용자 DM
+
+비동기 모드(VIDEO_ASYNC_JOBS, 기본 꺼짐)에서는 명령어가 작업을 제출하고 바로 끝나며,
+완료를 기다려 결과를 보내는 일은 여기서 백그라운드 태스크로 처리합니다(start).
+이 경우 진행 상황 메시지는 없고, 렌더링이 토큰 만료(15분) 뒤에 끝나면 결과는 ephemeral이 아니라
+채널(멘션) 또는 DM으로 공개 전달됩니다.
+
+디스크 작업은 전용 스레드 하나에서 직렬로 실행됩니다 (QuotaStore와 같은 방식).
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
+
+import discord
+
+from env_manager import get_env, get_env_bool
+from request_manager_enhanced import DELIVERY_MARGIN
+from video_poller import POLL_INITIAL_INTERVAL
+from ai_services.minimax_service import wait_for_video, VIDEO_TIMEOUT
+from metrics import latency_metrics, STAGE_DISCORD_SEND
+
+logger = logging.getLogger(__name__)
+
+# 환경 변수에서 설정값 로드 (캐시된 값 사용, 경로를 비우면 영속화 비활성화)
+VIDEO_JOBS_DB_PATH = get_env("VIDEO_JOBS_DB_PATH", "logs/video_jobs.db")
+# 비동기 모드: 명령어는 제출 후 바로 작업 ID로 응답하고 완료는 백그라운드에서 전달 (기본은 완료까지 대기)
+VIDEO_ASYNC_JOBS = get_env_bool("VIDEO_ASYNC_JOBS", False)
+
+# 마감이 지난 작업도 재시작 후 이 시간(초) 동안은 상태를 확인 (꺼져 있는 동안 끝났을 수 있음)
+RESUME_GRACE = 60
+
+# 전달하지 못한 결과는 이 간격(초)부터 두 배씩 늘려 (최대 DELIVERY_RETRY_MAX초) 다시 보냄
+DELIVERY_RETRY_INITIAL = 60
+DELIVERY_RETRY_MAX = 3600
+# 마감 후 이 시간(초)이 지나도록 전달하지 못하면 포기 (다운로드 링크도 그 전에 만료됨)
+DELIVERY_GIVE_UP = 86400
+
+
+@dataclass
+class VideoJob:
+    task_id: str
+    user_id: int
+    channel_id: Optional[int]
+    application_id: int
+    interaction_token: str
+    prompt: str
+    token_expires_at: float  # 인터랙션 토큰 만료 시각 (벽시계)
+    deadline: float  # 결과를 기다릴 마지막 시각 (벽시계)
+    result: Optional[str] = None  # 아직 전달하지 못한 결과 (다운로드 URL 또는 에러 메시지)
+
+
+def video_result_message(prompt: str, result: str) -> Tuple[str, Optional[discord.Embed]]:
+    """비디오 생성 결과(다운로드 URL 또는 에러 메시지)를 보낼 메시지와 임베드"""
+    if not result.startswith("http"):
+        return f"❌ {result}", None
+
+    embed = discord.Embed(
+        title="🎬 MiniMax AI 생성 비디오",
+        description=prompt,
+        color=0x00c851
+    )
+    embed.add_field(
+        name="📥 다운로드 링크",
+        value=f"[비디오 다운로드]({result})",
+        inline=False
+    )
+    embed.add_field(
+        name="💡 안내",
+        value="링크를 클릭하여 비디오를 다운로드하세요.",
+        inline=False
+    )
+    embed.set_footer(text="Powered by MiniMax T2V-01 | 비디오 링크는 일정 시간 후 만료됩니다")
+    return "✅ 비디오 생성이 완료되었습니다!", embed
+
+
+class VideoJobStore:
+    """진행 중인 비디오 작업 SQLite 저장소"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        # 연결은 이 스레드에서만 사용
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="video-jobs")
+
+    def open(self) -> List[VideoJob]:
+        """데이터베이스 열기 및 남은 작업 조회 (전용 스레드에서 호출, 실패 시 영속화 없이 동작)"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS video_jobs ("
+                " task_id TEXT PRIMARY KEY,"
+                " user_id INTEGER NOT NULL,"
+                " channel_id INTEGER,"
+                " application_id INTEGER NOT NULL,"
+                " interaction_token TEXT NOT NULL,"
+                " prompt TEXT NOT NULL,"
+                " token_expires_at REAL NOT NULL,"
+                " deadline REAL NOT NULL,"
+                " result TEXT)"
+            )
+            # result 열이 없던 이전 버전의 파일
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(video_jobs)")}
+            if "result" not in columns:
+                conn.execute("ALTER TABLE video_jobs ADD COLUMN result TEXT")
+            conn.commit()
+            rows = conn.execute(
+                "SELECT task_id, user_id, channel_id, application_id, interaction_token, prompt,"
+                " token_expires_at, deadline, result FROM video_jobs ORDER BY deadline"
+            ).fetchall()
+            self._conn = conn
+            logger.info(f"Video job store opened: {self.path}")
+            return [VideoJob(*row) for row in rows]
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Failed to open video job store {self.path}: {e}")
+            return []
+
+    def save(self, job: VideoJob) -> None:
+        """작업 저장 (전용 스레드)"""
+        if self._conn is None:
+            return
+        try:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO video_jobs (task_id, user_id, channel_id, application_id,"
+                    " interaction_token, prompt, token_expires_at, deadline, result)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job.task_id, job.user_id, job.channel_id, job.application_id,
+                     job.interaction_token, job.prompt, job.token_expires_at, job.deadline, job.result),
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Video job write failed: {e}")
+
+    def save_result(self, task_id: str, result: str) -> None:
+        """전달할 결과 저장 (전용 스레드)"""
+        if self._conn is None:
+            return
+        try:
+            with self._conn:
+                self._conn.execute("UPDATE video_jobs SET result = ? WHERE task_id = ?", (result, task_id))
+        except sqlite3.Error as e:
+            logger.error(f"Video job result write failed: {e}")
+
+    def delete(self, task_id: str) -> None:
+        """결과를 전달한 작업 삭제 (전용 스레드)"""
+        if self._conn is None:
+            return
+        try:
+            with self._conn:
+                self._conn.execute("DELETE FROM video_jobs WHERE task_id = ?", (task_id,))
+        except sqlite3.Error as e:
+            logger.error(f"Video job delete failed: {e}")
+
+    def close(self) -> None:
+        """데이터베이스 닫기 (전용 스레드에서 호출)"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class VideoJobs:
+    """비디오 작업 등록 / 재시작 후 재개 / 결과 전달"""
+
+    def __init__(self, path: Optional[str] = VIDEO_JOBS_DB_PATH):
+        """
+        Args:
+            path: SQLite 파일 경로 (비어 있으면 저장하지 않음 - 재시작하면 작업을 잃음)
+        """
+        self.store: Optional[VideoJobStore] = VideoJobStore(path) if path else None
+        self._bot = None
+        self._running: Set[asyncio.Task] = set()  # 백그라운드로 기다리는 작업 (재개한 작업 포함)
+        self._retrying: Set[asyncio.Task] = set()  # 전달에 실패해 다시 보낼 결과
+        self.resumed = 0
+        self.delivery_retries = 0
+
+    def __len__(self) -> int:
+        return len(self._running)
+
+    async def _run(self, func, *args):
+        """저장소 작업을 전용 스레드에서 실행"""
+        return await asyncio.get_running_loop().run_in_executor(self.store.executor, func, *args)
+
+    async def open(self, bot) -> None:
+        """저장소를 열고 끝나지 않은 작업의 조회 재개 (봇 시작 시, 로그인 후)"""
+        self._bot = bot
+        jobs = await self._run(self.store.open) if self.store is not None else []
+        for job in jobs:
+            if job.result is not None:
+                # 결과는 나왔지만 전달하지 못한 작업 - 다시 조회하지 않고 바로 다시 전달
+                logger.info(f"Retrying delivery of video task {job.task_id} for user {job.user_id}")
+                self._spawn(self._retrying, self._redeliver(job, 0))
+                continue
+            remaining = max(job.deadline - time.time(), RESUME_GRACE)
+            logger.info(f"Resuming video task {job.task_id} for user {job.user_id} ({remaining:.0f}s left)")
+            # 꺼져 있는 동안 콜백을 놓쳤을 수 있으므로 바로 조회
+            self.start(job, remaining, POLL_INITIAL_INTERVAL)
+        self.resumed += len(jobs)
+        if jobs:
+            logger.info(f"Resumed {len(jobs)} unfinished video job(s)")
+
+    async def close(self) -> None:
+        """백그라운드 작업 중지 후 저장소 닫기 (남은 작업은 다음 시작 때 다시 재개)"""
+        tasks = self._running | self._retrying
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.store is not None:
+            await self._run(self.store.close)
+            self.store.executor.shutdown(wait=False)
+
+    async def add(self, interaction: discord.Interaction, prompt: str, task_id: str,
+                  timeout: float = VIDEO_TIMEOUT) -> VideoJob:
+        """제출한 작업과 결과를 전달할 곳 저장"""
+        job = VideoJob(
+            task_id=task_id,
+            user_id=interaction.user.id,
+            channel_id=interaction.channel_id,
+            application_id=interaction.application_id,
+            interaction_token=interaction.token,
+            prompt=prompt,
+            token_expires_at=interaction.expires_at.timestamp(),
+            deadline=time.time() + timeout,
+        )
+        if self.store is not None:
+            await self._run(self.store.save, job)
+        return job
+
+    async def finish(self, job: VideoJob, result: str) -> None:
+        """
+        결과 저장 후 전달하고 작업 삭제
+
+        어디에도 전달하지 못하면 작업을 남겨 두고 백그라운드에서 다시 전달합니다 (재시작 후에도 계속).
+        전송과 삭제 사이에 종료되면 재시작 후 같은 결과를 한 번 더 보냅니다 (최소 한 번 전달).
+        """
+        job.result = result
+        if self.store is not None:
+            await self._run(self.store.save_result, job.task_id, result)
+        if await self._deliver_timed(job):
+            await self._forget(job)
+        else:
+            self._spawn(self._retrying, self._redeliver(job, DELIVERY_RETRY_INITIAL))
+
+    async def _deliver_timed(self, job: VideoJob) -> bool:
+        with latency_metrics.timer('video', STAGE_DISCORD_SEND):
+            return await self.deliver(job, job.result)
+
+    async def _forget(self, job: VideoJob) -> None:
+        """전달한 작업 삭제 (보낸 뒤에는 취소되어도 삭제는 끝까지 진행해 중복 전송 구간을 줄임)"""
+        if self.store is not None:
+            await asyncio.shield(self._run(self.store.delete, job.task_id))
+
+    async def _redeliver(self, job: VideoJob, delay: float) -> None:
+        """전달하지 못한 결과를 간격을 늘려 가며 다시 전달 (마감 후 DELIVERY_GIVE_UP초가 지나면 포기)"""
+        try:
+            while True:
+                if time.time() + delay > job.deadline + DELIVERY_GIVE_UP:
+                    logger.error(f"Giving up delivering video task {job.task_id} to user {job.user_id}")
+                    await self._forget(job)
+                    return
+                if delay > 0:
+                    logger.warning(f"Video task {job.task_id} undelivered, retrying in {delay:.0f}s")
+                    await asyncio.sleep(delay)
+                self.delivery_retries += 1
+                if await self._deliver_timed(job):
+                    await self._forget(job)
+                    return
+                delay = min(max(delay * 2, DELIVERY_RETRY_INITIAL), DELIVERY_RETRY_MAX)
+        except Exception as e:
+            logger.error(f"Video task {job.task_id} delivery retry failed: {e}")
+
+    def start(self, job: VideoJob, timeout: Optional[float] = None,
+              poll_interval: Optional[float] = None) -> None:
+        """
+        완료 대기와 결과 전달을 백그라운드에서 진행 (호출한 쪽은 기다리지 않음)
+
+        Args:
+            timeout: 최대 대기 시간 (없으면 마감 시각까지)
+            poll_interval: 첫 조회까지 간격 (없으면 기본값)
+        """
+        if timeout is None:
+            timeout = max(job.deadline - time.time(), 0)
+        self._spawn(self._running, self._follow(job, timeout, poll_interval))
+
+    @staticmethod
+    def _spawn(tasks: Set[asyncio.Task], coro) -> None:
+        task = asyncio.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def _follow(self, job: VideoJob, timeout: float, poll_interval: Optional[float]) -> None:
+        try:
+            result = await wait_for_video(job.task_id, timeout, poll_interval)
+            await self.finish(job, result)
+        except Exception as e:
+            logger.error(f"Video task {job.task_id} background delivery failed: {e}")
+
+    async def deliver(self, job: VideoJob, result: str) -> bool:
+        """
+        결과 전달 (후속 메시지 -> 채널 -> DM 순서)
+
+        Returns:
+            어딘가에 전달했으면 True
+        """
+        content, embed = video_result_message(job.prompt, result)
+        extra = {'embed': embed} if embed is not None else {}
+
+        # 1. 원래 명령어의 후속 메시지 (Interaction.followup과 같은 웹훅)
+        if time.time() < job.token_expires_at - DELIVERY_MARGIN:
+            followup = discord.Webhook.partial(job.application_id, job.interaction_token, client=self._bot)
+            try:
+                await followup.send(content, ephemeral=True, **extra)
+                return True
+            except discord.DiscordException as e:
+                logger.warning(f"Video task {job.task_id} followup failed: {e}")
+
+        # 2. 명령어를 보낸 채널
+        mention = f"<@{job.user_id}> "
+        if job.channel_id is not None:
+            try:
+                channel = self._bot.get_channel(job.channel_id) or await self._bot.fetch_channel(job.channel_id)
+                await channel.send(mention + content, **extra)
+                return True
+            except discord.DiscordException as e:
+                logger.warning(f"Video task {job.task_id} channel delivery failed: {e}")
+
+        # 3. 사용자 DM
+        try:
+            user = self._bot.get_user(job.user_id) or await self._bot.fetch_user(job.user_id)
+            await user.send(content, **extra)
+            return True
+        except discord.DiscordException as e:
+            logger.error(f"Could not deliver video task {job.task_id} to user {job.user_id}: {e}")
+            return False
+
+
+# 글로벌 인스턴스 생성
+video_jobs = VideoJobs()
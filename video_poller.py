@@ -0,0 +1,230 @@
+"""
+비디오 작업 상태 조회 (중앙 폴러)
+
+진행 중인 모든 비디오 작업(task_id)을 백그라운드 태스크 하나가 조회합니다.
+작업마다 다음 조회 시각을 힙에 넣어 두고, 조회할 때가 된 작업들만 묶어서
+(최대 max_concurrent개씩 동시에) 조회한 뒤 다음 시각을 다시 잡습니다.
+
+- 조회 간격은 initial_interval에서 시작해 조회할 때마다 backoff배로 늘어나
+  max_interval까지 커집니다 (막 시작한 작업은 빨리, 오래된 작업은 드물게).
+- 기다리는 쪽은 watch()가 돌려준 future만 기다리므로 작업마다 조회 루프를 두지 않습니다.
+- future가 취소되면(예: 호출한 쪽의 시간 초과) 다음 조회 때 작업을 목록에서 뺍니다.
+- 조회 오류(Unknown)는 연속 MAX_QUERY_FAILURES번까지는 다시 시도합니다.
+- 조회할 작업이 없으면 태스크는 끝나고, 다음 watch() 때 다시 시작합니다.
+- poke()는 작업을 바로 조회하도록 앞당깁니다 (완료 콜백 등). 결과는 항상 조회 응답으로만 정합니다.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 조회 간격 (초)
+POLL_INITIAL_INTERVAL = 5.0
+POLL_MAX_INTERVAL = 30.0
+POLL_BACKOFF = 1.5
+
+# 한 번에 동시에 보낼 최대 조회 수
+POLL_MAX_CONCURRENT = 8
+
+# 조회 오류가 이만큼 연속되면 작업 실패로 처리
+MAX_QUERY_FAILURES = 3
+
+# 작업이 끝난 상태 (그 밖의 상태는 진행 중)
+STATUS_SUCCESS = "Success"
+STATUS_FAIL = "Fail"
+STATUS_UNKNOWN = "Unknown"
+
+
+class _Job:
+    """조회 중인 작업 하나"""
+
+    __slots__ = ("task_id", "future", "interval", "failures", "started", "polls", "due", "polling", "poked")
+
+    def __init__(self, task_id: str, future: asyncio.Future, interval: float, now: float):
+        self.task_id = task_id
+        self.future = future
+        self.interval = interval
+        self.failures = 0
+        self.started = now
+        self.polls = 0
+        self.due = now  # 예약된 다음 조회 시각 (힙에서 이 시각이 아닌 항목은 무시)
+        self.polling = False
+        self.poked = False  # 조회 중에 앞당기기 요청이 옴
+
+
+class VideoPoller:
+    """진행 중인 비디오 작업들을 하나의 백그라운드 태스크로 조회"""
+
+    def __init__(self, query: Callable[[str], Awaitable[Tuple[str, str]]],
+                 initial_interval: float = POLL_INITIAL_INTERVAL,
+                 max_interval: float = POLL_MAX_INTERVAL, backoff: float = POLL_BACKOFF,
+                 max_concurrent: int = POLL_MAX_CONCURRENT,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            query: task_id를 받아 (file_id, 상태)를 돌려주는 조회 함수 (오류면 상태 Unknown)
+            initial_interval: 첫 조회까지 간격 (초)
+            max_interval: 최대 조회 간격 (초)
+            backoff: 조회할 때마다 간격에 곱할 비율
+            max_concurrent: 동시에 보낼 최대 조회 수
+            clock: 단조 증가 시계 함수
+        """
+        self.query = query
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_concurrent = max_concurrent
+        self._clock = clock
+        self._jobs: Dict[str, _Job] = {}
+        self._schedule: List[Tuple[float, str]] = []  # (다음 조회 시각, task_id) 힙
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def watch(self, task_id: str, initial_interval: Optional[float] = None) -> asyncio.Future:
+        """
+        작업이 끝날 때까지 조회하도록 등록
+
+        Args:
+            initial_interval: 이 작업의 첫 조회까지 간격 (없으면 기본값, 완료 콜백을 받는 작업은
+                콜백이 오지 않을 때만 조회하도록 길게 지정 - 이후 간격도 이 값보다 줄지 않음)
+
+        Returns:
+            (file_id, 상태)로 완료되는 future (상태는 Success / Fail / Unknown)
+        """
+        job = self._jobs.get(task_id)
+        if job is not None and not job.future.done():
+            return job.future
+
+        now = self._clock()
+        interval = initial_interval if initial_interval is not None else self.initial_interval
+        job = self._jobs[task_id] = _Job(task_id, asyncio.get_running_loop().create_future(), interval, now)
+        self._schedule_at(job, now + job.interval)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return job.future
+
+    def poke(self, task_id: str) -> bool:
+        """
+        작업을 바로 조회하도록 앞당김 (완료 콜백 등)
+
+        알림 내용은 믿지 않고 조회 응답으로만 완료 여부와 file_id를 정합니다.
+
+        Returns:
+            기다리던 작업이면 True
+        """
+        job = self._jobs.get(task_id)
+        if job is None or job.future.done():
+            return False
+        if job.polling:
+            # 이미 보낸 조회가 알림보다 먼저 처리되었을 수 있으므로 끝나면 한 번 더 조회
+            job.poked = True
+        else:
+            self._schedule_at(job, self._clock())
+        return True
+
+    def _schedule_at(self, job: _Job, when: float) -> None:
+        job.due = when
+        heapq.heappush(self._schedule, (when, job.task_id))
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        """조회할 때가 된 작업을 묶어서 조회 (작업이 없으면 종료)"""
+        try:
+            while self._jobs:
+                now = self._clock()
+                due: List[_Job] = []
+                while self._schedule and self._schedule[0][0] <= now and len(due) < self.max_concurrent:
+                    when, task_id = heapq.heappop(self._schedule)
+                    job = self._jobs.get(task_id)
+                    if job is None or when != job.due:
+                        # 끝난 작업 또는 앞당기면서 대체된 예약
+                        continue
+                    if job.future.done():
+                        # 기다리는 쪽이 포기했거나 이미 결과를 받음
+                        del self._jobs[task_id]
+                        continue
+                    due.append(job)
+
+                if due:
+                    await asyncio.gather(*(self._poll(job) for job in due))
+                    continue
+
+                if not self._schedule:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._schedule[0][0] - now)
+                except asyncio.TimeoutError:
+                    pass
+        except Exception as e:
+            logger.error(f"Video poller error: {e}")
+            for job in self._jobs.values():
+                if not job.future.done():
+                    job.future.set_exception(e)
+            self._jobs.clear()
+            self._schedule.clear()
+
+    async def _poll(self, job: _Job) -> None:
+        """작업 하나 조회 후 완료 처리 또는 다음 조회 예약"""
+        job.polling = True
+        try:
+            file_id, status = await self.query(job.task_id)
+        except Exception as e:
+            logger.warning(f"Video task {job.task_id} status query failed: {e}")
+            file_id, status = "", STATUS_UNKNOWN
+        finally:
+            job.polling = False
+        self.polls += 1
+        job.polls += 1
+        if self._jobs.get(job.task_id) is not job or job.future.done():
+            return
+
+        if status == STATUS_UNKNOWN:
+            job.failures += 1
+            if job.failures < MAX_QUERY_FAILURES:
+                self._reschedule(job)
+                return
+        else:
+            job.failures = 0
+
+        if status in (STATUS_SUCCESS, STATUS_FAIL, STATUS_UNKNOWN):
+            del self._jobs[job.task_id]
+            job.future.set_result((file_id, status))
+            logger.info(f"Video task {job.task_id} finished with {status} after "
+                        f"{self._clock() - job.started:.0f}s ({job.polls} polls)")
+            return
+
+        self._reschedule(job)
+
+    def _reschedule(self, job: _Job) -> None:
+        if job.poked:
+            job.poked = False
+            self._schedule_at(job, self._clock())
+            return
+        job.interval = min(max(self.max_interval, job.interval), job.interval * self.backoff)
+        self._schedule_at(job, self._clock() + job.interval)
+
+    async def stop(self) -> None:
+        """조회 태스크 중지 (기다리던 작업은 취소)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for job in self._jobs.values():
+            job.future.cancel()
+        self._jobs.clear()
+        self._schedule.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'jobs': len(self._jobs), 'polls': self.polls}
@@ -0,0 +1,157 @@
+"""
+큐 작업자 자동 확장 풀
+
+대기열 길이와 측정된 처리 시간에 맞춰 작업자 수를 늘리고, 일정 시간 일이 없는
+작업자는 스스로 종료합니다. 작업자 수는 [min_workers, 동시성 한도] 범위를 벗어나지 않으므로
+적응형 동시성 한도가 올라가면 그만큼 작업자도 따라 늘어날 수 있습니다.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """요청 타입 하나를 처리하는 자동 확장 작업자 풀"""
+
+    def __init__(self, name: str, queue, limiter, handler: Callable[[object], Awaitable[bool]],
+                 min_workers: int = 1, max_workers: int = 10,
+                 idle_timeout: float = 60.0, target_wait: float = 2.0):
+        """
+        Args:
+            name: 로그용 이름 (요청 타입)
+            queue: get() / qsize()를 제공하는 요청 큐
+            limiter: current_limit을 제공하는 동시성 제한기
+            handler: 꺼낸 요청 하나를 처리하는 코루틴 함수 (실제로 처리했으면 True, 제외했으면 False -
+                처리한 요청만 처리 시간에 반영)
+            min_workers / max_workers: 작업자 수 범위
+            idle_timeout: 이 시간 동안 일이 없으면 (min_workers 초과분) 작업자 종료
+            target_wait: 대기 중인 요청이 이 시간 안에 시작되도록 작업자 수 산정
+        """
+        self.name = name
+        self.queue = queue
+        self.limiter = limiter
+        self.handler = handler
+        self.min_workers = min_workers
+        self.max_workers = max(max_workers, min_workers)
+        self.idle_timeout = idle_timeout
+        self.target_wait = target_wait
+
+        self.tasks: Set[asyncio.Task] = set()
+        self.idle = 0
+        self.service_time: Optional[float] = None  # 처리 시간 EWMA (초, 실제로 처리한 요청만)
+        self.spawned_total = 0
+        self.retired_total = 0
+        self._running = False
+
+    @property
+    def size(self) -> int:
+        return len(self.tasks)
+
+    @property
+    def busy(self) -> int:
+        return self.size - self.idle
+
+    def start(self) -> None:
+        """최소 작업자 수만큼 시작"""
+        self._running = True
+        self.scale()
+
+    def desired_workers(self) -> int:
+        """현재 대기열과 처리 시간 기준으로 필요한 작업자 수"""
+        depth = self.queue.qsize()
+        if self.service_time is None:
+            needed = self.busy + depth
+        else:
+            # target_wait 안에 대기열을 소화하는 데 필요한 작업자 (대기 요청 수보다 많을 필요는 없음)
+            extra = math.ceil(depth * self.service_time / self.target_wait)
+            needed = self.busy + min(depth, extra)
+
+        upper = min(self.max_workers, self.limiter.current_limit)
+        return max(self.min_workers, min(needed, upper))
+
+    def scale(self) -> None:
+        """부족한 작업자 추가 (줄이는 것은 작업자가 유휴 시간 초과 시 스스로 종료)"""
+        if not self._running:
+            return
+
+        for _ in range(self.desired_workers() - self.size):
+            self.spawned_total += 1
+            # 새 작업자는 시작 전부터 유휴로 계산 (연속 호출 시 중복 생성 방지)
+            self.idle += 1
+            task = asyncio.create_task(self._worker(self.spawned_total))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _worker(self, worker_id: int) -> None:
+        """작업자 - 유휴 시간이 길어지면 종료"""
+        logger.debug(f"Started {self.name} worker {worker_id}")
+        waiting = True
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.queue.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if self.size > self.min_workers:
+                        # 동시에 시간 초과된 다른 작업자가 최소 수를 계산할 수 있도록 즉시 제외
+                        self.tasks.discard(asyncio.current_task())
+                        self.retired_total += 1
+                        logger.debug(f"Retiring idle {self.name} worker {worker_id}")
+                        break
+                    continue
+
+                waiting = False
+                self.idle -= 1
+                start = time.monotonic()
+                try:
+                    served = await self.handler(request)
+                    if served:
+                        # 마감 초과로 제외한 요청(짧은 안내 메시지만 보냄)은 처리 시간에서 제외 -
+                        # 과부하로 제외가 많아질수록 처리 시간이 과소 추정되지 않도록
+                        self._observe(time.monotonic() - start)
+                finally:
+                    waiting = True
+                    self.idle += 1
+
+                # 아직 대기 중인 요청이 많으면 작업자 추가
+                if self.queue.qsize():
+                    self.scale()
+
+        except asyncio.CancelledError:
+            logger.debug(f"{self.name} worker {worker_id} cancelled")
+        finally:
+            if waiting:
+                self.idle -= 1
+
+    def _observe(self, elapsed: float) -> None:
+        """처리 시간 EWMA 갱신"""
+        if self.service_time is None:
+            self.service_time = elapsed
+        else:
+            self.service_time += 0.2 * (elapsed - self.service_time)
+        # 큐의 마감 여유 계산에 측정된 처리 시간 반영
+        self.queue.expected_service = self.service_time
+
+    async def stop(self) -> None:
+        """모든 작업자 중지"""
+        self._running = False
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'workers': self.size,
+            'idle': self.idle,
+            'busy': self.busy,
+            'min': self.min_workers,
+            'max': min(self.max_workers, self.limiter.current_limit),
+            'service_time': round(self.service_time, 3) if self.service_time is not None else None,
+            'spawned': self.spawned_total,
+            'retired': self.retired_total,
+        }